@@ -0,0 +1,178 @@
+import math
+
+import numpy as np
+
+
+# Стандартная атмосфера США 1976 г. (US76): высота (м) — плотность (кг/м³)
+US76_EARTH_PROFILE = (
+    (0, 1.225),
+    (5000, 7.364e-1),
+    (10000, 4.135e-1),
+    (15000, 1.948e-1),
+    (20000, 8.891e-2),
+    (25000, 4.008e-2),
+    (30000, 1.841e-2),
+    (35000, 8.463e-3),
+    (40000, 3.996e-3),
+    (45000, 1.966e-3),
+    (50000, 1.027e-3),
+    (55000, 5.681e-4),
+    (60000, 3.097e-4),
+    (65000, 1.632e-4),
+    (70000, 8.283e-5),
+    (75000, 3.992e-5),
+    (80000, 1.846e-5),
+    (85000, 8.220e-6),
+    (90000, 3.416e-6),
+    (95000, 1.393e-6),
+    (100000, 5.604e-7),
+)
+
+# Табличные профили, на которые можно сослаться из CelestialBody.BODIES
+ATMOSPHERE_PROFILES = {
+    'us76': US76_EARTH_PROFILE,
+}
+
+
+class AtmosphereTable:
+    """
+    Плотность атмосферы, предрассчитанная на равномерной сетке высот.
+
+    Поиск — O(1): индекс узла вычисляется делением высоты на шаг сетки,
+    плотность — интерполяцией логарифма между соседними узлами (внутри
+    интервала плотность меняется экспоненциально). Экспоненциальный профиль
+    воспроизводится точно и без изломов производной в узлах: неявные методы
+    в плотной атмосфере иначе вынуждены дробить шаг на каждом узле сетки.
+    Экспонента профиля и ветвление по типу планеты выполняются один раз
+    при построении таблицы.
+    """
+
+    def __init__(self, densities, top):
+        """
+        Args:
+            densities: плотности (кг/м³, больше нуля) в узлах равномерной
+                       сетки от 0 до top
+            top: верхняя граница атмосферы (м)
+        """
+        self.top = float(top)
+        self.densities = np.asarray(densities, dtype=float)
+        self.n_intervals = len(self.densities) - 1
+        self.step = self.top / self.n_intervals
+        self.heights = np.linspace(0.0, self.top, self.n_intervals + 1)
+        # Приращение логарифма плотности на интервале сетки
+        self.log_slopes = np.diff(np.log(self.densities))
+
+        # Списки быстрее массивов NumPy при скалярной индексации
+        self._inv_step = 1.0 / self.step
+        self._density_list = self.densities.tolist()
+        self._log_slope_list = self.log_slopes.tolist()
+        self._last = self.n_intervals - 1
+
+    @property
+    def surface_density(self):
+        """Плотность у поверхности (кг/м³)"""
+        return float(self.densities[0])
+
+    def density(self, height):
+        """
+        Плотность на высоте height (м); ниже поверхности — у поверхности,
+        выше верхней границы — ноль
+        """
+        if height > self.top:
+            return 0.0
+        if height <= 0:
+            return self._density_list[0]
+
+        position = height * self._inv_step
+        i = int(position)
+        if i > self._last:
+            i = self._last
+        return self._density_list[i] * math.exp((position - i) * self._log_slope_list[i])
+
+    def density_gradient(self, height):
+        """
+        Плотность и её производная по высоте dρ/dh
+
+        Returns:
+            Кортеж (ρ, dρ/dh)
+        """
+        if height > self.top or height <= 0:
+            return self.density(height), 0.0
+
+        position = height * self._inv_step
+        i = int(position)
+        if i > self._last:
+            i = self._last
+        log_slope = self._log_slope_list[i]
+        density = self._density_list[i] * math.exp((position - i) * log_slope)
+        return density, density * log_slope * self._inv_step
+
+    def density_array(self, heights):
+        """Векторный вариант density для массива высот"""
+        heights = np.asarray(heights, dtype=float)
+        position = np.clip(heights, 0.0, self.top) * self._inv_step
+        index = np.minimum(position.astype(np.intp), self._last)
+        values = self.densities[index] * np.exp((position - index) * self.log_slopes[index])
+        return np.where(heights > self.top, 0.0, values)
+
+
+class ExponentialAtmosphere(AtmosphereTable):
+    """Экспоненциальная атмосфера ρ = ρ₀ · exp(-h / H), сведённая к таблице"""
+
+    def __init__(self, surface_density, scale_height, top, nodes_per_scale_height=64):
+        """
+        Args:
+            surface_density: плотность у поверхности (кг/м³)
+            scale_height: высота однородной атмосферы H (м)
+            top: верхняя граница атмосферы (м)
+            nodes_per_scale_height: число узлов сетки на одну высоту H
+        """
+        self.scale_height = scale_height
+        n_intervals = max(1, int(np.ceil(top / scale_height * nodes_per_scale_height)))
+        heights = np.linspace(0.0, top, n_intervals + 1)
+        super().__init__(surface_density * np.exp(-heights / scale_height), top)
+
+
+class TabulatedAtmosphere(AtmosphereTable):
+    """
+    Кусочно-заданный профиль плотности (например, US76).
+    Между опорными точками плотность интерполируется по логарифму,
+    затем переносится на равномерную сетку с шагом step.
+    """
+
+    def __init__(self, profile, top=None, step=100.0):
+        """
+        Args:
+            profile: последовательность пар (высота в м, плотность в кг/м³)
+            top: верхняя граница атмосферы (по умолчанию — последняя точка профиля)
+            step: шаг равномерной сетки (м)
+        """
+        altitudes, densities = np.asarray(profile, dtype=float).T
+        if top is None:
+            top = altitudes[-1]
+        n_intervals = max(1, int(np.ceil(top / step)))
+        heights = np.linspace(0.0, top, n_intervals + 1)
+        log_density = np.interp(heights, altitudes, np.log(densities))
+        super().__init__(np.exp(log_density), top)
+
+
+def build_atmosphere(body_params):
+    """
+    Построение модели атмосферы по параметрам небесного тела
+
+    Returns:
+        AtmosphereTable или None, если атмосферы нет
+    """
+    top = body_params['atmosphere_height']
+    if top <= 0:
+        return None
+
+    profile = body_params.get('atmosphere_profile')
+    if profile is not None:
+        return TabulatedAtmosphere(ATMOSPHERE_PROFILES[profile], top=top)
+
+    if body_params.get('surface_density', 0) <= 0:
+        return None
+
+    return ExponentialAtmosphere(body_params['surface_density'],
+                                 body_params['scale_height'], top)
@@ -0,0 +1,94 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import os
+
+import matplotlib
+
+from celestial_bodies import CelestialBody
+
+
+# Одна задача отрисовки: тело, траектория [x, y, z], моменты времени,
+# имя выходных файлов (без расширения) и заголовок
+RenderJob = namedtuple('RenderJob', ['body', 'trajectory', 'time', 'name', 'title'])
+
+# Визуализаторы процесса-исполнителя по названиям тел: фигура и сетка
+# планеты создаются один раз и переиспользуются для всех задач
+_worker_visualizers = {}
+
+
+def _init_worker():
+    """Инициализация исполнителя: неинтерактивный бэкенд Agg"""
+    matplotlib.use('Agg')
+
+
+def _visualizer(body):
+    """Визуализатор для тела (свой у каждого процесса)"""
+    from visualization_planet import PlanetVisualizer
+
+    visualizer = _worker_visualizers.get(body)
+    if visualizer is None:
+        visualizer = PlanetVisualizer(CelestialBody.get_body_params(body))
+        _worker_visualizers[body] = visualizer
+    return visualizer
+
+
+def render_job(job, output_dir, animate=False, animation_format='gif', fps=30,
+               duration=10, dpi=100):
+    """
+    Отрисовка одной задачи в файлы
+
+    Returns:
+        Список путей к созданным файлам
+    """
+    job = job if isinstance(job, RenderJob) else RenderJob(*job)
+    visualizer = _visualizer(job.body)
+    title = job.title or f"Падение на {job.body.capitalize()}"
+
+    paths = [os.path.join(output_dir, f"{job.name}.png")]
+    visualizer.save_static_plot(job.trajectory, paths[0], title, dpi=dpi)
+
+    if animate:
+        paths.append(os.path.join(output_dir, f"{job.name}.{animation_format}"))
+        visualizer.save_animation(job.trajectory, job.time, paths[1], title,
+                                  fps=fps, duration=duration, dpi=dpi)
+    return paths
+
+
+def render_batch(jobs, output_dir, max_workers=None, chunk_size=None, animate=False,
+                 animation_format='gif', fps=30, duration=10, dpi=100):
+    """
+    Параллельная отрисовка траекторий в файлы без открытия окон
+
+    Задачи распределяются по пулу процессов с бэкендом Agg. Каждый процесс
+    держит свою фигуру для каждого тела и обновляет в ней только траекторию.
+
+    Args:
+        jobs: список RenderJob (или кортежей в том же порядке полей)
+        output_dir: каталог для PNG и анимаций
+        max_workers: число процессов (по умолчанию — число ядер)
+        chunk_size: число задач, передаваемых процессу за раз
+        animate: сохранять также анимацию
+        animation_format: расширение файла анимации ('gif', 'mp4')
+        fps, duration: частота кадров и длительность анимации (с)
+        dpi: разрешение
+
+    Returns:
+        Списки путей к файлам в порядке задач
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, len(jobs) // (max_workers * 4))
+
+    render = functools.partial(render_job, output_dir=output_dir, animate=animate,
+                               animation_format=animation_format, fps=fps,
+                               duration=duration, dpi=dpi)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        return list(executor.map(render, jobs, chunksize=chunk_size))
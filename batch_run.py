@@ -0,0 +1,278 @@
+import argparse
+import csv
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import itertools
+import json
+import math
+import os
+import sys
+import time
+
+from celestial_bodies import CelestialBody
+from sweep import RESULT_DTYPE, SweepCase, run_case
+
+
+# Параметры сценария и значения по умолчанию — как в PlanetFallGUI.read_params
+SCENARIO_DEFAULTS = {
+    'name': '',
+    'body_name': 'earth',
+    'mass': 1000.0,
+    'cross_area': 2.0,
+    'initial_altitude': 400000.0,
+    'enable_coriolis': True,
+    'velocity_type': 'orbital',
+    'custom_speed': 0.0,
+    'max_time': 3600.0,
+}
+
+# Типы параметров при чтении CSV (все значения там — строки)
+FLOAT_FIELDS = ('mass', 'cross_area', 'initial_altitude', 'custom_speed', 'max_time')
+BOOL_FIELDS = ('enable_coriolis',)
+
+# Режимы начальной скорости (переключатель в GUI)
+VELOCITY_TYPES = ('orbital', 'zero', 'custom')
+
+# Столбцы строки результата
+RESULT_FIELDS = ('index', 'name', 'body_name', 'velocity_type') + RESULT_DTYPE.names + (
+    'wall_time', 'error')
+
+# Число блоков в работе на один процесс: очередь задач остаётся короткой
+# даже для сотен тысяч сценариев
+CHUNKS_IN_FLIGHT = 4
+
+# Сколько ошибочных сценариев перечисляется в итоговой сводке
+MAX_REPORTED_FAILURES = 10
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'yes', 'y', 'да'):
+        return True
+    if text in ('0', 'false', 'no', 'n', 'нет'):
+        return False
+    raise ValueError(f"Некорректное логическое значение: {value!r}")
+
+
+def normalize_scenario(raw):
+    """
+    Сценарий с подставленными значениями по умолчанию и приведёнными типами
+
+    Пустые значения (например, пустые ячейки CSV) заменяются значениями
+    по умолчанию. Ошибки значений выбрасываются как ValueError.
+    """
+    unknown = set(raw) - set(SCENARIO_DEFAULTS) - {'show_animation'}
+    if unknown:
+        raise ValueError(f"Неизвестные параметры: {', '.join(sorted(unknown))}")
+
+    scenario = dict(SCENARIO_DEFAULTS)
+    scenario.update({key: value for key, value in raw.items() if value not in (None, '')})
+    for key in FLOAT_FIELDS:
+        scenario[key] = float(scenario[key])
+    for key in BOOL_FIELDS:
+        scenario[key] = _parse_bool(scenario[key])
+    scenario['name'] = str(scenario['name'])
+
+    # Неизвестное тело не должно молча превращаться в Землю (get_body_params)
+    scenario['body_name'] = str(scenario['body_name']).strip().lower()
+    if scenario['body_name'] not in CelestialBody.list_available_bodies():
+        raise ValueError(f"Неизвестное небесное тело: {scenario['body_name']!r}")
+
+    if scenario['velocity_type'] not in VELOCITY_TYPES:
+        raise ValueError(f"Неизвестный режим скорости: {scenario['velocity_type']!r}")
+    return scenario
+
+
+def read_scenarios(path):
+    """
+    Чтение файла сценариев
+
+    JSON — список объектов или объект с ключом "scenarios"; CSV — строка
+    заголовка с именами параметров. CSV читается лениво, по строке.
+
+    Yields:
+        Словари параметров в исходном виде (см. normalize_scenario)
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as stream:
+            yield from csv.DictReader(stream)
+        return
+
+    with open(path, encoding='utf-8') as stream:
+        data = json.load(stream)
+    if isinstance(data, dict):
+        data = data['scenarios']
+    yield from data
+
+
+def run_scenario(index, raw):
+    """
+    Моделирование одного сценария
+
+    Returns:
+        Словарь строки результата (поля RESULT_FIELDS); ошибка сценария
+        не прерывает пакет, а записывается в поле error
+    """
+    start = time.perf_counter()
+    row = dict.fromkeys(RESULT_FIELDS, None)
+    row['index'] = index
+    if isinstance(raw, dict):
+        # Для ошибочного сценария в строке остаются исходные значения
+        row.update({key: raw.get(key) for key in ('name', 'body_name', 'velocity_type')})
+    try:
+        scenario = normalize_scenario(raw)
+        row.update(name=scenario['name'], body_name=scenario['body_name'],
+                   velocity_type=scenario['velocity_type'])
+
+        velocity = scenario['velocity_type']
+        if velocity == 'custom':
+            velocity = scenario['custom_speed']
+        # Коэффициент сопротивления None выбирается так же, как в GUI
+        case = SweepCase(scenario['body_name'], scenario['mass'], scenario['cross_area'],
+                         None, scenario['initial_altitude'], velocity)
+        values = run_case(case, scenario['max_time'], scenario['enable_coriolis'])
+        row.update(zip(RESULT_DTYPE.names, (value.item() if hasattr(value, 'item') else value
+                                            for value in values)))
+    except Exception as e:
+        row['failed'] = True
+        row['error'] = f"{type(e).__name__}: {e}"
+    row['wall_time'] = time.perf_counter() - start
+    return row
+
+
+def _run_chunk(chunk):
+    """Блок сценариев в процессе-исполнителе"""
+    return [run_scenario(index, raw) for index, raw in chunk]
+
+
+def _chunks(scenarios, chunk_size):
+    """Нумерованные сценарии блоками по chunk_size"""
+    iterator = enumerate(scenarios)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(scenarios, max_workers=None, chunk_size=16):
+    """
+    Параллельный расчёт сценариев с выдачей результатов по мере готовности
+
+    В работе одновременно не больше max_workers * CHUNKS_IN_FLIGHT блоков,
+    поэтому входной поток (например, большой CSV) читается постепенно.
+
+    Args:
+        scenarios: итерируемые словари параметров (например, read_scenarios)
+        max_workers: число процессов (по умолчанию — число ядер; 1 — без пула)
+        chunk_size: число сценариев в одной задаче
+
+    Yields:
+        Строки результата (см. run_scenario) в порядке завершения
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    chunks = _chunks(scenarios, chunk_size)
+    if max_workers == 1:
+        for chunk in chunks:
+            yield from _run_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(_run_chunk, chunk))
+            if len(pending) < max_workers * CHUNKS_IN_FLIGHT:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+class RowWriter:
+    """Запись строк результата в CSV или JSON Lines со сбросом буфера"""
+
+    def __init__(self, stream, format='csv'):
+        self.stream = stream
+        self.format = format
+        if format == 'csv':
+            self.writer = csv.DictWriter(stream, fieldnames=RESULT_FIELDS)
+            self.writer.writeheader()
+
+    def write(self, row):
+        if self.format == 'csv':
+            self.writer.writerow(row)
+        else:
+            # NaN (нет удара) в JSON записывается как null
+            clean = {key: None if isinstance(value, float) and math.isnan(value) else value
+                     for key, value in row.items()}
+            self.stream.write(json.dumps(clean, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+
+def main(argv=None):
+    """
+    Пакетный расчёт без графического интерфейса:
+
+        python batch_run.py scenarios.csv -o results.csv -j 8
+        python batch_run.py scenarios.json --format jsonl > results.jsonl
+    """
+    parser = argparse.ArgumentParser(description="Пакетный расчёт сценариев падения")
+    parser.add_argument('scenarios', help="файл сценариев (.json или .csv)")
+    parser.add_argument('-o', '--output', help="файл результатов (по умолчанию stdout)")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), default='csv',
+                        help="формат строк результата")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="число процессов (по умолчанию — число ядер)")
+    parser.add_argument('--chunk-size', type=int, default=16,
+                        help="число сценариев в одной задаче")
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.scenarios):
+        print(f"Файл сценариев не найден: {args.scenarios}", file=sys.stderr)
+        return 2
+
+    output = sys.stdout if args.output is None else open(args.output, 'w', newline='',
+                                                         encoding='utf-8')
+    counts = {'total': 0, 'failed': 0, 'impacted': 0}
+    failures = []  # первые MAX_REPORTED_FAILURES ошибок
+    start = time.perf_counter()
+    try:
+        writer = RowWriter(output, args.format)
+        for row in run_batch(read_scenarios(args.scenarios), args.jobs, args.chunk_size):
+            writer.write(row)
+            counts['total'] += 1
+            if row['failed']:
+                counts['failed'] += 1
+                if len(failures) < MAX_REPORTED_FAILURES:
+                    failures.append(row)
+            elif row['impacted']:
+                counts['impacted'] += 1
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ошибка чтения сценариев: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    rate = counts['total'] / elapsed if elapsed > 0 else 0.0
+    print(f"Сценариев: {counts['total']}, с ударом: {counts['impacted']}, "
+          f"ошибок: {counts['failed']}; {elapsed:.1f} с, {rate:.1f} сценариев/с",
+          file=sys.stderr)
+    for row in failures:
+        print(f"  #{row['index']} {row['name'] or row['body_name'] or ''}: {row['error']}",
+              file=sys.stderr)
+    if counts['failed'] > len(failures):
+        print(f"  ... и ещё {counts['failed'] - len(failures)}", file=sys.stderr)
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,503 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from celestial_bodies import CelestialBody
+from instrumentation import step_statistics
+from physics import BodyFlight
+from physics_planet import PlanetFall
+from utils import calculate_orbit_velocity
+
+
+# Файл базовой линии рядом с модулем
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Допустимое ухудшение: отношение текущего значения к базовому.
+# Время на общей машине шумит сильно, число вызовов и шагов детерминировано
+REGRESSION_THRESHOLDS = {
+    'wall_time': 2.0,
+    'nfev': 1.05,
+    'accepted_steps': 1.05,
+    'rejected_steps': 1.25,
+    'peak_memory': 1.25,
+}
+
+# Бюджет холодного старта (с): суммарное время импорта модуля в новом процессе
+# по -X importtime (без запуска самого интерпретатора)
+STARTUP_BUDGETS = {
+    'gui': 0.5,
+    'celestial_bodies': 0.25,
+    'utils': 0.25,
+    'kepler': 0.25,
+}
+
+# Пакеты, которые при старте загружаться не должны (см. gui.HEAVY_MODULES)
+DEFERRED_PACKAGES = ('scipy', 'matplotlib')
+
+# Сценарии, на которых переход на неявный метод (stiff_method) обязан быть
+# не медленнее чистого RK45: медленный спуск в плотной атмосфере и вход с орбиты
+STIFF_SWITCH_SCENARIOS = ('venus/vertical_drop', 'venus/orbital_decay')
+
+# Разница, меньшая этих значений, не считается регрессией (шум малых величин)
+ABSOLUTE_TOLERANCES = {
+    'wall_time': 0.005,  # с
+    'nfev': 0,
+    'accepted_steps': 0,
+    'rejected_steps': 2,
+    'peak_memory': 64 * 1024,  # байт
+}
+
+
+def bench_rhs(body_name='earth', n_calls=200000, enable_coriolis=True):
+    """
+    Сравнение скорости правых частей equations_of_motion и equations_of_motion_fast
+
+    Returns:
+        Словарь с числом вычислений в секунду для обеих версий
+    """
+    model = PlanetFall(body_name=body_name, drag_coef=2.0, cross_area=2.0,
+                       enable_coriolis=enable_coriolis, verbose=False)
+    radius = model.body_params['radius']
+    state = np.array([1000.0, 2000.0, radius + 50000.0, 7000.0, 100.0, -50.0])
+
+    results = {}
+    for name, rhs in (('reference', model.equations_of_motion),
+                      ('fast', model.equations_of_motion_fast)):
+        start = time.perf_counter()
+        for _ in range(n_calls):
+            rhs(0.0, state)
+        elapsed = time.perf_counter() - start
+        results[name] = n_calls / elapsed
+
+    results['speedup'] = results['fast'] / results['reference']
+    results['max_difference'] = float(np.max(np.abs(
+        np.array(model.equations_of_motion(0.0, state)) -
+        np.array(model.equations_of_motion_fast(0.0, state)))))
+    return results
+
+
+def bench_trajectory(body_name='earth', initial_altitude=400000, enable_coriolis=True):
+    """
+    Сравнение полной симуляции с эталонной и быстрой правой частью
+
+    Returns:
+        Словарь со временем расчёта и расхождением конечных состояний
+    """
+    model = PlanetFall(body_name=body_name, drag_coef=2.0, cross_area=2.0,
+                       enable_coriolis=enable_coriolis, verbose=False)
+
+    results = {}
+    solutions = {}
+    for name, fast_rhs in (('reference', False), ('fast', True)):
+        start = time.perf_counter()
+        solutions[name] = model.simulate_fall(initial_altitude, [1000.0, 0.0, 0.0],
+                                              fast_rhs=fast_rhs)
+        results[name] = time.perf_counter() - start
+
+    results['speedup'] = results['reference'] / results['fast']
+    results['max_position_difference'] = float(np.max(np.abs(
+        solutions['reference'].y[:3, -1] - solutions['fast'].y[:3, -1])))
+    return results
+
+
+def planet_scenarios(bodies=None):
+    """
+    Канонические сценарии для каждого небесного тела
+
+    Returns:
+        Список кортежей (имя случая, тело, начальная высота, вектор скорости)
+    """
+    if bodies is None:
+        bodies = CelestialBody.list_available_bodies()
+
+    scenarios = []
+    for body in bodies:
+        params = CelestialBody.get_body_params(body)
+        orbital = float(calculate_orbit_velocity(params['radius'], params['mass'], 400000))
+        scenarios.extend([
+            # Вертикальное падение со 100 км
+            (f'{body}/vertical_drop', body, 100000, [0.0, 0.0, 0.0]),
+            # Торможение с орбиты 400 км (95% орбитальной скорости)
+            (f'{body}/orbital_decay', body, 400000, [0.95 * orbital, 0.0, 0.0]),
+            # Большая высота и заданная скорость
+            (f'{body}/high_altitude', body, 2000000, [1000.0, 0.0, 0.0]),
+        ])
+    return scenarios
+
+
+def measure(function, repeats=3):
+    """
+    Замер функции: лучшее время из repeats запусков и пиковая память
+    (отдельным запуском под tracemalloc, чтобы не искажать время)
+
+    Returns:
+        Кортеж (результат, лучшее время в с, пиковая память в байтах)
+    """
+    best = np.inf
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, best, peak
+
+
+def bench_planet_scenarios(bodies=None, repeats=3):
+    """Сценарии падения для всех тел: время, вызовы правой части, шаги, память"""
+    results = {}
+    for name, body, altitude, velocity in planet_scenarios(bodies):
+        params = CelestialBody.get_body_params(body)
+        model = PlanetFall(body_name=body, mass=1000, cross_area=2.0,
+                           drag_coef=2.0 if params['atmosphere_height'] > 0 else 0,
+                           verbose=False)
+
+        def run():
+            return model.simulate_fall(altitude, velocity, max_time=3600)
+
+        solution, wall_time, peak = measure(run, repeats)
+        accepted, rejected = step_statistics(solution)
+        results[name] = {'wall_time': wall_time, 'nfev': int(solution.nfev),
+                         'accepted_steps': accepted, 'rejected_steps': rejected,
+                         'peak_memory': peak}
+    return results
+
+
+def bench_stiff_switch(repeats=3):
+    """
+    Переключение на неявный метод против чистого RK45 (stiff_method=None)
+    на сценариях STIFF_SWITCH_SCENARIOS. Запуски чередуются, чтобы шум
+    машины одинаково влиял на оба варианта
+
+    Returns:
+        Словарь: время и вызовы с переключением, rk45_wall_time и rk45_nfev
+    """
+    results = {}
+    for name, body, altitude, velocity in planet_scenarios(['venus']):
+        if name not in STIFF_SWITCH_SCENARIOS:
+            continue
+        model = PlanetFall(body_name=body, mass=1000, cross_area=2.0, drag_coef=2.0,
+                           verbose=False)
+        best = {'switched': np.inf, 'rk45': np.inf}
+        solutions = {}
+        for _ in range(repeats):
+            for variant, options in (('switched', {}), ('rk45', {'stiff_method': None})):
+                start = time.perf_counter()
+                solutions[variant] = model.simulate_fall(altitude, velocity, max_time=3600,
+                                                         **options)
+                best[variant] = min(best[variant], time.perf_counter() - start)
+        results[f'stiff/{name}'] = {
+            'wall_time': best['switched'], 'nfev': int(solutions['switched'].nfev),
+            'rk45_wall_time': best['rk45'], 'rk45_nfev': int(solutions['rk45'].nfev)}
+    return results
+
+
+def bench_ballistic(repeats=3):
+    """Баллистические выстрелы BodyFlight.simulate под разными углами"""
+    results = {}
+    flight = BodyFlight(mass=1.0, cross_area=0.01, drag_coef=0.47)
+    for angle in (15, 45, 75):
+        velocity = 100 * np.array([np.cos(np.radians(angle)), 0.0, np.sin(np.radians(angle))])
+
+        def run():
+            return flight.simulate([0.0, 0.0, 0.0], velocity, (0, 20))
+
+        solution, wall_time, peak = measure(run, repeats)
+        accepted, rejected = step_statistics(solution)
+        results[f'ballistic/{angle}deg'] = {
+            'wall_time': wall_time, 'nfev': int(solution.nfev),
+            'accepted_steps': accepted, 'rejected_steps': rejected, 'peak_memory': peak}
+    return results
+
+
+def bench_rendering(n_frames=60):
+    """
+    Отрисовка кадров на бэкенде Agg через публичные методы: запись анимации
+    PlanetVisualizer.save_animation в писатель, который только растеризует
+    кадры в память, и кадр экспорта FlightVisualizer
+
+    Returns:
+        Словарь со временем одного кадра (wall_time, с) и пиковой памятью
+    """
+    import io
+
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.animation import AbstractMovieWriter
+    from visualization import FlightVisualizer
+    from visualization_planet import PlanetVisualizer
+
+    class MemoryWriter(AbstractMovieWriter):
+        """Писатель без файла: кадр растеризуется в RGBA, как у PillowWriter"""
+
+        def setup(self, fig, outfile, dpi=None):
+            super().setup(fig, outfile, dpi)
+            self.frames = 0
+
+        def grab_frame(self, **savefig_kwargs):
+            self.fig.savefig(io.BytesIO(), format='rgba', dpi=self.dpi)
+            self.frames += 1
+
+        def finish(self):
+            pass
+
+    model = PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, verbose=False)
+    solution = model.simulate_fall(400000, [7500.0, 0.0, 0.0])
+
+    results = {}
+
+    # Фигура с планетой создаётся заранее, как в batch_render.render_job
+    visualizer = PlanetVisualizer(model.body_params)
+    visualizer.save_static_plot(solution.y[:3], io.BytesIO(), 'benchmark')
+    # Кадр записи рисуется целиком (с поверхностью планеты): кадров вчетверо меньше
+    writer = MemoryWriter(fps=n_frames // 4)
+
+    def save_frames():
+        visualizer.save_animation(solution.y[:3], solution.t, os.devnull, 'benchmark',
+                                  fps=n_frames // 4, duration=1, writer=writer)
+
+    _, wall_time, peak = measure(save_frames, repeats=1)
+    results['render/planet_export_frame'] = {'wall_time': wall_time / writer.frames,
+                                             'peak_memory': peak}
+    visualizer.close()
+
+    def export_frames():
+        FlightVisualizer().export_animation(solution.y[:3], solution.t, num_frames=n_frames // 4,
+                                            frame_sink=lambda frame: None)
+
+    _, wall_time, peak = measure(export_frames, repeats=1)
+    results['render/flight_export_frame'] = {'wall_time': wall_time / (n_frames // 4),
+                                             'peak_memory': peak}
+    return results
+
+
+def import_time(stderr, module):
+    """Суммарное время импорта module (с) из вывода -X importtime"""
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Вложенные импорты выводятся с отступом
+        if name.rstrip() == ' ' + module:
+            return int(cumulative) / 1e6
+    raise ValueError(f"Импорт {module} не найден в выводе -X importtime")
+
+
+def bench_startup(modules=None, repeats=3):
+    """
+    Холодный старт: импорт модуля в новом процессе с -X importtime
+
+    Returns:
+        Словарь: wall_time — лучшее время импорта из repeats (с), budget —
+        бюджет из STARTUP_BUDGETS, deferred_loaded — загруженные при этом
+        пакеты из DEFERRED_PACKAGES
+    """
+    if modules is None:
+        modules = list(STARTUP_BUDGETS)
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    probe = ("import sys, {module}; "
+             "print(' '.join(name for name in {packages!r} if name in sys.modules))")
+
+    results = {}
+    for module in modules:
+        best = np.inf
+        for _ in range(repeats):
+            completed = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c',
+                 probe.format(module=module, packages=DEFERRED_PACKAGES)],
+                capture_output=True, text=True, cwd=directory, check=True)
+            best = min(best, import_time(completed.stderr, module))
+        results[f'startup/{module}'] = {'wall_time': best, 'budget': STARTUP_BUDGETS[module],
+                                        'deferred_loaded': completed.stdout.split()}
+    return results
+
+
+def check_budgets(results):
+    """
+    Проверка бюджетов холодного старта
+
+    Returns:
+        Список сообщений о нарушениях
+    """
+    violations = []
+    for name, metrics in results['cases'].items():
+        if 'budget' not in metrics:
+            continue
+        if metrics['wall_time'] > metrics['budget']:
+            violations.append(f"{name}: импорт {metrics['wall_time'] * 1000:.0f} мс "
+                              f"при бюджете {metrics['budget'] * 1000:.0f} мс")
+        if metrics['deferred_loaded']:
+            violations.append(f"{name}: при старте загружены {', '.join(metrics['deferred_loaded'])}")
+    return violations
+
+
+def check_stiff_switch(results):
+    """
+    Проверка, что переключение на неявный метод не медленнее чистого RK45
+
+    Returns:
+        Список сообщений о нарушениях
+    """
+    violations = []
+    for name, metrics in results['cases'].items():
+        if 'rk45_wall_time' not in metrics:
+            continue
+        if metrics['wall_time'] > metrics['rk45_wall_time']:
+            violations.append(f"{name}: {metrics['wall_time'] * 1000:.1f} мс "
+                              f"({metrics['nfev']} вызовов) против RK45 "
+                              f"{metrics['rk45_wall_time'] * 1000:.1f} мс "
+                              f"({metrics['rk45_nfev']} вызовов)")
+    return violations
+
+
+def run_suite(bodies=None, repeats=3, rendering=True):
+    """
+    Полный набор замеров
+
+    Returns:
+        Словарь с описанием окружения и результатами по случаям
+    """
+    cases = {}
+    cases.update(bench_startup(repeats=repeats))
+    cases.update(bench_planet_scenarios(bodies, repeats))
+    cases.update(bench_stiff_switch(repeats))
+    cases.update(bench_ballistic(repeats))
+    if rendering:
+        cases.update(bench_rendering())
+
+    return {
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'platform': platform.platform()},
+        'cases': cases,
+    }
+
+
+def compare_with_baseline(results, baseline, thresholds=None):
+    """
+    Сравнение с базовой линией
+
+    Returns:
+        Список регрессий (случай, метрика, базовое, текущее, отношение)
+    """
+    if thresholds is None:
+        thresholds = REGRESSION_THRESHOLDS
+
+    regressions = []
+    for name, metrics in results['cases'].items():
+        reference = baseline['cases'].get(name)
+        if reference is None:
+            continue
+        for metric, limit in thresholds.items():
+            if metric not in metrics or metric not in reference:
+                continue
+            current, previous = metrics[metric], reference[metric]
+            if current - previous <= ABSOLUTE_TOLERANCES[metric]:
+                continue
+            ratio = current / previous if previous else np.inf
+            if ratio > limit:
+                regressions.append((name, metric, previous, current, ratio))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    """Таблица результатов (и отношений к базовой линии, если она есть)"""
+    print(f"{'Случай':<28} {'Время, мс':>10} {'Вызовы':>8} {'Шаги':>7} {'Откл.':>6} "
+          f"{'Память, КБ':>11} {'К базе':>7}")
+    for name, metrics in results['cases'].items():
+        ratio = ''
+        if baseline is not None and name in baseline['cases']:
+            ratio = f"x{metrics['wall_time'] / baseline['cases'][name]['wall_time']:.2f}"
+        memory = f"{metrics['peak_memory'] / 1024:.0f}" if 'peak_memory' in metrics else ''
+        print(f"{name:<28} {metrics['wall_time'] * 1000:>10.2f} "
+              f"{metrics.get('nfev', ''):>8} {metrics.get('accepted_steps', ''):>7} "
+              f"{metrics.get('rejected_steps', ''):>6} {memory:>11} {ratio:>7}")
+
+
+def main(argv=None):
+    """
+    Запуск замеров из командной строки:
+
+        python benchmarks.py                    # набор и сравнение с базовой линией
+        python benchmarks.py --update-baseline  # записать новую базовую линию
+        python benchmarks.py --micro            # только сравнение правых частей
+    """
+    parser = argparse.ArgumentParser(description="Замеры производительности симулятора")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="файл базовой линии (JSON)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="записать результаты как новую базовую линию")
+    parser.add_argument('--output', help="сохранить результаты в JSON")
+    parser.add_argument('--bodies', nargs='*', help="ограничить набор тел")
+    parser.add_argument('--repeats', type=int, default=3, help="число повторов замера времени")
+    parser.add_argument('--no-render', action='store_true', help="без замеров отрисовки")
+    parser.add_argument('--micro', action='store_true',
+                        help="только сравнение эталонной и быстрой правой части")
+    args = parser.parse_args(argv)
+
+    if args.micro:
+        rhs = bench_rhs()
+        print(f"Правая часть: эталон {rhs['reference']:.0f} выз/с, "
+              f"быстрая {rhs['fast']:.0f} выз/с, ускорение x{rhs['speedup']:.1f}, "
+              f"расхождение {rhs['max_difference']:.2e}")
+
+        trajectory = bench_trajectory()
+        print(f"Траектория: эталон {trajectory['reference']:.3f} с, "
+              f"быстрая {trajectory['fast']:.3f} с, ускорение x{trajectory['speedup']:.1f}, "
+              f"расхождение {trajectory['max_position_difference']:.2e} м")
+        return 0
+
+    results = run_suite(args.bodies, args.repeats, rendering=not args.no_render)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding='utf-8') as stream:
+            baseline = json.load(stream)
+
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            json.dump(results, stream, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as stream:
+            json.dump(results, stream, indent=2)
+        print(f"Базовая линия записана: {args.baseline}")
+        return 0
+
+    violations = check_budgets(results)
+    for message in violations:
+        print(f"БЮДЖЕТ СТАРТА {message}")
+    stiff_violations = check_stiff_switch(results)
+    for message in stiff_violations:
+        print(f"ПЕРЕКЛЮЧЕНИЕ МЕДЛЕННЕЕ RK45 {message}")
+    violations += stiff_violations
+
+    if baseline is None:
+        print("Базовая линия не найдена: запустите с --update-baseline")
+        return 1 if violations else 0
+
+    regressions = compare_with_baseline(results, baseline)
+    for name, metric, previous, current, ratio in regressions:
+        print(f"РЕГРЕССИЯ {name}: {metric} {previous:.4g} -> {current:.4g} (x{ratio:.2f})")
+    if regressions or violations:
+        return 1
+    print("Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
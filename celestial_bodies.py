@@ -1,5 +1,8 @@
 import numpy as np
 
+from atmosphere import build_atmosphere
+from gravity_field import GravityField
+
 
 class CelestialBody:
     """Класс для хранения параметров планет Солнечной системы"""
@@ -10,6 +13,10 @@ class CelestialBody:
             'mass': 3.301e23,  # кг
             'surface_gravity': 3.7,  # м/с²
             'atmosphere_height': 0,  # м (почти нет атмосферы)
+            'surface_density': 0.0,  # кг/м³ (у поверхности)
+            'scale_height': 0,  # м
+            # Гравитационное поле (MESSENGER): J2; reference_radius — опорный радиус
+            'gravity_field': {'reference_radius': 2440000, 'zonal': [5.03e-5]},
             'color': 'gray',
             'orbital_period': 88,  # дней
             'description': 'Ближайшая к Солнцу планета'
@@ -19,6 +26,10 @@ class CelestialBody:
             'mass': 4.867e24,  # кг
             'surface_gravity': 8.87,  # м/с²
             'atmosphere_height': 250000,  # м
+            'surface_density': 65.0,  # кг/м³ (у поверхности)
+            'scale_height': 15900,  # м
+            # Гравитационное поле (Magellan): J2
+            'gravity_field': {'reference_radius': 6051000, 'zonal': [4.404e-6]},
             'color': 'orange',
             'orbital_period': 225,
             'description': 'Планета с плотной атмосферой'
@@ -28,6 +39,21 @@ class CelestialBody:
             'mass': 5.972e24,  # кг
             'surface_gravity': 9.81,  # м/с²
             'atmosphere_height': 100000,  # м
+            'surface_density': 1.225,  # кг/м³ (у поверхности)
+            'scale_height': 8500,  # м (для экспоненциальной модели)
+            'atmosphere_profile': 'us76',  # табличный профиль плотности
+            # Гравитационное поле (EGM96): J2..J8 и полностью нормированные
+            # тессеральные коэффициенты [n, m, C̄_nm, S̄_nm] до степени 3
+            'gravity_field': {
+                'reference_radius': 6378136.3,
+                'zonal': [1.08262668e-3, -2.53265649e-6, -1.61962159e-6, -2.27296082e-7,
+                          5.40681239e-7, -3.50561e-7, -2.03991e-7],
+                'tesseral': [[2, 1, -1.869876e-10, 1.195280e-9],
+                             [2, 2, 2.43914352e-6, -1.40016684e-6],
+                             [3, 1, 2.03046201e-6, 2.48200416e-7],
+                             [3, 2, 9.04787895e-7, -6.19005475e-7],
+                             [3, 3, 7.21321757e-7, 1.41434926e-6]],
+            },
             'color': 'blue',
             'orbital_period': 365,
             'description': 'Наша родная планета'
@@ -37,6 +63,11 @@ class CelestialBody:
             'mass': 6.39e23,  # кг
             'surface_gravity': 3.71,  # м/с²
             'atmosphere_height': 11000,  # м
+            'surface_density': 0.02,  # кг/м³ (у поверхности)
+            'scale_height': 11100,  # м
+            # Гравитационное поле (MRO): J2..J4
+            'gravity_field': {'reference_radius': 3396000,
+                              'zonal': [1.96045e-3, 3.1450e-5, -1.5377e-5]},
             'color': 'red',
             'orbital_period': 687,
             'description': 'Красная планета'
@@ -46,6 +77,13 @@ class CelestialBody:
             'mass': 1.898e27,  # кг
             'surface_gravity': 24.79,  # м/с²
             'atmosphere_height': 500000,  # м
+            'surface_density': 0.16,  # кг/м³ (на уровне 1 бар)
+            'scale_height': 27000,  # м
+            # Гравитационное поле (Juno): J2..J10
+            'gravity_field': {'reference_radius': 71492000,
+                              'zonal': [14696.5063e-6, -0.0450e-6, -586.6085e-6, -0.0723e-6,
+                                        34.2007e-6, 0.1200e-6, -2.4422e-6, -0.1207e-6,
+                                        0.1713e-6]},
             'color': 'brown',
             'orbital_period': 4333,
             'description': 'Крупнейшая планета'
@@ -55,6 +93,13 @@ class CelestialBody:
             'mass': 5.683e26,  # кг
             'surface_gravity': 10.44,  # м/с²
             'atmosphere_height': 400000,  # м
+            'surface_density': 0.19,  # кг/м³ (на уровне 1 бар)
+            'scale_height': 59500,  # м
+            # Гравитационное поле (Cassini Grand Finale): J2..J10
+            'gravity_field': {'reference_radius': 60330000,
+                              'zonal': [16290.573e-6, 0.059e-6, -935.314e-6, -0.224e-6,
+                                        86.340e-6, 0.108e-6, -14.624e-6, 0.369e-6,
+                                        4.672e-6]},
             'color': 'gold',
             'orbital_period': 10759,
             'description': 'Планета с кольцами'
@@ -64,6 +109,10 @@ class CelestialBody:
             'mass': 8.681e25,  # кг
             'surface_gravity': 8.69,  # м/с²
             'atmosphere_height': 300000,  # м
+            'surface_density': 0.42,  # кг/м³ (на уровне 1 бар)
+            'scale_height': 27700,  # м
+            # Гравитационное поле (Voyager 2 и кольца): J2, J4
+            'gravity_field': {'reference_radius': 25559000, 'zonal': [3510.68e-6, 0.0, -34.17e-6]},
             'color': 'lightblue',
             'orbital_period': 30687,
             'description': 'Ледяной гигант'
@@ -73,6 +122,10 @@ class CelestialBody:
             'mass': 1.024e26,  # кг
             'surface_gravity': 11.15,  # м/с²
             'atmosphere_height': 350000,  # м
+            'surface_density': 0.45,  # кг/м³ (на уровне 1 бар)
+            'scale_height': 19700,  # м
+            # Гравитационное поле (Voyager 2 и кольца): J2, J4
+            'gravity_field': {'reference_radius': 25225000, 'zonal': [3408.43e-6, 0.0, -33.40e-6]},
             'color': 'darkblue',
             'orbital_period': 60190,
             'description': 'Ветреная планета'
@@ -82,6 +135,8 @@ class CelestialBody:
             'mass': 1.309e22,  # кг
             'surface_gravity': 0.62,  # м/с²
             'atmosphere_height': 0,  # м
+            'surface_density': 0.0,  # кг/м³ (у поверхности)
+            'scale_height': 0,  # м
             'color': 'darkgray',
             'orbital_period': 90560,
             'description': 'Карликовая планета'
@@ -93,6 +148,43 @@ class CelestialBody:
         """Получить параметры небесного тела"""
         return cls.BODIES.get(body_name.lower(), cls.BODIES['earth'])
 
+    # Предрассчитанные таблицы плотности атмосферы по именам тел
+    _atmospheres = {}
+
+    @classmethod
+    def get_atmosphere(cls, body_name):
+        """Модель атмосферы тела (таблица строится один раз) или None"""
+        key = body_name.lower() if body_name.lower() in cls.BODIES else 'earth'
+        if key not in cls._atmospheres:
+            cls._atmospheres[key] = build_atmosphere(cls.BODIES[key])
+        return cls._atmospheres[key]
+
+    # Поля тяготения с предрассчитанными коэффициентами рекурсий
+    # по (тело, μ, степень, порядок)
+    _gravity_fields = {}
+
+    @classmethod
+    def get_gravity_field(cls, body_name, mu, degree, order=None):
+        """
+        Гравитационное поле тела до степени degree (строится один раз)
+        или None, если коэффициенты для тела не заданы
+
+        Args:
+            mu: гравитационный параметр GM модели (м³/с²)
+            degree: наибольшая степень разложения
+            order: наибольший порядок (None — до degree, 0 — только зональные)
+        """
+        key = body_name.lower() if body_name.lower() in cls.BODIES else 'earth'
+        field = cls.BODIES[key].get('gravity_field')
+        if field is None:
+            return None
+        cache_key = (key, mu, degree, order)
+        if cache_key not in cls._gravity_fields:
+            cls._gravity_fields[cache_key] = GravityField(
+                mu, field['reference_radius'], field.get('zonal', ()),
+                field.get('tesseral', ()), degree, order)
+        return cls._gravity_fields[cache_key]
+
     @classmethod
     def list_available_bodies(cls):
         """Список доступных небесных тел"""
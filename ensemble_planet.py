@@ -0,0 +1,328 @@
+import time as _time
+
+import numpy as np
+from scipy.integrate import RK45
+
+from physics_planet import PlanetFall
+
+
+class PlanetFallEnsemble:
+    """
+    Пакетное моделирование N падений на одну планету.
+
+    Все траектории хранятся в одном массиве состояния (N, 6) и
+    интегрируются вместе явным методом Дормана–Принса 5(4) (те же
+    коэффициенты, что и у RK45 из SciPy). Гравитация, сопротивление и
+    сила Кориолиса вычисляются векторно для всех строк сразу, а каждая
+    траектория останавливается на своём собственном событии удара о
+    поверхность.
+    """
+
+    # Таблица Бутчера и плотный вывод берём у SciPy, чтобы результаты
+    # совпадали с PlanetFall.simulate_fall
+    A = RK45.A
+    B = RK45.B
+    C = RK45.C
+    E = RK45.E
+    P = RK45.P
+    n_stages = RK45.n_stages
+    error_exponent = -1 / (RK45.error_estimator_order + 1)
+
+    def __init__(self, body_name='earth', drag_coef=0.47, cross_area=1.0, mass=1000,
+                 enable_coriolis=False, planet_rotation_rate=7.2921159e-5, gravity_degree=0):
+        """
+        Инициализация ансамбля
+
+        Args:
+            body_name: название небесного тела (общее для всего ансамбля)
+            drag_coef: коэффициент сопротивления (число или массив длины N)
+            cross_area: площадь поперечного сечения, м² (число или массив длины N)
+            mass: масса тела, кг (число или массив длины N)
+            enable_coriolis: учитывать силу Кориолиса
+            planet_rotation_rate: угловая скорость вращения планеты (рад/с)
+            gravity_degree: степень разложения поля тяготения (0 — точечная масса)
+        """
+        self.model = PlanetFall(body_name=body_name,
+                                enable_coriolis=enable_coriolis,
+                                planet_rotation_rate=planet_rotation_rate,
+                                verbose=False, gravity_degree=gravity_degree)
+        self.body_params = self.model.body_params
+        self.drag_coef = drag_coef
+        self.cross_area = cross_area
+        self.mass = mass
+        self.enable_coriolis = enable_coriolis
+        self.planet_rotation_rate = planet_rotation_rate
+
+        self.mu = self.model.G * self.body_params['mass']
+        self.radius = self.body_params['radius']
+        self.atmosphere = self.model.atmosphere
+        self.gravity_field = self.model.gravity_field
+        # Угловая скорость поворота тессеральных членов (см. PlanetFall)
+        self.field_rotation_rate = self.model._field_rotation_rate
+
+    def accelerations(self, position, velocity, drag_constant, t=0.0):
+        """
+        Суммарные ускорения для массива тел
+
+        Args:
+            position: массив положений (n, 3)
+            velocity: массив скоростей (n, 3)
+            drag_constant: 0.5 * Cd * A / m для каждой строки (n,)
+            t: время каждой строки (n,) или общее (с)
+
+        Returns:
+            Массив ускорений (n, 3)
+        """
+        r = np.sqrt(np.einsum('ij,ij->i', position, position))
+
+        # Гравитация: g = -mu * r_vector / r³ (или поле с несферичностью)
+        if self.gravity_field is not None:
+            acceleration = self.gravity_field.acceleration_array(
+                position, self.field_rotation_rate * t)
+        else:
+            acceleration = position * (-self.mu / r ** 3)[:, None]
+
+        # Сопротивление атмосферы: a = -0.5 * ρ * |v| * v * Cd * A / m
+        if self.atmosphere is not None:
+            height = r - self.radius
+            density = np.where(height >= 0, self.atmosphere.density_array(height), 0.0)
+            speed = np.sqrt(np.einsum('ij,ij->i', velocity, velocity))
+            acceleration -= velocity * (drag_constant * density * speed)[:, None]
+
+        # Сила Кориолиса: a = -2 * (ω × v), ω направлена вдоль оси Z
+        if self.enable_coriolis:
+            two_omega = 2 * self.planet_rotation_rate
+            acceleration[:, 0] += two_omega * velocity[:, 1]
+            acceleration[:, 1] -= two_omega * velocity[:, 0]
+
+        return acceleration
+
+    def _rhs(self, states, drag_constant, t):
+        """Правая часть для массива состояний (n, 6) в моменты t (n,)"""
+        derivatives = np.empty_like(states)
+        derivatives[:, :3] = states[:, 3:]
+        derivatives[:, 3:] = self.accelerations(states[:, :3], states[:, 3:], drag_constant, t)
+        return derivatives
+
+    def _initial_step(self, states, derivatives, drag_constant, t, rtol, atol, max_step):
+        """Выбор начального шага для каждой строки (как в SciPy)"""
+        scale = atol + np.abs(states) * rtol
+        d0 = np.sqrt(np.mean((states / scale) ** 2, axis=1))
+        d1 = np.sqrt(np.mean((derivatives / scale) ** 2, axis=1))
+        h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / np.maximum(d1, 1e-300))
+
+        states1 = states + h0[:, None] * derivatives
+        derivatives1 = self._rhs(states1, drag_constant, t + h0)
+        d2 = np.sqrt(np.mean(((derivatives1 - derivatives) / scale) ** 2, axis=1)) / h0
+
+        d12 = np.maximum(d1, d2)
+        h1 = np.where(d12 <= 1e-15,
+                      np.maximum(1e-6, h0 * 1e-3),
+                      (0.01 / np.maximum(d12, 1e-300)) ** (1 / (RK45.error_estimator_order + 1)))
+
+        return np.minimum(np.minimum(100 * h0, h1), max_step)
+
+    def _dense_state(self, states, stages, h, s):
+        """Плотный вывод RK45 в долях шага s для каждой строки (h и s — массивы (n,))"""
+        powers = np.cumprod(np.repeat(s[:, None], self.P.shape[1], axis=1), axis=1)
+        coefficients = np.einsum('sk,nk->ns', self.P, powers)
+        return states + h[:, None] * np.einsum('ns,nsj->nj', coefficients, stages)
+
+    def _locate_impact(self, states, stages, h, iterations=60):
+        """
+        Поиск момента удара внутри шага бисекцией по плотному выводу
+
+        Returns:
+            Доли шага s и состояния в момент удара
+        """
+        low = np.zeros(len(states))
+        high = np.ones(len(states))
+        for _ in range(iterations):
+            middle = 0.5 * (low + high)
+            position = self._dense_state(states, stages, h, middle)[:, :3]
+            below = np.sqrt(np.einsum('ij,ij->i', position, position)) <= self.radius
+            high = np.where(below, middle, high)
+            low = np.where(below, low, middle)
+        return high, self._dense_state(states, stages, h, high)
+
+    def simulate(self, initial_altitudes, initial_velocities=None, max_time=3600,
+                 rtol=1e-8, atol=1e-10, max_step=10, save_trajectories=False):
+        """
+        Совместное моделирование падения N тел
+
+        Все строки продвигаются за одну итерацию векторно, но у каждой свой
+        адаптивный шаг и своё время: отклонённый шаг одной строки не
+        замедляет остальные. Выбор шага повторяет RK45 из SciPy (начальный
+        шаг, множители 0.2..10 с запасом 0.9, без роста шага сразу после
+        отклонённого), поэтому каждая строка проходит ту же последовательность
+        шагов, что и simulate_fall(segmented=False) с теми же допусками
+
+        Args:
+            initial_altitudes: начальные высоты над поверхностью, м (N,)
+            initial_velocities: начальные скорости [vx, vy, vz], м/с (N, 3)
+            max_time: максимальное время симуляции (с)
+            rtol, atol: допуски (как у solve_ivp)
+            max_step: максимальный шаг интегрирования (с)
+            save_trajectories: сохранять траектории каждой строки
+
+        Returns:
+            Словарь с результатами по каждой траектории
+        """
+        start_wall = _time.perf_counter()
+
+        altitudes = np.atleast_1d(np.asarray(initial_altitudes, dtype=float))
+        n = len(altitudes)
+        if initial_velocities is None:
+            velocities = np.zeros((n, 3))
+        else:
+            velocities = np.broadcast_to(np.asarray(initial_velocities, dtype=float), (n, 3))
+
+        mass = np.broadcast_to(np.asarray(self.mass, dtype=float), (n,))
+        drag_constant = np.broadcast_to(
+            0.5 * np.asarray(self.drag_coef, dtype=float) * np.asarray(self.cross_area, dtype=float),
+            (n,)) / mass
+
+        # Начальное положение — на оси Z, как в PlanetFall.simulate_fall
+        states = np.zeros((n, 6))
+        states[:, 2] = self.radius + altitudes
+        states[:, 3:] = velocities
+
+        # Результаты по строкам
+        final_time = np.full(n, float(max_time))
+        final_state = states.copy()
+        impacted = np.zeros(n, dtype=bool)
+        nsteps = np.zeros(n, dtype=int)
+        nrejected = np.zeros(n, dtype=int)
+
+        # Активные строки: индексы, время, шаг и состояния
+        rows = np.arange(n)
+        active_drag = drag_constant.copy()
+        t = np.zeros(n)
+        after_rejection = np.zeros(n, dtype=bool)
+        nfev = 0
+
+        saved_times = [np.zeros(n)]
+        saved_rows = [rows.copy()]
+        saved_states = [states.copy()]
+
+        derivatives = self._rhs(states, active_drag, t)
+        h = self._initial_step(states, derivatives, active_drag, t, rtol, atol, max_step)
+        nfev += 2 * n
+
+        stages = np.empty((self.n_stages + 1, n, 6))
+
+        while len(rows):
+            h = np.minimum(np.minimum(h, max_step), max_time - t)
+
+            # Шаг Дормана–Принса для всех активных строк
+            stages = stages[:, :len(rows)]
+            stages[0] = derivatives
+            for s, a in enumerate(self.A[1:], start=1):
+                increment = np.tensordot(a[:s], stages[:s], axes=1) * h[:, None]
+                stages[s] = self._rhs(states + increment, active_drag, t + self.C[s] * h)
+            new_states = states + h[:, None] * np.tensordot(self.B, stages[:-1], axes=1)
+            new_derivatives = self._rhs(new_states, active_drag, t + h)
+            stages[-1] = new_derivatives
+            nfev += self.n_stages * len(rows)
+
+            scale = atol + np.maximum(np.abs(states), np.abs(new_states)) * rtol
+            error_rows = np.tensordot(self.E, stages, axes=1) * h[:, None] / scale
+            error = np.sqrt(np.mean(error_rows ** 2, axis=1))
+
+            accepted = error <= 1
+            with np.errstate(divide='ignore'):
+                growth = 0.9 * error ** self.error_exponent
+            factor = np.where(accepted, np.minimum(10.0, growth), np.maximum(0.2, growth))
+            # Как в SciPy: шаг, принятый после отклонения, не увеличивается
+            factor = np.where(accepted & after_rejection, np.minimum(1.0, factor), factor)
+            after_rejection = ~accepted
+
+            nsteps[rows] += accepted
+            nrejected[rows] += ~accepted
+
+            # Событие удара: каждая строка останавливается независимо
+            r_new = np.sqrt(np.einsum('ij,ij->i', new_states[:, :3], new_states[:, :3]))
+            hit = accepted & (r_new <= self.radius)
+            if np.any(hit):
+                fraction, impact_states = self._locate_impact(
+                    states[hit], stages[:, hit].transpose(1, 0, 2), h[hit])
+                hit_rows = rows[hit]
+                impacted[hit_rows] = True
+                final_time[hit_rows] = t[hit] + fraction * h[hit]
+                final_state[hit_rows] = impact_states
+                new_states[hit] = impact_states
+
+            t_new = np.where(accepted, t + h, t)
+            if np.any(hit):
+                t_new[hit] = final_time[rows[hit]]
+
+            if save_trajectories and np.any(accepted):
+                saved_times.append(t_new[accepted])
+                saved_rows.append(rows[accepted])
+                saved_states.append(new_states[accepted])
+
+            states = np.where(accepted[:, None], new_states, states)
+            derivatives = np.where(accepted[:, None], new_derivatives, derivatives)
+            t = t_new
+            h = h * factor
+
+            # Строки, достигшие поверхности или конца интервала, выбывают
+            done = hit | (t >= max_time)
+            if np.any(done):
+                finished = done & ~hit
+                final_state[rows[finished]] = states[finished]
+                final_time[rows[finished]] = t[finished]
+
+                keep = ~done
+                rows = rows[keep]
+                states = states[keep]
+                derivatives = derivatives[keep]
+                active_drag = active_drag[keep]
+                t = t[keep]
+                h = h[keep]
+                after_rejection = after_rejection[keep]
+
+        impact_speed = np.sqrt(np.einsum('ij,ij->i', final_state[:, 3:], final_state[:, 3:]))
+        r_final = np.sqrt(np.einsum('ij,ij->i', final_state[:, :3], final_state[:, :3]))
+        latitude = np.degrees(np.arcsin(final_state[:, 2] / r_final))
+        longitude = np.degrees(np.arctan2(final_state[:, 1], final_state[:, 0]))
+
+        wall_time = _time.perf_counter() - start_wall
+
+        results = {
+            'impacted': impacted,
+            'impact_time': np.where(impacted, final_time, np.nan),
+            'final_time': final_time,
+            'final_state': final_state,
+            'impact_speed': np.where(impacted, impact_speed, np.nan),
+            'impact_energy': np.where(impacted, 0.5 * mass * impact_speed ** 2, np.nan),
+            'impact_coordinates': np.column_stack([latitude, longitude]),
+            'nfev': nfev,
+            'nsteps': nsteps,
+            'nrejected': nrejected,
+            'wall_time': wall_time,
+            'trajectories_per_second': n / wall_time if wall_time > 0 else np.inf,
+        }
+
+        if save_trajectories:
+            results['trajectories'] = self._split_trajectories(
+                n, saved_times, saved_rows, saved_states)
+
+        return results
+
+    @staticmethod
+    def _split_trajectories(n, saved_times, saved_rows, saved_states):
+        """Разбор сохранённых шагов на траектории отдельных строк: список (t, y)"""
+        all_rows = np.concatenate(saved_rows)
+        all_times = np.concatenate(saved_times)
+        all_states = np.concatenate(saved_states)
+
+        # Устойчивая сортировка сохраняет порядок шагов внутри строки
+        order = np.argsort(all_rows, kind='stable')
+        bounds = np.searchsorted(all_rows[order], np.arange(n + 1))
+
+        trajectories = []
+        for i in range(n):
+            block = order[bounds[i]:bounds[i + 1]]
+            trajectories.append((all_times[block], all_states[block].T))
+        return trajectories
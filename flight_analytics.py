@@ -0,0 +1,169 @@
+import numpy as np
+
+
+# Стандартное ускорение свободного падения для перевода в перегрузку (м/с²)
+STANDARD_GRAVITY = 9.80665
+
+# Коэффициент формулы Саттона–Грейвса q = k·√(ρ/Rn)·v³ для земного воздуха
+SUTTON_GRAVES_K = 1.7415e-4
+
+
+class FlightAnalytics:
+    """
+    Потоковый сбор итогов полёта без хранения траектории
+
+    Принимает точки по мере расчёта (блоки iter_fall или шаги решателя)
+    и обновляет накопленные экстремумы за O(1) памяти:
+    - максимальная скорость
+    - пиковое торможение (перегрузка от сопротивления атмосферы)
+    - пиковый скоростной напор q = ρv²/2
+    - пиковый тепловой поток по формуле Саттона–Грейвса (оценка)
+    - момент входа в атмосферу
+    - координаты точки удара (последней точки)
+    """
+
+    def __init__(self, body_params, atmosphere=None, drag_constant=0.0, nose_radius=1.0):
+        """
+        Args:
+            body_params: параметры небесного тела
+            atmosphere: таблица плотности (atmosphere.AtmosphereTable) или None
+            drag_constant: 0.5 * Cd * A / m (м²/кг)
+            nose_radius: радиус затупления для оценки теплового потока (м)
+        """
+        self.radius = body_params['radius']
+        self.atmosphere = atmosphere
+        self.atmosphere_top = atmosphere.top if atmosphere is not None else 0.0
+        self.drag_constant = drag_constant
+        self.heating_factor = SUTTON_GRAVES_K / np.sqrt(nose_radius)
+        self.reset()
+
+    @classmethod
+    def from_model(cls, model, nose_radius=1.0):
+        """Сборщик для модели PlanetFall"""
+        drag_constant = 0.5 * model.drag_coef * model.cross_area / model.mass
+        return cls(model.body_params, model.atmosphere, drag_constant, nose_radius)
+
+    def reset(self):
+        """Сброс накопленных значений"""
+        self.n_points = 0
+        self.start_time = None
+        self.last_time = None
+        self.last_state = None
+        self.last_altitude = None
+        self.max_velocity = 0.0
+        self.max_velocity_time = None
+        self.max_deceleration = 0.0
+        self.max_deceleration_time = None
+        self.max_dynamic_pressure = 0.0
+        self.max_dynamic_pressure_time = None
+        self.max_heating_rate = 0.0
+        self.max_heating_rate_time = None
+        self.atmosphere_entry_time = None
+        self._entry_resolved = False
+
+    def update(self, t, y):
+        """
+        Учёт блока точек
+
+        Args:
+            t: моменты времени формы (n,) или число
+            y: состояния формы (6, n) или (6,)
+        """
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        y = np.asarray(y, dtype=float).reshape(6, -1)
+        if len(t) == 0:
+            return
+
+        r = np.sqrt(y[0] ** 2 + y[1] ** 2 + y[2] ** 2)
+        altitude = r - self.radius
+        speed = np.sqrt(y[3] ** 2 + y[4] ** 2 + y[5] ** 2)
+
+        self._update_peak('max_velocity', speed, t)
+
+        if self.atmosphere is not None:
+            density = self.atmosphere.density_array(altitude)
+            dynamic_pressure = 0.5 * density * speed ** 2
+            self._update_peak('max_dynamic_pressure', dynamic_pressure, t)
+            self._update_peak('max_deceleration',
+                              2 * self.drag_constant * dynamic_pressure, t)
+            self._update_peak('max_heating_rate',
+                              self.heating_factor * np.sqrt(density) * speed ** 3, t)
+            self._update_entry(t, altitude)
+
+        if self.start_time is None:
+            self.start_time = float(t[0])
+        self.n_points += len(t)
+        self.last_time = float(t[-1])
+        self.last_state = y[:, -1].copy()
+        self.last_altitude = float(altitude[-1])
+
+    def _update_peak(self, name, values, t):
+        """Обновление максимума name и момента его достижения"""
+        i = int(np.argmax(values))
+        if values[i] > getattr(self, name) or getattr(self, name + '_time') is None:
+            setattr(self, name, float(values[i]))
+            setattr(self, name + '_time', float(t[i]))
+
+    def _update_entry(self, t, altitude):
+        """Момент первого пересечения границы атмосферы сверху (линейная интерполяция)"""
+        if self._entry_resolved:
+            return
+
+        # Учитывается и переход от последней точки предыдущего блока
+        if self.last_altitude is not None:
+            altitude = np.concatenate([[self.last_altitude], altitude])
+            t = np.concatenate([[self.last_time], t])
+        elif altitude[0] <= self.atmosphere_top:
+            # Полёт начался в атмосфере: входа не было
+            self._entry_resolved = True
+            return
+
+        above = altitude > self.atmosphere_top
+        entries = np.flatnonzero(above[:-1] & ~above[1:])
+        if len(entries):
+            i = entries[0]
+            fraction = (altitude[i] - self.atmosphere_top) / (altitude[i] - altitude[i + 1])
+            self.atmosphere_entry_time = float(t[i] + fraction * (t[i + 1] - t[i]))
+            self._entry_resolved = True
+
+    def consume(self, chunks):
+        """
+        Учёт всех блоков итератора (например, PlanetFall.iter_fall)
+
+        Returns:
+            Значение, возвращённое генератором (итог прогона), или None
+        """
+        iterator = iter(chunks)
+        while True:
+            try:
+                t, y = next(iterator)
+            except StopIteration as stop:
+                return stop.value
+            self.update(t, y)
+
+    def result(self):
+        """Итоги полёта (скаляры)"""
+        if self.last_state is None:
+            raise ValueError("Нет данных: не было ни одного вызова update")
+
+        x, y, z = self.last_state[0:3]
+        r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+
+        return {
+            'flight_time': self.last_time,
+            'max_velocity': self.max_velocity,
+            'max_velocity_time': self.max_velocity_time,
+            'final_velocity': float(np.linalg.norm(self.last_state[3:6])),
+            'final_altitude': self.last_altitude,
+            'impact_coordinates': [float(np.degrees(np.arcsin(z / r))),
+                                   float(np.degrees(np.arctan2(y, x)))],
+            'max_deceleration': self.max_deceleration,
+            'max_g_load': self.max_deceleration / STANDARD_GRAVITY,
+            'max_deceleration_time': self.max_deceleration_time,
+            'max_dynamic_pressure': self.max_dynamic_pressure,
+            'max_dynamic_pressure_time': self.max_dynamic_pressure_time,
+            'max_heating_rate': self.max_heating_rate,
+            'max_heating_rate_time': self.max_heating_rate_time,
+            'atmosphere_entry_time': self.atmosphere_entry_time,
+            'n_points': self.n_points,
+        }
@@ -0,0 +1,226 @@
+import math
+
+import numpy as np
+
+
+# Относительный шаг разностного градиента возмущения от несферичности
+GRADIENT_STEP = 1e-5
+
+
+def normalization_factor(n, m):
+    """
+    Множитель перехода от полностью нормированных коэффициентов к обычным:
+    C_nm = N_nm * C̄_nm, N_nm = √((2 - δ_m0)(2n + 1)(n - m)! / (n + m)!)
+    """
+    return math.sqrt((2 - (m == 0)) * (2 * n + 1) * math.factorial(n - m)
+                     / math.factorial(n + m))
+
+
+class GravityField:
+    """
+    Гравитационное поле тела по разложению по сферическим функциям
+
+    Потенциал μ/r Σ (R/r)ⁿ P_nm(sin φ) (C_nm cos mλ + S_nm sin mλ) задан
+    в системе координат, связанной с телом (ось z — ось вращения). Зональные
+    члены от поворота вокруг оси z не зависят; для тессеральных в инерциальной
+    системе передаётся угол поворота тела (ω·t). Ускорение считается рекуррентно, без тригонометрии и особенностей на полюсах:
+    - точечная масса и зональные члены — рекурсия Бонне для P_n(z/r)
+    - тессеральные члены — рекурсия Каннингема для V_nm, W_nm
+      (Montenbruck, Gill. Satellite Orbits, 3.2) только до наибольших
+      степени и порядка, для которых заданы коэффициенты
+
+    Коэффициенты рекурсий и нормировки рассчитываются один раз при создании.
+    Один и тот же код работает со скалярами (правая часть решателя)
+    и с массивами NumPy (много положений за один вызов).
+    """
+
+    def __init__(self, mu, reference_radius, zonal=(), tesseral=(), degree=None, order=None):
+        """
+        Args:
+            mu: гравитационный параметр GM (м³/с²)
+            reference_radius: опорный радиус разложения (м)
+            zonal: J2, J3, ... (ненормированные, начиная со степени 2)
+            tesseral: записи [n, m, C̄_nm, S̄_nm] с полностью нормированными
+                      коэффициентами (m >= 1)
+            degree: наибольшая учитываемая степень (по умолчанию — все заданные)
+            order: наибольший учитываемый порядок (по умолчанию — degree;
+                   0 — только зональные члены)
+        """
+        available = max([len(zonal) + 1] + [n for n, _, _, _ in tesseral])
+        self.degree = available if degree is None else min(degree, available)
+        self.order = self.degree if order is None else min(order, self.degree)
+        self.mu = mu
+        self.reference_radius = reference_radius
+
+        # Обычные (ненормированные) коэффициенты; C_00 = 1 — точечная масса
+        size = self.degree + 1
+        self.C = np.zeros((size, size))
+        self.S = np.zeros((size, size))
+        self.C[0, 0] = 1.0
+        for n, value in enumerate(zonal, start=2):
+            if n <= self.degree:
+                self.C[n, 0] = -value
+        for n, m, c, s in tesseral:
+            if n <= self.degree and m <= self.order:
+                factor = normalization_factor(n, m)
+                self.C[n, m] = factor * c
+                self.S[n, m] = factor * s
+
+        self._prepare_zonal()
+        self.zonal_only = not self.S.any() and not self.C[:, 1:].any()
+        if not self.zonal_only:
+            self._prepare_harmonics()
+
+    def _prepare_zonal(self):
+        # Рекурсия Бонне: P_n = ((2n - 1) u P_{n-1} - (n - 1) P_{n-2}) / n
+        self._zonal_terms = [(n, -self.C[n, 0], (2 * n - 1) / n, (n - 1) / n)
+                             for n in range(2, self.degree + 1)]
+
+    def _prepare_harmonics(self):
+        # Столбцы V_nm, W_nm нужны до порядка m + 1 и степени n + 1
+        # наибольших заданных тессеральных членов
+        n_max = max(n for n in range(self.degree + 1)
+                    if self.C[n, 1:].any() or self.S[n, 1:].any())
+        m_max = max(m for m in range(1, self.order + 1)
+                    if self.C[:, m].any() or self.S[:, m].any())
+        rows = n_max + 2
+        columns = m_max + 2
+
+        # V_nm и W_nm хранятся в плоских списках с индексом n * columns + m;
+        # рекурсия записана заранее в виде шагов с готовыми коэффициентами:
+        # по диагонали (i, i_{m-1,m-1}, 2m - 1) и вниз по столбцу
+        # (i, i_{n-1,m}, i_{n-2,m}, (2n - 1)/(n - m), (n + m - 1)/(n - m))
+        self._size = rows * columns
+        self._diagonal_steps = []
+        self._column_steps = []
+        for m in range(columns):
+            if m > 0:
+                self._diagonal_steps.append(
+                    (m * columns + m, (m - 1) * columns + m - 1, 2 * m - 1))
+            for n in range(m + 1, rows):
+                previous2 = (n - 2) * columns + m if n >= m + 2 else None
+                self._column_steps.append((n * columns + m, (n - 1) * columns + m, previous2,
+                                           (2 * n - 1) / (n - m), (n + m - 1) / (n - m)))
+
+        # Ненулевые тессеральные члены: индексы V_{n+1,m+1}, V_{n+1,m-1}, V_{n+1,m}
+        # и множители (n - m + 2)(n - m + 1), n - m + 1
+        self._terms = [((n + 1) * columns + m + 1, (n + 1) * columns + m - 1,
+                        (n + 1) * columns + m, self.C[n, m], self.S[n, m],
+                        (n - m + 2) * (n - m + 1), n - m + 1)
+                       for n in range(n_max + 1) for m in range(1, min(n, m_max) + 1)
+                       if self.C[n, m] or self.S[n, m]]
+
+    def acceleration(self, x, y, z, angle=0.0):
+        """
+        Ускорение в точке (x, y, z) или в массивах точек (x, y, z формы (n,))
+
+        Args:
+            angle: угол поворота тела вокруг оси z относительно системы
+                   координат точки (рад; для массивов — число или массив
+                   формы (n,)). Положение переводится в связанную с телом
+                   систему, тессеральное ускорение — обратно
+
+        Returns:
+            Кортеж (ax, ay, az) того же вида, что и аргументы
+        """
+        ax, ay, az = self._zonal_acceleration(x, y, z)
+        if self.zonal_only:
+            return ax, ay, az
+        if isinstance(angle, np.ndarray):
+            cos, sin = np.cos(angle), np.sin(angle)
+        elif angle:
+            cos, sin = math.cos(angle), math.sin(angle)
+        else:
+            tx, ty, tz = self._tesseral_acceleration(x, y, z)
+            return ax + tx, ay + ty, az + tz
+
+        # Поворот положения на -angle (в систему тела), ускорения — на angle
+        tx, ty, tz = self._tesseral_acceleration(cos * x + sin * y, cos * y - sin * x, z)
+        return ax + cos * tx - sin * ty, ay + sin * tx + cos * ty, az + tz
+
+    def acceleration_array(self, positions, angle=0.0):
+        """Векторный вариант для массива положений (n, 3); результат формы (n, 3)"""
+        positions = np.asarray(positions, dtype=float)
+        ax, ay, az = self.acceleration(positions[:, 0], positions[:, 1], positions[:, 2], angle)
+        return np.stack([ax, ay, az], axis=-1)
+
+    def _zonal_acceleration(self, x, y, z):
+        r2 = x * x + y * y + z * z
+        r = r2 ** 0.5
+        u = z / r
+        q = self.reference_radius / r
+
+        # a = -μ/r² r̂ + μ/r² Σ J_n qⁿ [((n + 1) P_n + u P'_n) r̂ - P'_n ẑ]
+        p_previous, p = 1.0, u
+        dp = 1.0
+        scale = q
+        radial = 0.0
+        axial = 0.0
+        for n, jn, a, b in self._zonal_terms:
+            p_previous, p = p, a * u * p - b * p_previous
+            dp = n * p_previous + u * dp
+            scale = scale * q
+            if jn:
+                radial = radial + jn * scale * ((n + 1) * p + u * dp)
+                axial = axial + jn * scale * dp
+
+        g = self.mu / r2
+        factor = g * (radial - 1.0) / r
+        return factor * x, factor * y, factor * z - g * axial
+
+    def _tesseral_acceleration(self, x, y, z):
+        radius = self.reference_radius
+        r2 = x * x + y * y + z * z
+        rho = radius * radius / r2
+        x0 = x * radius / r2
+        y0 = y * radius / r2
+        z0 = z * radius / r2
+
+        V = [0.0] * self._size
+        W = [0.0] * self._size
+        V[0] = radius / r2 ** 0.5
+        for i, previous, c in self._diagonal_steps:
+            V[i] = c * (x0 * V[previous] - y0 * W[previous])
+            W[i] = c * (x0 * W[previous] + y0 * V[previous])
+        # Столбец m опирается только на свою диагональ, поэтому шаги по
+        # столбцам выполняются после всех диагональных
+        for i, previous, previous2, a, b in self._column_steps:
+            if previous2 is None:
+                V[i] = a * z0 * V[previous]
+                W[i] = a * z0 * W[previous]
+            else:
+                V[i] = a * z0 * V[previous] - b * rho * V[previous2]
+                W[i] = a * z0 * W[previous] - b * rho * W[previous2]
+
+        ax = ay = az = 0.0
+        for upper, lower, same, c, s, f, g in self._terms:
+            ax = ax + 0.5 * (-c * V[upper] - s * W[upper] + f * (c * V[lower] + s * W[lower]))
+            ay = ay + 0.5 * (-c * W[upper] + s * V[upper] + f * (-c * W[lower] + s * V[lower]))
+            az = az + g * (-c * V[same] - s * W[same])
+
+        scale = self.mu / (radius * radius)
+        return scale * ax, scale * ay, scale * az
+
+    def gradient(self, position, angle=0.0):
+        """
+        Матрица ∂a/∂r формы (3, 3): точечная масса — аналитически,
+        возмущение от несферичности — центральными разностями (оно гладкое
+        на масштабе радиуса тела, поэтому ошибка разностей пренебрежимо мала);
+        angle — как в acceleration
+        """
+        position = np.asarray(position, dtype=float)
+        r = math.sqrt(position @ position)
+        unit = position / r
+        matrix = -self.mu / r ** 3 * (np.eye(3) - 3 * np.outer(unit, unit))
+
+        step = GRADIENT_STEP * r
+        for j in range(3):
+            shift = np.zeros(3)
+            shift[j] = step
+            forward = np.array(self.acceleration(*(position + shift), angle))
+            backward = np.array(self.acceleration(*(position - shift), angle))
+            # Из разности вычитается вклад точечной массы
+            forward += self.mu * (position + shift) / np.linalg.norm(position + shift) ** 3
+            backward += self.mu * (position - shift) / np.linalg.norm(position - shift) ** 3
+            matrix[:, j] += (forward - backward) / (2 * step)
+        return matrix
@@ -1,10 +1,37 @@
+import importlib
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 import numpy as np
-from physics_planet import PlanetFall
-from visualization_planet import PlanetVisualizer
-from utils import analyze_planet_fall, calculate_orbit_velocity
+from utils import initial_velocity_vector, optimize_trajectory_for_animation
 from celestial_bodies import CelestialBody
+from sim_cache import SimulationCache, DEFAULT_CACHE_DIR
+
+# Кэш результатов: повторный запуск того же сценария не пересчитывается
+SIMULATION_CACHE = SimulationCache(cache_dir=DEFAULT_CACHE_DIR)
+
+# Период опроса очереди сообщений фонового расчёта (мс)
+POLL_INTERVAL_MS = 100
+
+# Максимальное время симуляции (с)
+MAX_TIME = 3600
+
+# Задержка предпросмотра после последнего изменения ползунка (мс)
+PREVIEW_DELAY_MS = 30
+
+# Модули с SciPy и Matplotlib: импортируются при первом расчёте или графике,
+# а после показа окна загружаются заранее в фоновом потоке
+HEAVY_MODULES = ('physics_planet', 'visualization_planet')
+
+
+def warm_up():
+    """Фоновая загрузка тяжёлых модулей (ошибки проявятся при реальном импорте)"""
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            return
 
 
 class PlanetFallGUI:
@@ -25,8 +52,25 @@ class PlanetFallGUI:
         self.custom_velocity_var = tk.DoubleVar(value=0.0)
         self.coriolis_var = tk.BooleanVar(value=True)
         self.animation_var = tk.BooleanVar(value=True)
+        self.progress_var = tk.DoubleVar(value=0.0)
+
+        # Фоновый расчёт: сообщения из рабочего потока передаются через очередь
+        # и выводятся в интерфейс по таймеру пачками
+        self.messages = queue.Queue()
+        self.worker = None
+        self.cancel_event = threading.Event()
+
+        # Предпросмотр при перемещении ползунков: номер поколения отсекает
+        # результаты устаревших расчётов
+        self.preview_after = None
+        self.preview_cancel = None
+        self.preview_generation = 0
 
         self.setup_ui()
+        self.root.after(POLL_INTERVAL_MS, self.poll_worker)
+
+        # Окно уже построено: SciPy и Matplotlib догружаются, пока заполняется форма
+        self.root.after_idle(lambda: threading.Thread(target=warm_up, daemon=True).start())
 
     def setup_ui(self):
         """Настройка компактного пользовательского интерфейса"""
@@ -108,6 +152,14 @@ class PlanetFallGUI:
         self.altitude_label = ttk.Label(params_grid, text="400 км", width=8)
         self.altitude_label.grid(row=2, column=2, padx=5, pady=2)
 
+        # Точный расчёт по отпусканию ползунка
+        for scale in (mass_scale, area_scale, self.altitude_scale):
+            scale.bind("<ButtonRelease-1>", self.on_slider_release)
+
+        # Предпросмотр: время и скорость удара
+        self.preview_label = ttk.Label(params_frame, text="", font=("Arial", 8))
+        self.preview_label.pack(fill=tk.X, padx=5, pady=(4, 0))
+
         # Начальные условия
         init_frame = ttk.LabelFrame(main_frame, text="Начальные условия", padding="8")
         init_frame.pack(fill=tk.X, pady=5)
@@ -161,6 +213,21 @@ class PlanetFallGUI:
                                       cursor="hand2")
         self.simulate_btn.pack(fill=tk.X, pady=5, ipady=8)
 
+        # Ход расчёта и кнопка прерывания
+        progress_frame = ttk.Frame(button_frame)
+        progress_frame.pack(fill=tk.X, pady=2)
+
+        self.progress_bar = ttk.Progressbar(progress_frame, variable=self.progress_var,
+                                            maximum=100, length=300)
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        self.cancel_btn = ttk.Button(progress_frame, text="⏹ Отмена",
+                                     command=self.cancel_simulation, state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.RIGHT, padx=5)
+
+        self.progress_label = ttk.Label(button_frame, text="", font=("Arial", 8))
+        self.progress_label.pack(fill=tk.X, padx=5)
+
         # Второстепенные кнопки
         secondary_buttons = ttk.Frame(button_frame)
         secondary_buttons.pack(fill=tk.X)
@@ -189,6 +256,9 @@ class PlanetFallGUI:
         self.mass_var.trace('w', self.update_mass_label)
         self.area_var.trace('w', self.update_area_label)
         self.altitude_var.trace('w', self.update_altitude_label)
+        for variable in (self.mass_var, self.area_var, self.altitude_var, self.body_var,
+                         self.velocity_type_var, self.custom_velocity_var, self.coriolis_var):
+            variable.trace('w', self.schedule_preview)
 
         # Инициализация информации о планете
         self.on_planet_change()
@@ -227,113 +297,322 @@ class PlanetFallGUI:
         self.altitude_label.config(text=f"{altitude_km:.0f} км")
 
     def log_info(self, message):
-        """Добавление сообщения в информационную панель"""
-        self.info_text.insert(tk.END, message + "\n")
-        self.info_text.see(tk.END)
-        self.info_text.update()
+        """
+        Добавление сообщения в информационную панель.
+        Можно вызывать из любого потока: сообщение попадает в очередь
+        и выводится при очередном опросе вместе с остальными
+        """
+        self.messages.put(('log', message))
+
+    def poll_worker(self):
+        """Вывод накопленных сообщений фонового расчёта (по таймеру)"""
+        lines = []
+        try:
+            while True:
+                kind, *payload = self.messages.get_nowait()
+                if kind == 'log':
+                    lines.append(payload[0])
+                elif kind == 'progress':
+                    self.show_progress(*payload)
+                elif kind == 'done':
+                    self.flush_log(lines)
+                    lines = []
+                    self.finish_simulation(*payload)
+                elif kind == 'error':
+                    self.flush_log(lines + [payload[0]])
+                    lines = []
+                    messagebox.showerror("Ошибка", payload[0])
+                    self.finish_simulation()
+                elif kind == 'preview':
+                    # Результаты устаревших предпросмотров отбрасываются
+                    if payload[0] == self.preview_generation:
+                        self.preview_label.config(text=payload[1])
+                elif kind == 'cancelled':
+                    lines.append(payload[0])
+                    self.finish_simulation()
+        except queue.Empty:
+            pass
+
+        self.flush_log(lines)
+        self.root.after(POLL_INTERVAL_MS, self.poll_worker)
+
+    def flush_log(self, lines):
+        """Вставка пачки строк в панель одной операцией"""
+        if lines:
+            self.info_text.insert(tk.END, "\n".join(lines) + "\n")
+            self.info_text.see(tk.END)
+
+    def show_progress(self, t, altitude):
+        """Отображение хода расчёта: модельное время и текущая высота"""
+        self.progress_var.set(min(100.0, 100.0 * t / MAX_TIME))
+        self.progress_label.config(text=f"t = {t:.0f} / {MAX_TIME} с, "
+                                        f"высота {altitude / 1000:.1f} км")
 
     def clear_info(self):
         """Очистка информационной панели"""
         self.info_text.delete(1.0, tk.END)
 
     def run_simulation(self):
-        """Запуск симуляции с выбранными параметрами"""
+        """Запуск симуляции с выбранными параметрами в фоновом потоке"""
+        if self.worker is not None and self.worker.is_alive():
+            return
+
+        self.clear_info()
+        self.log_info("🔄 Запуск симуляции...")
+
+        params = self.read_params()
+        if params is None:
+            messagebox.showerror("Ошибка", "Некорректное значение скорости")
+            return
+
+        # Предпросмотр больше не нужен: идёт полный расчёт
+        self.cancel_preview()
+
+        self.simulate_btn.config(state=tk.DISABLED, bg="#cccccc")
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.progress_var.set(0.0)
+        self.progress_label.config(text="")
+
+        self.cancel_event.clear()
+        self.worker = threading.Thread(target=self.simulation_worker, args=(params,),
+                                       daemon=True)
+        self.worker.start()
+
+    def read_params(self):
+        """
+        Параметры симуляции из виджетов (только в главном потоке)
+
+        Returns:
+            Словарь параметров или None при некорректном вводе
+        """
+        try:
+            return {
+                'body_name': self.body_var.get(),
+                'mass': self.mass_var.get(),
+                'cross_area': self.area_var.get(),
+                'initial_altitude': self.altitude_var.get(),
+                'enable_coriolis': self.coriolis_var.get(),
+                'show_animation': self.animation_var.get(),
+                'velocity_type': self.velocity_type_var.get(),
+                'custom_speed': self.custom_velocity_var.get(),
+            }
+        except tk.TclError:
+            return None
+
+    def schedule_preview(self, *args):
+        """Отложенный предпросмотр: перезапускается при каждом изменении параметров"""
+        if self.preview_after is not None:
+            self.root.after_cancel(self.preview_after)
+        self.preview_after = self.root.after(PREVIEW_DELAY_MS, self.start_preview)
+
+    def on_slider_release(self, event=None):
+        """Отпускание ползунка: точный расчёт (результат попадает в кэш)"""
+        if self.preview_after is not None:
+            self.root.after_cancel(self.preview_after)
+        self.start_preview(full=True)
+
+    def cancel_preview(self):
+        """Отмена отложенного и выполняющегося предпросмотра"""
+        if self.preview_after is not None:
+            self.root.after_cancel(self.preview_after)
+            self.preview_after = None
+        if self.preview_cancel is not None:
+            self.preview_cancel.set()
+        self.preview_generation += 1
+
+    def start_preview(self, full=False):
+        """
+        Запуск предпросмотра в фоновом потоке.
+        Устаревший расчёт прерывается, его результат не отображается
+        """
+        self.preview_after = None
+        if self.worker is not None and self.worker.is_alive():
+            return
+
+        params = self.read_params()
+        if params is None:
+            return
+
+        self.cancel_preview()
+        self.preview_cancel = threading.Event()
+        threading.Thread(target=self.preview_worker,
+                         args=(params, self.preview_generation, self.preview_cancel, full),
+                         daemon=True).start()
+
+    def preview_worker(self, params, generation, cancel, full):
+        """Быстрый (или точный при full) расчёт времени и скорости удара"""
+        from physics_planet import SimulationCancelled, PREVIEW_METHOD, preview_policies
+
         try:
-            # Временно отключаем кнопку чтобы избежать двойного нажатия
-            self.simulate_btn.config(state=tk.DISABLED, bg="#cccccc")
-            self.root.update()
-
-            self.clear_info()
-            self.log_info("🔄 Запуск симуляции...")
-
-            # Получение параметров из GUI
-            body_name = self.body_var.get()
-            mass = self.mass_var.get()
-            cross_area = self.area_var.get()
-            initial_altitude = self.altitude_var.get()
-            enable_coriolis = self.coriolis_var.get()
-            show_animation = self.animation_var.get()
-
-            body_params = CelestialBody.get_body_params(body_name)
-
-            # Вычисление начальной скорости
-            if self.velocity_type_var.get() == "orbital":
-                orbit_velocity = calculate_orbit_velocity(
-                    body_params['radius'],
-                    body_params['mass'],
-                    initial_altitude
-                )
-                initial_velocity = [orbit_velocity, 0, 0]
-                self.log_info(f"📊 Орбитальная скорость: {orbit_velocity:.1f} м/с")
-
-            elif self.velocity_type_var.get() == "zero":
-                initial_velocity = [0, 0, 0]
-                self.log_info("📊 Начальная скорость: 0 м/с")
-
-            else:  # custom
-                custom_speed = self.custom_velocity_var.get()
-                initial_velocity = [custom_speed, 0, 0]
-                self.log_info(f"📊 Заданная скорость: {custom_speed:.1f} м/с")
-
-            # Создание модели
-            fall_model = PlanetFall(
-                body_name=body_name,
-                mass=mass,
-                cross_area=cross_area,
-                drag_coef=2.0 if body_params['atmosphere_height'] > 0 else 0,
-                enable_coriolis=enable_coriolis and body_name == 'earth'
+            body_params, fall_model, initial_velocity, _ = self.prepare_simulation(params)
+            if full:
+                options = {'cache': SIMULATION_CACHE}
+            else:
+                policies = preview_policies(params['initial_altitude'], body_params['radius'])
+                options = {'policies': policies, 'method': PREVIEW_METHOD}
+
+            solution = fall_model.simulate_fall(
+                initial_altitude=params['initial_altitude'],
+                initial_velocity=initial_velocity,
+                max_time=MAX_TIME,
+                cancel=cancel,
+                **options
             )
+        except SimulationCancelled:
+            return
+        except Exception as e:
+            self.messages.put(('preview', generation, f"Предпросмотр: ошибка ({e})"))
+            return
+
+        speed = np.linalg.norm(solution.y[3:6, -1])
+        prefix = "Точно" if full else "≈"
+        if len(solution.t_events[0]) > 0:
+            text = f"{prefix} удар через {solution.t[-1]:.1f} с, скорость {speed:.1f} м/с"
+        else:
+            text = f"{prefix} без удара за {MAX_TIME} с, скорость {speed:.1f} м/с"
+        self.messages.put(('preview', generation, text))
+
+    def cancel_simulation(self):
+        """Прерывание текущего расчёта"""
+        self.cancel_event.set()
+        self.cancel_btn.config(state=tk.DISABLED)
+
+    def prepare_simulation(self, params):
+        """
+        Модель и начальная скорость по параметрам интерфейса
+
+        Returns:
+            Кортеж (body_params, fall_model, initial_velocity, сообщение о скорости)
+        """
+        from physics_planet import PlanetFall
+
+        body_name = params['body_name']
+        initial_altitude = params['initial_altitude']
+        body_params = CelestialBody.get_body_params(body_name)
+
+        # Вычисление начальной скорости (те же правила, что в пакетном расчёте)
+        velocity_type = params['velocity_type']
+        velocity = params['custom_speed'] if velocity_type == "custom" else velocity_type
+        initial_velocity = initial_velocity_vector(body_params, initial_altitude, velocity)
+        speed = np.linalg.norm(initial_velocity)
+        if velocity_type == "orbital":
+            message = f"📊 Орбитальная скорость: {speed:.1f} м/с"
+        elif velocity_type == "zero":
+            message = "📊 Начальная скорость: 0 м/с"
+        else:
+            message = f"📊 Заданная скорость: {speed:.1f} м/с"
+
+        # Создание модели
+        fall_model = PlanetFall(
+            body_name=body_name,
+            mass=params['mass'],
+            cross_area=params['cross_area'],
+            drag_coef=2.0 if body_params['atmosphere_height'] > 0 else 0,
+            enable_coriolis=params['enable_coriolis'] and body_name == 'earth',
+            verbose=False
+        )
+        return body_params, fall_model, initial_velocity, message
+
+    def simulation_worker(self, params):
+        """Расчёт в рабочем потоке; результаты передаются через очередь"""
+        from physics_planet import SimulationCancelled
+
+        try:
+            body_name = params['body_name']
+            initial_altitude = params['initial_altitude']
+            body_params, fall_model, initial_velocity, velocity_message = \
+                self.prepare_simulation(params)
+            self.log_info(velocity_message)
 
             # Запуск симуляции
             self.log_info(f"🛰️  Начальная высота: {initial_altitude / 1000:.1f} км")
             self.log_info("⚡ Выполнение расчётов...")
 
+            radius = body_params['radius']
+
+            def report_progress(t, state):
+                altitude = np.sqrt(state[0] ** 2 + state[1] ** 2 + state[2] ** 2) - radius
+                self.messages.put(('progress', t, altitude))
+
             solution = fall_model.simulate_fall(
                 initial_altitude=initial_altitude,
                 initial_velocity=initial_velocity,
-                max_time=3600
+                max_time=MAX_TIME,
+                cache=SIMULATION_CACHE,
+                progress=report_progress,
+                cancel=self.cancel_event
             )
+            if solution.cache_hit:
+                self.log_info("💾 Результат взят из кэша")
 
-            # Анализ результатов
-            analysis = analyze_planet_fall(solution, body_params['radius'])
-            impact_energy = fall_model.calculate_impact_energy(solution.y[3:6, -1])
+            # Итоги собраны по ходу расчёта (FlightAnalytics) или взяты из кэша
+            summary = solution.summary
 
             # Вывод результатов
             self.log_info("\n" + "=" * 50)
             self.log_info("📈 РЕЗУЛЬТАТЫ СИМУЛЯЦИИ")
             self.log_info("=" * 50)
-            self.log_info(f"⏱️  Время падения: {analysis['flight_time']:.1f} с")
-            self.log_info(f"📈 Максимальная скорость: {analysis['max_velocity']:.1f} м/с")
-            self.log_info(f"💥 Скорость удара: {analysis['final_velocity']:.1f} м/с")
-            self.log_info(f"⚡ Энергия удара: {impact_energy / 1e6:.1f} МДж")
+            self.log_info(f"⏱️  Время падения: {summary['flight_time']:.1f} с")
+            self.log_info(f"📈 Максимальная скорость: {summary['max_velocity']:.1f} м/с")
+            self.log_info(f"💥 Скорость удара: {summary['final_velocity']:.1f} м/с")
+            self.log_info(f"⚡ Энергия удара: {summary['impact_energy'] / 1e6:.1f} МДж")
+
+            if summary['max_dynamic_pressure'] > 0:
+                self.log_info(f"🔥 Пиковая перегрузка: {summary['max_g_load']:.1f} g")
+                self.log_info(f"🌬️  Макс. скоростной напор: "
+                              f"{summary['max_dynamic_pressure'] / 1000:.1f} кПа")
+                self.log_info(f"🌡️  Макс. тепловой поток: "
+                              f"{summary['max_heating_rate'] / 1e6:.2f} МВт/м²")
+
+            self.messages.put(('progress', summary['flight_time'], summary['final_altitude']))
+            self.messages.put(('done', body_name, body_params, (solution.t, solution.y[0:3]),
+                               params['show_animation']))
+
+        except SimulationCancelled as e:
+            self.messages.put(('cancelled', f"⏹ {e}"))
+        except Exception as e:
+            self.messages.put(('error', f"❌ Ошибка: {str(e)}"))
+
+    def finish_simulation(self, body_name=None, body_params=None, trajectory=None,
+                          show_animation=False):
+        """Завершение расчёта в главном потоке: визуализация и разблокировка кнопок"""
+        self.worker = None
+        self.simulate_btn.config(state=tk.NORMAL, bg="#4CAF50")
+        self.cancel_btn.config(state=tk.DISABLED)
+        if trajectory is None:
+            return
+        times, positions = trajectory
 
-            # Визуализация
-            self.log_info("\n🎬 Создание визуализации...")
+        try:
+            # Визуализация (matplotlib работает только в главном потоке)
+            self.flush_log(["\n🎬 Создание визуализации..."])
 
             title = f"Падение на {body_name.capitalize()}"
 
+            from visualization_planet import PlanetVisualizer
             visualizer = PlanetVisualizer(body_params)
 
+            # Прореживание с геометрическим допуском (старт, удар и вход
+            # в атмосферу сохраняются)
+            trajectory, time = optimize_trajectory_for_animation(
+                positions, times,
+                body_radius=body_params['radius'],
+                atmosphere_height=body_params['atmosphere_height']
+            )
+
             if show_animation:
-                self.log_info("▶️  Запуск анимации...")
-                visualizer.create_animation(
-                    analysis['position'],
-                    analysis['time'],
-                    title
-                )
+                self.flush_log(["▶️  Запуск анимации..."])
+                visualizer.create_animation(trajectory, time, title)
             else:
-                self.log_info("📊 Построение траектории...")
-                visualizer.show_static_plot(analysis['position'], title)
+                self.flush_log(["📊 Построение траектории..."])
+                visualizer.show_static_plot(trajectory, title)
 
-            self.log_info("✅ Симуляция завершена успешно!")
+            self.flush_log(["✅ Симуляция завершена успешно!"])
 
         except Exception as e:
             error_msg = f"❌ Ошибка: {str(e)}"
-            self.log_info(error_msg)
+            self.flush_log([error_msg])
             messagebox.showerror("Ошибка", error_msg)
-        finally:
-            # Включаем кнопку обратно
-            self.simulate_btn.config(state=tk.NORMAL, bg="#4CAF50")
 
     def clear_all(self):
         """Очистка всех полей"""
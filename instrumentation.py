@@ -0,0 +1,209 @@
+import contextlib
+import json
+import time
+
+import numpy as np
+
+from integrators import INTEGRATORS
+
+
+# Члены правой части PlanetFall, время которых замеряется по отдельности
+FORCE_TERMS = ('gravity_at_height', 'drag_force', 'coriolis_force')
+
+# Границы корзин гистограммы шагов (с): по декаде от 1 мкс до 10⁴ с
+STEP_HISTOGRAM_EDGES = np.logspace(-6, 4, 11)
+
+
+def phase_steps(solution, phase):
+    """Длины принятых шагов участка phase по узлам решения"""
+    t = solution.t
+    start = np.searchsorted(t, phase['t_start'], side='left')
+    stop = np.searchsorted(t, phase['t_end'], side='right')
+    return np.diff(t[start:stop])
+
+
+def step_statistics(solution):
+    """
+    Число принятых и (оценочно) отклонённых шагов по участкам решения
+
+    Отклонённые шаги оцениваются по числу вычислений правой части:
+    каждая попытка шага явного метода стоит rhs_per_step вычислений,
+    ещё два уходят на выбор начального шага.
+
+    Returns:
+        Кортеж (accepted, rejected)
+    """
+    accepted = 0
+    rejected = 0
+    for phase in solution_phases(solution):
+        if phase['method'] == 'kepler':
+            continue
+        steps = len(phase_steps(solution, phase))
+        accepted += steps
+        rejected += _rejected_steps(phase, steps)
+    return accepted, rejected
+
+
+def solution_phases(solution):
+    """Участки решения (одиночный прогон solve_ivp считается одним участком)"""
+    phases = solution.get('phases')
+    if phases:
+        return phases
+    return [{'phase': 'atmosphere', 't_start': solution.t[0], 't_end': solution.t[-1],
+             'nfev': solution.nfev, 'method': solution.get('method', 'RK45')}]
+
+
+def _rejected_steps(phase, accepted):
+    """Оценка числа отклонённых шагов участка (0, если оценка невозможна)"""
+    info = INTEGRATORS[phase['method']]
+    rhs_per_step = info['rhs_per_step']
+    if info['kind'] != 'scipy' or not rhs_per_step:
+        return 0
+    return max(0, (phase['nfev'] - 2 - rhs_per_step * accepted) // rhs_per_step)
+
+
+class SolverInstrumentation:
+    """
+    Счётчики и таймеры расчёта падения (включаются явно)
+
+    Передаётся в PlanetFall.simulate_fall(instrumentation=...). Без него
+    правая часть и события не оборачиваются, и накладных расходов нет.
+    С ним собираются:
+    - число вызовов правой части и время в ней
+    - число вызовов и время каждого члена: gravity_at_height, drag_force,
+      coriolis_force (замер идёт по эталонной правой части equations_of_motion,
+      так как в быстрой члены встроены в одну функцию)
+    - число вычислений функций событий (удар, граница атмосферы)
+    - по участкам: принятые и отклонённые шаги, гистограмма длин шагов
+    """
+
+    def __init__(self, force_timings=True):
+        """
+        Args:
+            force_timings: замерять члены правой части по отдельности
+                           (расчёт идёт по эталонной правой части)
+        """
+        self.force_timings = force_timings
+        self.reset()
+
+    def reset(self):
+        """Сброс накопленных значений"""
+        self.runs = 0
+        self.wall_time = 0.0
+        self.rhs_calls = 0
+        self.rhs_time = 0.0
+        self.force_calls = dict.fromkeys(FORCE_TERMS, 0)
+        self.force_time = dict.fromkeys(FORCE_TERMS, 0.0)
+        self.event_calls = {}
+        self.phases = []
+
+    def wrap_rhs(self, rhs):
+        """Правая часть со счётчиком вызовов и таймером"""
+        def counted(t, state):
+            start = time.perf_counter()
+            result = rhs(t, state)
+            self.rhs_time += time.perf_counter() - start
+            self.rhs_calls += 1
+            return result
+
+        return counted
+
+    def wrap_event(self, event, name):
+        """Функция события со счётчиком (terminal и direction копируются)"""
+        def counted(t, state):
+            self.event_calls[name] = self.event_calls.get(name, 0) + 1
+            return event(t, state)
+
+        counted.terminal = getattr(event, 'terminal', False)
+        counted.direction = getattr(event, 'direction', 0)
+        return counted
+
+    def count_event(self, name, calls=1):
+        """Учёт вычислений события, выполненных без обёртки (потоковый расчёт)"""
+        self.event_calls[name] = self.event_calls.get(name, 0) + calls
+
+    def _timed_term(self, name, method):
+        def timed(*args):
+            start = time.perf_counter()
+            result = method(*args)
+            self.force_time[name] += time.perf_counter() - start
+            self.force_calls[name] += 1
+            return result
+
+        return timed
+
+    @contextlib.contextmanager
+    def instrument_forces(self, model):
+        """Замер членов правой части модели на время блока with"""
+        if not self.force_timings:
+            yield
+            return
+
+        # Обёртки ставятся атрибутами экземпляра и перекрывают методы класса
+        for name in FORCE_TERMS:
+            setattr(model, name, self._timed_term(name, getattr(model, name)))
+        try:
+            yield
+        finally:
+            for name in FORCE_TERMS:
+                delattr(model, name)
+
+    def record_solution(self, solution, wall_time):
+        """Учёт готового решения: шаги и их гистограммы по участкам"""
+        self.runs += 1
+        self.wall_time += wall_time
+        for phase in solution_phases(solution):
+            steps = phase_steps(solution, phase)
+            record = {
+                'phase': phase['phase'],
+                'method': phase['method'],
+                't_start': float(phase['t_start']),
+                't_end': float(phase['t_end']),
+                'nfev': int(phase['nfev']),
+                'wall_time': float(phase.get('wall_time', 0.0)),
+                'accepted_steps': 0,
+                'rejected_steps': 0,
+                'step_histogram': [0] * (len(STEP_HISTOGRAM_EDGES) - 1),
+            }
+            if phase['method'] != 'kepler' and len(steps):
+                record['accepted_steps'] = len(steps)
+                record['rejected_steps'] = int(_rejected_steps(phase, len(steps)))
+                record['step_min'] = float(steps.min())
+                record['step_median'] = float(np.median(steps))
+                record['step_max'] = float(steps.max())
+                counts, _ = np.histogram(np.clip(steps, STEP_HISTOGRAM_EDGES[0],
+                                                 STEP_HISTOGRAM_EDGES[-1]),
+                                         STEP_HISTOGRAM_EDGES)
+                record['step_histogram'] = counts.tolist()
+            self.phases.append(record)
+
+    def result(self):
+        """Собранная статистика (словарь, сериализуемый в JSON)"""
+        forces = {name: {'calls': self.force_calls[name], 'time': self.force_time[name]}
+                  for name in FORCE_TERMS if self.force_calls[name]}
+        return {
+            'runs': self.runs,
+            'wall_time': self.wall_time,
+            'rhs_calls': self.rhs_calls,
+            'rhs_time': self.rhs_time,
+            'forces': forces,
+            'event_calls': dict(self.event_calls),
+            'accepted_steps': sum(phase['accepted_steps'] for phase in self.phases),
+            'rejected_steps': sum(phase['rejected_steps'] for phase in self.phases),
+            'step_histogram_edges': STEP_HISTOGRAM_EDGES.tolist(),
+            'phases': list(self.phases),
+        }
+
+    def to_json(self, path=None, indent=2):
+        """
+        Экспорт статистики в JSON
+
+        Args:
+            path: файл для записи; без него возвращается строка
+        """
+        text = json.dumps(self.result(), indent=indent)
+        if path is None:
+            return text
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+        return path
@@ -0,0 +1,276 @@
+import math
+import time
+
+import numpy as np
+from scipy.integrate import BDF, DOP853, LSODA, RK23, RK45, Radau, solve_ivp
+from scipy.optimize import OptimizeResult, brentq
+
+
+def _hermite(t0, y0, f0, t1, y1, f1, t):
+    """Кубическая интерполяция Эрмита между двумя узлами"""
+    h = t1 - t0
+    s = (t - t0) / h
+    h00 = 2 * s ** 3 - 3 * s ** 2 + 1
+    h10 = s ** 3 - 2 * s ** 2 + s
+    h01 = -2 * s ** 3 + 3 * s ** 2
+    h11 = s ** 3 - s ** 2
+    return h00 * y0 + h10 * h * f0 + h01 * y1 + h11 * h * f1
+
+
+def _rk4_step(fun, t, y, h, out, cache):
+    """Классический шаг Рунге–Кутты 4-го порядка"""
+    k1 = np.asarray(fun(t, y))
+    k2 = np.asarray(fun(t + h / 2, y + h / 2 * k1))
+    k3 = np.asarray(fun(t + h / 2, y + h / 2 * k2))
+    k4 = np.asarray(fun(t + h, y + h * k3))
+    out[:] = y + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+class _Accelerations:
+    """
+    Ускорение a(t, r, v) из правой части вида [v, a] для симплектических схем.
+    Буфер состояния выделяется один раз.
+    """
+
+    def __init__(self, fun, dimension):
+        self.fun = fun
+        self.half = dimension // 2
+        self.buffer = np.empty(dimension)
+
+    def __call__(self, t, position, velocity):
+        self.buffer[:self.half] = position
+        self.buffer[self.half:] = velocity
+        return np.asarray(self.fun(t, self.buffer)[self.half:], dtype=float)
+
+
+def _verlet_step(fun, t, y, h, out, cache):
+    """
+    Шаг скоростного Верле (kick-drift-kick), одно вычисление правой части.
+    Для сил, зависящих от скорости, используется предсказанная скорость.
+    """
+    accelerations = cache['accelerations']
+    half = accelerations.half
+    position = y[:half]
+    velocity = y[half:]
+
+    acceleration = cache.get('acceleration')
+    if acceleration is None:
+        acceleration = accelerations(t, position, velocity)
+        cache['extra_nfev'] += 1
+
+    velocity_half = velocity + h / 2 * acceleration
+    new_position = position + h * velocity_half
+    new_acceleration = accelerations(t + h, new_position, velocity_half + h / 2 * acceleration)
+    out[:half] = new_position
+    out[half:] = velocity_half + h / 2 * new_acceleration
+    cache['acceleration'] = new_acceleration
+
+
+# Коэффициенты схемы Ёсиды 4-го порядка (композиция трёх шагов Верле)
+_YOSHIDA_W1 = 1 / (2 - 2 ** (1 / 3))
+_YOSHIDA_W0 = -2 ** (1 / 3) / (2 - 2 ** (1 / 3))
+_YOSHIDA_WEIGHTS = (_YOSHIDA_W1, _YOSHIDA_W0, _YOSHIDA_W1)
+
+
+def _yoshida4_step(fun, t, y, h, out, cache):
+    """
+    Шаг схемы Ёсиды 4-го порядка: три подшага Верле с весами w1, w0, w1.
+    Ускорение в конце подшага переиспользуется, поэтому на шаг приходится
+    три вычисления правой части
+    """
+    state = y.copy()
+    elapsed = 0.0
+    for weight in _YOSHIDA_WEIGHTS:
+        _verlet_step(fun, t + elapsed, state, weight * h, out, cache)
+        state[:] = out
+        elapsed += weight * h
+
+
+# Реестр интеграторов: методы SciPy и собственные схемы с постоянным шагом.
+# rhs_per_step — число вычислений правой части на шаг (для оценки стоимости),
+# implicit — неявный метод, принимающий аналитический якобиан (jac)
+INTEGRATORS = {
+    'RK45': {'kind': 'scipy', 'solver': RK45,
+             'order': 5, 'rhs_per_step': 6, 'symplectic': False, 'implicit': False},
+    'RK23': {'kind': 'scipy', 'solver': RK23,
+             'order': 3, 'rhs_per_step': 3, 'symplectic': False, 'implicit': False},
+    'DOP853': {'kind': 'scipy', 'solver': DOP853,
+               'order': 8, 'rhs_per_step': 12, 'symplectic': False, 'implicit': False},
+    'Radau': {'kind': 'scipy', 'solver': Radau,
+              'order': 5, 'rhs_per_step': None, 'symplectic': False, 'implicit': True},
+    'BDF': {'kind': 'scipy', 'solver': BDF,
+            'order': 5, 'rhs_per_step': None, 'symplectic': False, 'implicit': True},
+    'LSODA': {'kind': 'scipy', 'solver': LSODA,
+              'order': 12, 'rhs_per_step': None, 'symplectic': False, 'implicit': True},
+    'rk4': {'kind': 'fixed', 'order': 4, 'rhs_per_step': 4, 'symplectic': False,
+            'implicit': False, 'step': _rk4_step, 'second_order': False},
+    'verlet': {'kind': 'fixed', 'order': 2, 'rhs_per_step': 1, 'symplectic': True,
+               'implicit': False, 'step': _verlet_step, 'second_order': True},
+    'yoshida4': {'kind': 'fixed', 'order': 4, 'rhs_per_step': 3, 'symplectic': True,
+                 'implicit': False, 'step': _yoshida4_step, 'second_order': True},
+}
+
+
+def list_integrators():
+    """Список доступных интеграторов"""
+    return list(INTEGRATORS.keys())
+
+
+def describe_integrators():
+    """Таблица интеграторов: порядок, стоимость шага и симплектичность"""
+    lines = [f"{'Метод':<10} {'Тип':<6} {'Порядок':>7} {'Выз/шаг':>8} {'Симпл.':>7}"]
+    for name, info in INTEGRATORS.items():
+        rhs_per_step = info['rhs_per_step'] if info['rhs_per_step'] is not None else '-'
+        lines.append(f"{name:<10} {info['kind']:<6} {info['order']:>7} {rhs_per_step:>8} "
+                     f"{'да' if info['symplectic'] else 'нет':>7}")
+    return "\n".join(lines)
+
+
+def make_solver(fun, t0, y0, t_bound, method='RK45', rtol=1e-3, atol=1e-6,
+                max_step=np.inf, **options):
+    """
+    Пошаговый решатель SciPy (OdeSolver) для адаптивного метода из реестра
+
+    Используется там, где решение нужно получать по шагам, а не целиком
+    (потоковая выдача траектории). Параметр fixed_step политик игнорируется.
+    """
+    info = INTEGRATORS.get(method)
+    if info is None or info['kind'] != 'scipy':
+        raise ValueError(f"Пошаговый режим поддерживает только методы SciPy, а не {method}")
+    options.pop('fixed_step', None)
+    return info['solver'](fun, t0, y0, t_bound, rtol=rtol, atol=atol, max_step=max_step,
+                          **options)
+
+
+def _integrate_fixed(fun, t_span, y0, scheme, step, events):
+    """
+    Интегрирование схемой с постоянным шагом в заранее выделенные массивы
+
+    События обрабатываются как в solve_ivp: смена знака проверяется после
+    каждого шага, момент уточняется по интерполяции Эрмита.
+    """
+    t0, t1 = float(t_span[0]), float(t_span[1])
+    n_steps = max(1, int(math.ceil((t1 - t0) / step - 1e-9)))
+    dimension = len(y0)
+
+    t = np.empty(n_steps + 1)
+    y = np.empty((dimension, n_steps + 1))
+    t[0] = t0
+    y[:, 0] = y0
+
+    cache = {'extra_nfev': 0}
+    if scheme['second_order']:
+        cache['accelerations'] = _Accelerations(fun, dimension)
+
+    events = list(events or [])
+    t_events = [[] for _ in events]
+    y_events = [[] for _ in events]
+    event_values = [event(t0, y[:, 0]) for event in events]
+
+    status = 0
+    message = 'The solver successfully reached the end of the integration interval.'
+    stop = n_steps
+    nfev_events = 0
+
+    for i in range(n_steps):
+        # Узлы считаются от t0, чтобы не накапливать ошибку округления
+        t_next = t1 if i == n_steps - 1 else min(t0 + (i + 1) * step, t1)
+        h = t_next - t[i]
+        scheme['step'](fun, t[i], y[:, i], h, y[:, i + 1], cache)
+        t[i + 1] = t_next
+
+        terminated = False
+        for k, event in enumerate(events):
+            new_value = event(t[i + 1], y[:, i + 1])
+            old_value = event_values[k]
+            event_values[k] = new_value
+
+            direction = getattr(event, 'direction', 0)
+            crossed = (old_value < 0 <= new_value and direction >= 0) or \
+                      (old_value > 0 >= new_value and direction <= 0)
+            if not crossed:
+                continue
+
+            # Уточнение момента события по интерполяции Эрмита
+            f_old = np.asarray(fun(t[i], y[:, i]))
+            f_new = np.asarray(fun(t[i + 1], y[:, i + 1]))
+            nfev_events += 2
+
+            def value(time_point, k=k):
+                return events[k](time_point, _hermite(t[i], y[:, i], f_old,
+                                                      t[i + 1], y[:, i + 1], f_new, time_point))
+
+            if new_value == 0:
+                root = t[i + 1]
+            else:
+                root = brentq(value, t[i], t[i + 1], xtol=1e-12)
+            state = _hermite(t[i], y[:, i], f_old, t[i + 1], y[:, i + 1], f_new, root)
+            t_events[k].append(root)
+            y_events[k].append(state)
+
+            if getattr(event, 'terminal', False):
+                t[i + 1] = root
+                y[:, i + 1] = state
+                terminated = True
+                break
+
+        if terminated:
+            status = 1
+            message = 'A termination event occurred.'
+            stop = i + 1
+            break
+
+    nfev = stop * scheme['rhs_per_step'] + cache['extra_nfev'] + nfev_events
+
+    return OptimizeResult(
+        t=t[:stop + 1], y=y[:, :stop + 1], sol=None,
+        t_events=[np.array(times) for times in t_events],
+        y_events=[np.array(states).reshape(-1, dimension) for states in y_events],
+        nfev=nfev, njev=0, nlu=0,
+        status=status, message=message, success=True,
+    )
+
+
+def integrate(fun, t_span, y0, method='RK45', events=None, t_eval=None,
+              rtol=1e-3, atol=1e-6, max_step=np.inf, fixed_step=None, **options):
+    """
+    Единая точка вызова интеграторов из реестра INTEGRATORS
+
+    Args:
+        fun: правая часть fun(t, y)
+        t_span: интервал [t0, t1]
+        y0: начальное состояние
+        method: название метода из INTEGRATORS
+        events: функции событий (как у solve_ivp)
+        t_eval: моменты вывода результата
+        rtol, atol, max_step: параметры адаптивных методов SciPy
+        fixed_step: шаг для схем с постоянным шагом (с)
+
+    Returns:
+        Решение с полями как у solve_ivp, а также method, wall_time
+        и rhs_per_step для оценки стоимости
+    """
+    if method not in INTEGRATORS:
+        raise ValueError(f"Неизвестный интегратор: {method}. "
+                         f"Доступны: {', '.join(INTEGRATORS)}")
+    info = INTEGRATORS[method]
+    start = time.perf_counter()
+
+    if info['kind'] == 'scipy':
+        solution = solve_ivp(fun, t_span, y0, method=method, events=events, t_eval=t_eval,
+                             rtol=rtol, atol=atol, max_step=max_step, **options)
+    else:
+        if fixed_step is None:
+            raise ValueError(f"Для метода {method} нужен постоянный шаг fixed_step")
+        y0 = np.asarray(y0, dtype=float)
+        solution = _integrate_fixed(fun, t_span, y0, info, fixed_step, events)
+        if t_eval is not None:
+            t_eval = np.asarray(t_eval, dtype=float)
+            t_eval = t_eval[t_eval <= solution.t[-1]]
+            solution.y = np.array([np.interp(t_eval, solution.t, row) for row in solution.y])
+            solution.t = t_eval
+
+    solution.method = method
+    solution.wall_time = time.perf_counter() - start
+    solution.rhs_per_step = info['rhs_per_step']
+    return solution
@@ -0,0 +1,191 @@
+import math
+
+import numpy as np
+
+
+def stumpff_c(z):
+    """Функция Штумпфа C(z) (векторная)"""
+    z = np.asarray(z, dtype=float)
+    result = np.empty_like(z)
+    small = np.abs(z) < 1e-6
+    positive = (z > 0) & ~small
+    negative = (z < 0) & ~small
+
+    sqrt_z = np.sqrt(z[positive])
+    result[positive] = (1 - np.cos(sqrt_z)) / z[positive]
+    sqrt_minus_z = np.sqrt(-z[negative])
+    result[negative] = (np.cosh(sqrt_minus_z) - 1) / -z[negative]
+    result[small] = 1 / 2 - z[small] / 24 + z[small] ** 2 / 720
+    return result
+
+
+def stumpff_s(z):
+    """Функция Штумпфа S(z) (векторная)"""
+    z = np.asarray(z, dtype=float)
+    result = np.empty_like(z)
+    small = np.abs(z) < 1e-6
+    positive = (z > 0) & ~small
+    negative = (z < 0) & ~small
+
+    sqrt_z = np.sqrt(z[positive])
+    result[positive] = (sqrt_z - np.sin(sqrt_z)) / sqrt_z ** 3
+    sqrt_minus_z = np.sqrt(-z[negative])
+    result[negative] = (np.sinh(sqrt_minus_z) - sqrt_minus_z) / sqrt_minus_z ** 3
+    result[small] = 1 / 6 - z[small] / 120 + z[small] ** 2 / 5040
+    return result
+
+
+def orbit_period(r0, v0, mu):
+    """Период орбиты (с) или inf для незамкнутой траектории"""
+    alpha = 2 / np.linalg.norm(r0) - np.dot(v0, v0) / mu
+    if alpha <= 0:
+        return math.inf
+    return 2 * math.pi * math.sqrt(1 / (mu * alpha ** 3))
+
+
+def propagate(r0, v0, dt, mu, tolerance=1e-12, max_iterations=60):
+    """
+    Аналитическое решение задачи двух тел в универсальных переменных
+
+    Args:
+        r0: начальное положение [x, y, z] (м)
+        v0: начальная скорость [vx, vy, vz] (м/с)
+        dt: время (с) — число или массив моментов
+        mu: гравитационный параметр G*M (м³/с²)
+
+    Returns:
+        Массивы положений и скоростей формы (n, 3)
+    """
+    r0 = np.asarray(r0, dtype=float)
+    v0 = np.asarray(v0, dtype=float)
+    dt = np.atleast_1d(np.asarray(dt, dtype=float))
+
+    r0_norm = np.linalg.norm(r0)
+    radial = np.dot(r0, v0)
+    sqrt_mu = math.sqrt(mu)
+    alpha = 2 / r0_norm - np.dot(v0, v0) / mu
+
+    # Для эллипса достаточно решить уравнение внутри одного периода
+    if alpha > 0:
+        period = 2 * math.pi / math.sqrt(mu * alpha ** 3)
+        reduced_dt = np.fmod(dt, period)
+    else:
+        reduced_dt = dt
+
+    # Начальное приближение универсальной аномалии (Vallado)
+    if alpha > 1e-12 / r0_norm:
+        chi = sqrt_mu * reduced_dt * alpha
+    elif alpha < -1e-12 / r0_norm:
+        a = 1 / alpha
+        sign = np.sign(reduced_dt)
+        # При dt = 0 и r·v = 0 получается 0/0; такие моменты заменяются ниже
+        with np.errstate(invalid='ignore', divide='ignore'):
+            argument = (-2 * mu * alpha * reduced_dt) / (
+                radial + sign * math.sqrt(-mu * a) * (1 - r0_norm * alpha))
+            chi = sign * math.sqrt(-a) * np.log(np.maximum(argument, 1e-300))
+        chi = np.where(reduced_dt == 0, 0.0, chi)
+    else:
+        chi = sqrt_mu * reduced_dt / r0_norm
+
+    # Метод Ньютона для уравнения Кеплера в универсальных переменных
+    for _ in range(max_iterations):
+        z = alpha * chi ** 2
+        c = stumpff_c(z)
+        s = stumpff_s(z)
+        function = (radial / sqrt_mu * chi ** 2 * c + (1 - alpha * r0_norm) * chi ** 3 * s
+                    + r0_norm * chi - sqrt_mu * reduced_dt)
+        derivative = (radial / sqrt_mu * chi * (1 - z * s) + (1 - alpha * r0_norm) * chi ** 2 * c
+                      + r0_norm)
+        correction = function / derivative
+        chi = chi - correction
+        if np.all(np.abs(correction) <= tolerance * np.maximum(1.0, np.abs(chi))):
+            break
+
+    # Коэффициенты Лагранжа
+    z = alpha * chi ** 2
+    c = stumpff_c(z)
+    s = stumpff_s(z)
+    f = 1 - chi ** 2 / r0_norm * c
+    g = reduced_dt - chi ** 3 / sqrt_mu * s
+
+    positions = f[:, None] * r0 + g[:, None] * v0
+    r = np.linalg.norm(positions, axis=1)
+
+    f_dot = sqrt_mu / (r * r0_norm) * (z * s - 1) * chi
+    g_dot = 1 - chi ** 2 / r * c
+    velocities = f_dot[:, None] * r0 + g_dot[:, None] * v0
+
+    return positions, velocities
+
+
+def time_to_radius(r0, v0, mu, target_radius):
+    """
+    Время до первого пересечения сферы target_radius при движении внутрь
+
+    Args:
+        r0: начальное положение (м), |r0| >= target_radius
+        v0: начальная скорость (м/с)
+        mu: гравитационный параметр G*M (м³/с²)
+        target_radius: радиус сферы (м)
+
+    Returns:
+        Время (с) или inf, если траектория сферу не пересекает
+    """
+    r0 = np.asarray(r0, dtype=float)
+    v0 = np.asarray(v0, dtype=float)
+    r0_norm = float(np.linalg.norm(r0))
+    radial = float(np.dot(r0, v0))
+
+    if r0_norm < target_radius or (r0_norm == target_radius and radial < 0):
+        return 0.0 if radial <= 0 else math.inf
+
+    alpha = 2 / r0_norm - float(np.dot(v0, v0)) / mu
+
+    if abs(alpha) * r0_norm < 1e-10:
+        # Параболическая траектория: r = (p + D²) / 2, r·v = √mu · D
+        sqrt_mu = math.sqrt(mu)
+        d0 = radial / sqrt_mu
+        p = 2 * r0_norm - d0 ** 2
+        if p > 2 * target_radius or d0 >= 0:
+            return math.inf
+        d_target = -math.sqrt(2 * target_radius - p)
+        return (p * (d_target - d0) + (d_target ** 3 - d0 ** 3) / 3) / (2 * sqrt_mu)
+
+    if alpha > 0:
+        # Эллипс: r = a(1 - e cos E), r·v = √(mu a) · e sin E
+        a = 1 / alpha
+        e_cos = 1 - r0_norm / a
+        e_sin = radial / math.sqrt(mu * a)
+        e = math.hypot(e_cos, e_sin)
+        if e == 0:
+            return math.inf
+        cos_target = (1 - target_radius / a) / e
+        if cos_target > 1:
+            return math.inf
+        anomaly0 = math.atan2(e_sin, e_cos)
+        # Входящая ветвь: sin E < 0
+        anomaly_target = -math.acos(max(-1.0, cos_target))
+        while anomaly_target < anomaly0:
+            anomaly_target += 2 * math.pi
+        if anomaly_target == anomaly0 and e_cos > 0:
+            # Старт в перицентре на самой сфере: следующее касание через виток
+            anomaly_target += 2 * math.pi
+        mean_motion = math.sqrt(mu / a ** 3)
+        return ((anomaly_target - e * math.sin(anomaly_target))
+                - (anomaly0 - e_sin)) / mean_motion
+
+    # Гипербола: r = |a|(e ch F - 1), r·v = √(mu |a|) · e sh F
+    a = -1 / alpha
+    e_cosh = 1 + r0_norm / a
+    e_sinh = radial / math.sqrt(mu * a)
+    e = math.sqrt(e_cosh ** 2 - e_sinh ** 2)
+    anomaly0 = math.atanh(e_sinh / e_cosh)
+    cosh_target = (1 + target_radius / a) / e
+    if cosh_target < 1:
+        return math.inf
+    anomaly_target = -math.acosh(cosh_target)
+    if anomaly_target < anomaly0:
+        return math.inf
+    mean_motion = math.sqrt(mu / a ** 3)
+    return ((e * math.sinh(anomaly_target) - anomaly_target)
+            - (e_sinh - anomaly0)) / mean_motion
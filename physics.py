@@ -1,5 +1,6 @@
 import numpy as np
-from scipy.integrate import solve_ivp
+
+from integrators import integrate
 
 
 class BodyFlight:
@@ -73,7 +74,8 @@ class BodyFlight:
 
         return [vx, vy, vz, acceleration[0], acceleration[1], acceleration[2]]
 
-    def simulate(self, initial_position, initial_velocity, t_span, t_eval=None):
+    def simulate(self, initial_position, initial_velocity, t_span, t_eval=None,
+                 method='RK45', step=0.01):
         """
         Моделирование полёта тела
 
@@ -82,20 +84,23 @@ class BodyFlight:
             initial_velocity: начальная скорость [vx, vy, vz] (м/с)
             t_span: интервал времени [t_start, t_end] (с)
             t_eval: массив времён для вывода результатов
+            method: интегратор из integrators.INTEGRATORS
+            step: шаг для схем с постоянным шагом (с)
 
         Returns:
-            Результат решения solve_ivp
+            Результат решения с полями как у solve_ivp
         """
         initial_state = np.concatenate([initial_position, initial_velocity])
 
-        solution = solve_ivp(
+        solution = integrate(
             self.equations_of_motion,
             t_span,
             initial_state,
             t_eval=t_eval,
-            method='RK45',
+            method=method,
             rtol=1e-6,
-            atol=1e-9
+            atol=1e-9,
+            fixed_step=step
         )
 
         return solution
\ No newline at end of file
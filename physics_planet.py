@@ -1,5 +1,226 @@
+import hashlib
+import math
+import time
+
 import numpy as np
-from scipy.integrate import solve_ivp
+from scipy.integrate import OdeSolution
+from scipy.optimize import OptimizeResult, brentq
+
+import kepler
+from integrators import INTEGRATORS, integrate, make_solver
+from flight_analytics import FlightAnalytics
+from sim_cache import canonical_key
+from trajectory import DenseTrajectory, HermiteInterpolant, KeplerArc
+
+
+# Политики шага для участков полёта. Вне атмосферы движение гладкое
+# (кеплеровское) и не требует ограничения шага, в атмосфере шаг ограничен.
+# fixed_step — шаг для схем с постоянным шагом (см. integrators.py)
+PHASE_POLICIES = {
+    'vacuum': {'rtol': 1e-8, 'atol': 1e-10, 'max_step': np.inf, 'fixed_step': 10.0},
+    'atmosphere': {'rtol': 1e-8, 'atol': 1e-10, 'max_step': 10, 'fixed_step': 1.0},
+}
+
+# Грубые политики для быстрого предварительного расчёта (предпросмотр в GUI).
+# Используются с методом PREVIEW_METHOD: LSODA сам переходит на неявную схему
+# в плотной атмосфере, где явный метод упирается в устойчивость
+PREVIEW_POLICIES = {
+    'vacuum': {'rtol': 1e-5, 'atol': 1e-2, 'max_step': np.inf, 'fixed_step': 30.0},
+    'atmosphere': {'rtol': 1e-3, 'atol': 1e-2, 'max_step': 10, 'fixed_step': 5.0,
+                   'first_step': 0.01},
+}
+PREVIEW_METHOD = 'LSODA'
+
+# Нижняя граница относительного допуска предпросмотра
+PREVIEW_MIN_RTOL = 1e-10
+
+# Число точек траектории на аналитическом (кеплеровском) участке
+KEPLER_SAMPLES_PER_ORBIT = 180
+KEPLER_MIN_SAMPLES = 50
+KEPLER_MAX_SAMPLES = 5000
+
+# Относительная толщина границы атмосферы: точка ближе к ней считается лежащей
+# на границе, и участок выбирается по направлению движения
+INTERFACE_TOLERANCE = 1e-12
+
+# Переключение на неявный метод в плотной атмосфере. Жёсткость оценивается
+# произведением скорости затухания от сопротивления 2kρ|v| (наибольшее
+# собственное число ∂a/∂v) на шаг участка. Порог 1 (время торможения равно
+# шагу участка) подобран по сценариям benchmarks.py для тел с атмосферой:
+# компилированный LSODA (Адамс/ФДН) в среднем вдвое сокращает число вызовов
+# и в 1.7 раза время против RK45 (Венера, падение со 100 км: 623 вызова
+# вместо 11390); при пороге 3 часть сценариев оставалась на RK45
+STIFFNESS_THRESHOLD = 1.0
+
+# Обратный переход на явный метод — ниже доли порога (гистерезис)
+STIFFNESS_HYSTERESIS = 0.5
+
+# Шаг для оценки жёсткости, если политика участка не ограничивает шаг (с)
+STIFFNESS_REFERENCE_STEP = 10.0
+
+# Неявный метод для жёстких участков по умолчанию (с аналитическим якобианом)
+STIFF_METHOD = 'LSODA'
+
+# Размер блока при потоковом расчёте с отчётом о ходе (точек траектории)
+STREAM_CHUNK_SIZE = 64
+
+# Размер блока при сборе итогов по готовому решению (точек траектории)
+ANALYTICS_CHUNK_SIZE = 4096
+
+# Период отчёта о ходе расчёта без потоковой выдачи (вызовов правой части)
+PROGRESS_INTERVAL = 256
+
+# Число списков событий в решении: удар о поверхность и пересечения границы
+# атмосферы (второй список есть и у тел без атмосферы)
+SOLUTION_EVENTS = 2
+
+
+def preview_policies(initial_altitude, radius):
+    """
+    Политики предпросмотра для падения с заданной высоты
+
+    Допуск rtol в PREVIEW_POLICIES относится к высоте падения, а не к радиусу
+    тела: координаты имеют порядок радиуса, и при коротком падении ошибка
+    rtol * R превышала бы саму высоту. Поэтому rtol уменьшается в отношении
+    высоты к радиусу (не ниже PREVIEW_MIN_RTOL).
+    """
+    scale = min(1.0, max(initial_altitude, 1.0) / radius)
+    policies = {}
+    for phase, policy in PREVIEW_POLICIES.items():
+        policies[phase] = dict(policy, rtol=max(policy['rtol'] * scale, PREVIEW_MIN_RTOL))
+    return policies
+
+
+def stiffness_reference_step(policy):
+    """Шаг, с которым сравнивается время торможения (см. PlanetFall.stiffness_ratio)"""
+    max_step = policy.get('max_step', np.inf)
+    return max_step if np.isfinite(max_step) else STIFFNESS_REFERENCE_STEP
+
+
+class SimulationCancelled(Exception):
+    """Симуляция прервана по запросу пользователя"""
+
+
+def monitored_rhs(rhs, progress, cancel):
+    """
+    Правая часть с опросом отмены и отчётом о ходе расчёта
+
+    Используется там, где потоковая выдача по шагам недоступна (схемы
+    с постоянным шагом, расчёт без разбиения на участки): отмена проверяется
+    при каждом вызове, progress(t, state) вызывается раз в PROGRESS_INTERVAL
+    вызовов с аргументами текущего вызова (промежуточная стадия шага)
+    """
+    calls = 0
+
+    def wrapped(t, state):
+        nonlocal calls
+        if cancel is not None and cancel.is_set():
+            raise SimulationCancelled(f"Симуляция прервана на t = {t:.1f} с")
+        calls += 1
+        if progress is not None and calls % PROGRESS_INTERVAL == 0:
+            progress(t, state)
+        return rhs(t, state)
+
+    return wrapped
+
+
+def stitch_segments(segments, phases):
+    """
+    Склейка решений отдельных участков в одно решение
+
+    Args:
+        segments: решения участков в порядке времени (как у solve_ivp)
+        phases: описание участков (список словарей)
+
+    Returns:
+        OptimizeResult с полями как у solve_ivp и списком участков phases.
+        Списков событий не меньше SOLUTION_EVENTS. Если у всех участков
+        есть плотная выдача, sol — DenseTrajectory
+    """
+    # Начальная точка каждого следующего участка совпадает с конечной предыдущего
+    t = np.concatenate([segments[0].t] + [segment.t[1:] for segment in segments[1:]])
+    y = np.concatenate([segments[0].y] + [segment.y[:, 1:] for segment in segments[1:]], axis=1)
+
+    n_events = max([SOLUTION_EVENTS] + [len(segment.t_events) for segment in segments])
+    t_events = []
+    y_events = []
+    for i in range(n_events):
+        times = [np.empty(0)] + [segment.t_events[i] for segment in segments
+                                 if i < len(segment.t_events)]
+        states = [np.empty((0, y.shape[0]))] + [np.reshape(segment.y_events[i], (-1, y.shape[0]))
+                                                for segment in segments
+                                                if i < len(segment.y_events)]
+        t_events.append(np.concatenate(times))
+        y_events.append(np.concatenate(states))
+
+    sol = None
+    if all(segment.get('sol') is not None for segment in segments):
+        sol = DenseTrajectory([segment.sol for segment in segments])
+
+    last = segments[-1]
+    return OptimizeResult(
+        t=t, y=y, sol=sol,
+        t_events=t_events, y_events=y_events,
+        nfev=sum(segment.nfev for segment in segments),
+        njev=sum(segment.njev for segment in segments),
+        nlu=sum(segment.nlu for segment in segments),
+        status=last.status, message=last.message,
+        success=all(segment.success for segment in segments),
+        phases=phases,
+    )
+
+
+def _observe_stream(stream, analytics):
+    """Передача блоков потока в сборщик итогов (FlightAnalytics) перед выдачей"""
+    while True:
+        try:
+            t, y = next(stream)
+        except StopIteration as stop:
+            return stop.value
+        analytics.update(t, y)
+        yield t, y
+
+
+class _ChunkBuffer:
+    """Накопитель точек траектории, отдающий блоки фиксированного размера"""
+
+    def __init__(self, chunk_size, dimension=6):
+        self.chunk_size = chunk_size
+        self.t = np.empty(chunk_size)
+        self.y = np.empty((dimension, chunk_size))
+        self.count = 0
+
+    def append(self, t, state):
+        """Добавление точки; возвращает заполненный блок (t, y) или None"""
+        self.t[self.count] = t
+        self.y[:, self.count] = state
+        self.count += 1
+        if self.count < self.chunk_size:
+            return None
+        return self.flush()
+
+    def flush(self):
+        """Выдача накопленных точек (копия) и очистка буфера"""
+        chunk = self.t[:self.count].copy(), self.y[:, :self.count].copy()
+        self.count = 0
+        return chunk
+
+
+def _model_parameter(name):
+    """
+    Параметр модели, от которого зависят постоянные быстрой правой части:
+    при записи постоянные пересчитываются (см. PlanetFall.precompute_constants)
+    """
+    attribute = '_' + name
+
+    def getter(self):
+        return getattr(self, attribute)
+
+    def setter(self, value):
+        setattr(self, attribute, value)
+        self.precompute_constants()
+
+    return property(getter, setter)
 
 
 class PlanetFall:
@@ -11,8 +232,17 @@ class PlanetFall:
     - Вращения планеты (опционально)
     """
 
+    drag_coef = _model_parameter('drag_coef')
+    cross_area = _model_parameter('cross_area')
+    mass = _model_parameter('mass')
+    enable_coriolis = _model_parameter('enable_coriolis')
+    planet_rotation_rate = _model_parameter('planet_rotation_rate')
+    gravity_degree = _model_parameter('gravity_degree')
+    gravity_order = _model_parameter('gravity_order')
+
     def __init__(self, body_name='earth', drag_coef=0.47, cross_area=1.0, mass=1000,
-                 enable_coriolis=False, planet_rotation_rate=7.2921159e-5):
+                 enable_coriolis=False, planet_rotation_rate=7.2921159e-5, verbose=True,
+                 gravity_degree=0, gravity_order=None):
         """
         Инициализация параметров
 
@@ -23,51 +253,98 @@ class PlanetFall:
             mass: масса тела (кг)
             enable_coriolis: учитывать силу Кориолиса
             planet_rotation_rate: угловая скорость вращения планеты (рад/с)
+            verbose: печатать информацию о модели и запуске
+            gravity_degree: степень разложения поля тяготения по сферическим
+                            функциям (0 — точечная масса; коэффициенты тела
+                            из CelestialBody, см. gravity_field.py)
+            gravity_order: наибольший порядок (None — до степени, 0 — только
+                           зональные члены J2, J3, ...)
         """
         from celestial_bodies import CelestialBody
 
+        self.body_name = body_name
         self.body_params = CelestialBody.get_body_params(body_name)
-        self.drag_coef = drag_coef
-        self.cross_area = cross_area
-        self.mass = mass
-        self.enable_coriolis = enable_coriolis
-        self.planet_rotation_rate = planet_rotation_rate
+        self.atmosphere = CelestialBody.get_atmosphere(body_name)
+        # Параметры записываются в обход свойств: постоянные рассчитываются
+        # один раз в конце инициализации
+        self._gravity_degree = gravity_degree
+        self._gravity_order = gravity_order
+        self._drag_coef = drag_coef
+        self._cross_area = cross_area
+        self._mass = mass
+        self._enable_coriolis = enable_coriolis
+        self._planet_rotation_rate = planet_rotation_rate
+        self.verbose = verbose
 
         # Гравитационная постоянная
         self.G = 6.67430e-11
 
-        print(f"Инициализирована модель для: {body_name}")
-        print(f"Радиус: {self.body_params['radius'] / 1000:.0f} км")
-        print(f"Поверхностная гравитация: {self.body_params['surface_gravity']:.2f} м/с²")
+        if self.verbose:
+            print(f"Инициализирована модель для: {body_name}")
+            print(f"Радиус: {self.body_params['radius'] / 1000:.0f} км")
+            print(f"Поверхностная гравитация: {self.body_params['surface_gravity']:.2f} м/с²")
 
-    def atmospheric_density(self, height):
+        self.precompute_constants()
+
+    def precompute_constants(self):
         """
-        Модель плотности атмосферы в зависимости от высоты
+        Предварительный расчёт постоянных для быстрой правой части.
+        Вызывается автоматически при изменении параметров модели; вручную —
+        после изменения body_params, atmosphere или G.
         """
-        if height > self.body_params['atmosphere_height']:
-            return 0.0
+        from celestial_bodies import CelestialBody
 
-        # Плотность на поверхности зависит от планеты
-        if self.body_params['color'] == 'earth':
-            surface_density = 1.225
-        elif self.body_params['color'] == 'venus':
-            surface_density = 65.0  # Очень плотная атмосфера
-        elif self.body_params['color'] == 'mars':
-            surface_density = 0.020
-        else:
-            surface_density = 0.0
+        self._mu = self.G * self.body_params['mass']
+        self._radius = self.body_params['radius']
+        # Граница атмосферы — верх таблицы плотности, если она есть
+        self._atmosphere_top = (self.atmosphere.top if self.atmosphere is not None
+                                else self.body_params['atmosphere_height'])
+
+        # Несферичность тела (None — точечная масса): коэффициенты рекурсий
+        # рассчитываются один раз на тело и степень
+        self.gravity_field = None
+        if self.gravity_degree >= 2:
+            self.gravity_field = CelestialBody.get_gravity_field(
+                self.body_name, self._mu, self.gravity_degree, self.gravity_order)
+
+        # a_drag = -0.5 * ρ * |v| * v * Cd * A / m
+        self._drag_constant = 0.5 * self.drag_coef * self.cross_area / self.mass
+        self._has_drag = self.atmosphere is not None and self._drag_constant != 0
+        if self._has_drag:
+            self._density = self.atmosphere.density
 
-        # Масштаб высоты
-        scale_height = self.body_params['atmosphere_height'] / 8
+        # a_coriolis = -2 * (ω × v) = [2ω·vy, -2ω·vx, 0]
+        self._two_omega = 2 * self.planet_rotation_rate if self.enable_coriolis else 0.0
 
-        return surface_density * np.exp(-height / scale_height)
+        # Тессеральные члены заданы в системе тела: без силы Кориолиса расчёт
+        # идёт в инерциальной системе, где тело повёрнуто на угол ω·t
+        # (системы совпадают при t = 0); с ней система уже вращается с телом
+        self._field_rotation_rate = 0.0
+        if (self.gravity_field is not None and not self.gravity_field.zonal_only
+                and not self.enable_coriolis):
+            self._field_rotation_rate = self.planet_rotation_rate
 
-    def gravity_at_height(self, position):
+        # Вакуумный участок решается аналитически только в поле точечной массы
+        # без силы Кориолиса
+        self._keplerian = self.gravity_field is None and not self._two_omega
+
+    def atmospheric_density(self, height):
+        """
+        Модель плотности атмосферы в зависимости от высоты.
+        Значение читается из предрассчитанной таблицы тела (см. atmosphere.py)
+        """
+        if self.atmosphere is None:
+            return 0.0
+
+        return self.atmosphere.density(height)
+
+    def gravity_at_height(self, position, t=0.0):
         """
         Вычисление гравитации на заданной высоте
 
         Args:
             position: вектор положения [x, y, z] в метрах
+            t: время (с) — задаёт поворот тела для тессеральных членов
 
         Returns:
             Вектор ускорения свободного падения [gx, gy, gz]
@@ -76,33 +353,16 @@ class PlanetFall:
         if r == 0:
             return np.zeros(3)
 
+        if self.gravity_field is not None:
+            return np.array(self.gravity_field.acceleration(
+                *position, self._field_rotation_rate * t))
+
         # Закон всемирного тяготения: g = -G * M / r² * (r_vector / r)
         g_magnitude = self.G * self.body_params['mass'] / r ** 2
         g_direction = -position / r
 
         return g_magnitude * g_direction
 
-    def atmospheric_density(self, height):
-        """
-        Модель плотности атмосферы в зависимости от высоты
-        Упрощённая экспоненциальная модель
-        """
-        if height > self.body_params['atmosphere_height']:
-            return 0.0
-
-        # Плотность на поверхности (кг/м³)
-        if self.body_params['color'] == 'earth':
-            surface_density = 1.225
-        elif self.body_params['color'] == 'mars':
-            surface_density = 0.020
-        else:
-            surface_density = 0.0
-
-        # Масштаб высоты (м)
-        scale_height = self.body_params['atmosphere_height'] / 8
-
-        return surface_density * np.exp(-height / scale_height)
-
     def drag_force(self, position, velocity):
         """
         Сила аэродинамического сопротивления
@@ -155,7 +415,7 @@ class PlanetFall:
         velocity = np.array([vx, vy, vz])
 
         # Гравитация
-        gravity_acceleration = self.gravity_at_height(position)
+        gravity_acceleration = self.gravity_at_height(position, t)
 
         # Сопротивление атмосферы
         drag_acceleration = self.drag_force(position, velocity) / self.mass
@@ -171,55 +431,985 @@ class PlanetFall:
                 total_acceleration[1],
                 total_acceleration[2]]
 
+    def acceleration_fast(self, x, y, z, vx, vy, vz, t=0.0):
+        """
+        Суммарное ускорение на скалярах, без временных массивов
+        (t — время, как в gravity_at_height)
+
+        Returns:
+            Кортеж (ax, ay, az)
+        """
+        r = math.sqrt(x * x + y * y + z * z)
+        if r == 0:
+            ax = ay = az = 0.0
+        elif self.gravity_field is not None:
+            ax, ay, az = self.gravity_field.acceleration(x, y, z, self._field_rotation_rate * t)
+        else:
+            # Гравитация
+            g_magnitude = self._mu / (r * r)
+            ax = g_magnitude * (-x / r)
+            ay = g_magnitude * (-y / r)
+            az = g_magnitude * (-z / r)
+
+        # Сопротивление атмосферы
+        if self._has_drag:
+            height = r - self._radius
+            if 0 <= height <= self._atmosphere_top:
+                density = self._density(height)
+                v = math.sqrt(vx * vx + vy * vy + vz * vz)
+                k = self._drag_constant * density * v
+                ax -= k * vx
+                ay -= k * vy
+                az -= k * vz
+
+        # Сила Кориолиса
+        if self._two_omega:
+            ax += self._two_omega * vy
+            ay -= self._two_omega * vx
+
+        return ax, ay, az
+
+    def acceleration_partials(self, state, t=0.0):
+        """
+        Аналитические частные производные ускорения той же модели, что
+        в acceleration_fast (для уравнений в вариациях и якобиана)
+
+        Args:
+            state: [x, y, z, vx, vy, vz]
+            t: время (с), как в gravity_at_height
+
+        Returns:
+            Кортеж (∂a/∂r формы (3, 3), ∂a/∂v формы (3, 3), ∂a/∂k формы (3,)),
+            где k = 0.5 * Cd * A / m — постоянная сопротивления
+        """
+        position = np.asarray(state[0:3], dtype=float)
+        velocity = np.asarray(state[3:6], dtype=float)
+        r = math.sqrt(position @ position)
+
+        da_dr = np.zeros((3, 3))
+        da_dv = np.zeros((3, 3))
+        da_dk = np.zeros(3)
+        if r == 0:
+            return da_dr, da_dv, da_dk
+
+        # Гравитация: a = -mu r / |r|³ (или поле с несферичностью)
+        unit = position / r
+        if self.gravity_field is not None:
+            da_dr += self.gravity_field.gradient(position, self._field_rotation_rate * t)
+        else:
+            da_dr -= self._mu / r ** 3 * (np.eye(3) - 3 * np.outer(unit, unit))
+
+        # Сопротивление: a = -k ρ(h) |v| v, h = |r| - R
+        if self._has_drag:
+            height = r - self._radius
+            speed = math.sqrt(velocity @ velocity)
+            if 0 <= height <= self._atmosphere_top and speed > 0:
+                density, gradient = self.atmosphere.density_gradient(height)
+                k = self._drag_constant
+                da_dr -= k * speed * gradient * np.outer(velocity, unit)
+                da_dv -= k * density * (speed * np.eye(3) + np.outer(velocity, velocity) / speed)
+                da_dk = -density * speed * velocity
+
+        # Сила Кориолиса: ax += 2ω·vy, ay -= 2ω·vx
+        if self._two_omega:
+            da_dv[0, 1] += self._two_omega
+            da_dv[1, 0] -= self._two_omega
+
+        return da_dr, da_dv, da_dk
+
+    def jacobian(self, t, state):
+        """
+        Якобиан правой части ∂f/∂y формы (6, 6):
+        [[0, I], [∂a/∂r, ∂a/∂v]]
+        """
+        da_dr, da_dv, _ = self.acceleration_partials(state, t)
+        matrix = np.zeros((6, 6))
+        matrix[0:3, 3:6] = np.eye(3)
+        matrix[3:6, 0:3] = da_dr
+        matrix[3:6, 3:6] = da_dv
+        return matrix
+
+    def jacobian_sparsity(self):
+        """
+        Структура ненулевых элементов jacobian (для jac_sparsity решателей
+        SciPy при разностном якобиане): без сопротивления ∂a/∂v содержит
+        только члены Кориолиса
+        """
+        pattern = np.zeros((6, 6), dtype=bool)
+        pattern[0:3, 3:6] = np.eye(3, dtype=bool)
+        pattern[3:6, 0:3] = True
+        if self._has_drag:
+            pattern[3:6, 3:6] = True
+        elif self._two_omega:
+            pattern[3, 4] = pattern[4, 3] = True
+        return pattern
+
+    def solver_options(self, method):
+        """Дополнительные параметры решателя: аналитический якобиан для неявных методов"""
+        if INTEGRATORS[method]['implicit']:
+            return {'jac': self.jacobian}
+        return {}
+
+    def drag_rate(self, state):
+        """
+        Скорость затухания от сопротивления 2kρ|v| (1/с) — модуль наибольшего
+        собственного числа ∂a_drag/∂v; обратная величина — время торможения
+        """
+        if not self._has_drag:
+            return 0.0
+        x, y, z, vx, vy, vz = state[0:6].tolist()
+        height = math.sqrt(x * x + y * y + z * z) - self._radius
+        if not 0 <= height <= self._atmosphere_top:
+            return 0.0
+        speed = math.sqrt(vx * vx + vy * vy + vz * vz)
+        return 2 * self._drag_constant * self._density(height) * speed
+
+    def stiffness_ratio(self, state, step):
+        """Показатель жёсткости: отношение шага step к времени торможения"""
+        return self.drag_rate(state) * step
+
+    def stiffness_bound(self, state, step):
+        """
+        Верхняя оценка stiffness_ratio на оставшейся части полёта
+
+        Быстрее местной предельной скорости v_t = √(g / kρ) тело только
+        тормозится, поэтому 2kρ|v| не превышает 2kρ₀|v| (ρ₀ — плотность
+        у поверхности) при текущей скорости выше предельной и 2√(g₀kρ₀)
+        при скорости не выше неё (g₀ — ускорение на поверхности). Второй
+        член взят с двойным запасом: при спуске скорость отстаёт от убывающей
+        предельной и ненамного её превышает
+        """
+        if not self._has_drag:
+            return 0.0
+        speed = math.sqrt(sum(component * component for component in state[3:6].tolist()))
+        rate = 2 * self._drag_constant * self.atmosphere.surface_density * speed
+        return max(rate * step, self.descent_stiffness(step))
+
+    def descent_stiffness(self, step):
+        """
+        Второй член stiffness_bound: оценка stiffness_ratio при установившемся
+        спуске у поверхности, 4√(g₀kρ₀)·step (от скорости не зависит)
+        """
+        if not self._has_drag:
+            return 0.0
+        gravity = self._mu / self._radius ** 2
+        return 4 * math.sqrt(gravity * self._drag_constant
+                             * self.atmosphere.surface_density) * step
+
+    def stiffness_plan(self, state, step, stiff=None):
+        """
+        Метод атмосферного участка и нужно ли следить за сменой жёсткости
+
+        В начале участка (stiff=None) неявный метод выбирается сразу, если
+        жёсткость может превысить STIFFNESS_THRESHOLD до конца полёта
+        (stiffness_bound). Переход посреди участка обходится дороже: LSODA,
+        запущенный посреди медленного спуска, остаётся на мелких шагах
+        (Венера, 100 км: 3505 вызовов против 623 при запуске с начала участка).
+
+        Неявный метод ждёт спада stiffness_ratio (обратный переход), только
+        если установившийся спуск не жёсткий (descent_stiffness ниже порога);
+        явный ждёт её роста, только если порог ещё достижим.
+
+        Args:
+            state: состояние в начале участка или в момент переключения
+            step: шаг для оценки жёсткости (stiffness_reference_step)
+            stiff: текущий выбор (None — начало участка)
+
+        Returns:
+            Кортеж (stiff, watch)
+        """
+        descent = self.descent_stiffness(step)
+        bound = self.stiffness_bound(state, step)
+        if stiff is None:
+            stiff = bound >= STIFFNESS_THRESHOLD
+        watch = descent < STIFFNESS_THRESHOLD if stiff else bound >= STIFFNESS_THRESHOLD
+        return stiff, watch
+
+    def equations_of_motion_fast(self, t, state):
+        """
+        Быстрая правая часть: та же модель, что и equations_of_motion,
+        но с заранее рассчитанными постоянными и без выделения массивов
+
+        Args:
+            state: массив [x, y, z, vx, vy, vz]
+        """
+        x, y, z, vx, vy, vz = state.tolist()
+        ax, ay, az = self.acceleration_fast(x, y, z, vx, vy, vz, t)
+        return [vx, vy, vz, ax, ay, az]
+
+    def interface_radius(self):
+        """
+        Радиус границы атмосферы, на которой полёт делится на участки
+        (верх таблицы плотности, выше которой сопротивления нет)
+        """
+        return self._radius + self._atmosphere_top
+
+    def starts_in_atmosphere(self, state, interface_radius):
+        """
+        Начинается ли участок в атмосфере
+
+        На самой границе решает направление движения: радиальная скорость,
+        а при касательном движении (апоцентр на границе) — радиальное ускорение.
+        Иначе участок нулевой длины переключался бы между вакуумом и атмосферой
+        без продвижения по времени.
+        """
+        position = state[0:3]
+        velocity = state[3:6]
+        r = float(np.linalg.norm(position))
+        if abs(r - interface_radius) > INTERFACE_TOLERANCE * interface_radius:
+            return r < interface_radius
+
+        radial = float(np.dot(position, velocity))
+        if abs(radial) > INTERFACE_TOLERANCE * r * float(np.linalg.norm(velocity)):
+            return radial < 0
+        return float(np.dot(velocity, velocity)) < self._mu / r
+
+    def kepler_segment(self, t_start, t_end, state, target_radius, target_event):
+        """
+        Аналитический участок полёта в поле точечной массы без сопротивления
+
+        Решение задачи двух тел сразу даёт момент пересечения сферы
+        target_radius (граница атмосферы или поверхность), а точки для
+        графиков строятся по тому же решению.
+
+        Args:
+            t_start, t_end: интервал времени участка (с)
+            state: начальное состояние [x, y, z, vx, vy, vz]
+            target_radius: радиус сферы, на которой участок заканчивается (м)
+            target_event: номер события в t_events для этого пересечения
+
+        Returns:
+            OptimizeResult с полями как у solve_ivp
+        """
+        r0 = state[0:3]
+        v0 = state[3:6]
+        crossing = t_start + kepler.time_to_radius(r0, v0, self._mu, target_radius)
+        reached = crossing <= t_end
+        t_final = crossing if reached else t_end
+
+        duration = t_final - t_start
+        period = kepler.orbit_period(r0, v0, self._mu)
+        if np.isfinite(period):
+            n_samples = int(np.ceil(duration / period * KEPLER_SAMPLES_PER_ORBIT))
+        else:
+            n_samples = KEPLER_MIN_SAMPLES
+        n_samples = min(max(n_samples, KEPLER_MIN_SAMPLES), KEPLER_MAX_SAMPLES)
+
+        t = np.linspace(t_start, t_final, n_samples + 1)
+        positions, velocities = kepler.propagate(r0, v0, t - t_start, self._mu)
+        y = np.hstack([positions, velocities]).T
+        y[:, 0] = state
+
+        t_events = [np.empty(0), np.empty(0)]
+        y_events = [np.empty((0, 6)), np.empty((0, 6))]
+        if reached:
+            t_events[target_event] = t[-1:]
+            y_events[target_event] = y[:, -1:].T
+
+        return OptimizeResult(
+            t=t, y=y, sol=KeplerArc(t_start, state, self._mu, t),
+            t_events=t_events, y_events=y_events,
+            nfev=0, njev=0, nlu=0,
+            status=1 if reached else 0,
+            message='A termination event occurred.' if reached
+            else 'The solver successfully reached the end of the integration interval.',
+            success=True,
+        )
+
     def simulate_fall(self, initial_altitude, initial_velocity=None,
-                      t_span=None, max_time=3600):
+                      t_span=None, max_time=3600, fast_rhs=True, segmented=True,
+                      policies=None, analytic_vacuum=True, method='RK45', step=None,
+                      cache=None, progress=None, cancel=None, dense_output=False,
+                      instrumentation=None, sensitivities=False, stiff_method=STIFF_METHOD,
+                      analytics=None, dense_only=False):
         """
         Моделирование падения на планету
 
+        Полёт разбивается на участки событием входа в атмосферу (или выхода
+        из неё) на верхней границе таблицы плотности. Для каждого участка действует
+        своя политика шага: без ограничения шага в вакууме и с мелким шагом
+        в атмосфере. Участки склеиваются в одно решение.
+
         Args:
             initial_altitude: начальная высота над поверхностью (м)
             initial_velocity: начальная скорость [vx, vy, vz] (м/с)
             t_span: временной интервал
             max_time: максимальное время симуляции (с)
+            fast_rhs: использовать быструю правую часть equations_of_motion_fast
+            segmented: разбивать полёт на участки (False — один прогон
+                       с политикой атмосферного участка на всё время)
+            policies: политики шага по участкам (по умолчанию PHASE_POLICIES)
+            analytic_vacuum: считать участки без сопротивления и силы Кориолиса
+                             в поле точечной массы аналитически (kepler.py)
+                             вместо численного интегрирования
+            method: интегратор из integrators.INTEGRATORS ('RK45', 'DOP853',
+                    'rk4', 'verlet', 'yoshida4', ...)
+            step: постоянный шаг для схем с постоянным шагом (по умолчанию
+                  fixed_step из политики участка)
+            cache: sim_cache.SimulationCache для повторных запусков
+            progress: функция progress(t, state), вызываемая по мере расчёта
+            cancel: объект с методом is_set() (например, threading.Event);
+                    при его установке выбрасывается SimulationCancelled.
+                    С progress или cancel расчёт по участкам методом SciPy
+                    идёт потоково (iter_fall); схемы с постоянным шагом
+                    и расчёт без участков опрашивают их из правой части
+                    (monitored_rhs)
+            dense_output: вернуть в sol непрерывную траекторию
+                          trajectory.DenseTrajectory (кэш при этом не используется)
+            instrumentation: instrumentation.SolverInstrumentation для сбора
+                             счётчиков и таймеров; итог попадает в solution.stats
+                             (кэш при этом не используется)
+            sensitivities: интегрировать вместе с состоянием уравнения в вариациях
+                           (variational.py) и вернуть чувствительности в конце
+                           полёта. Только методы SciPy; вакуумные участки
+                           интегрируются численно; кэш, progress, cancel
+                           и dense_output при этом не используются
+            stiff_method: неявный метод SciPy, на который атмосферный участок
+                          явного метода переходит при жёсткости: сразу, если
+                          stiffness_bound на начало участка не ниже
+                          STIFFNESS_THRESHOLD, иначе по росту stiffness_ratio;
+                          None — без переключения
+            analytics: flight_analytics.FlightAnalytics, получающий точки
+                       траектории по ходу расчёта (по участкам или блокам
+                       потока); при попадании в кэш — по готовому решению
+            dense_only: вернуть траекторию только в sol (включает dense_output):
+                        в t и y остаются узлы на концах участков, а точки шагов
+                        не накапливаются (analytics получает их по ходу расчёта)
+
+        Returns:
+            Решение с полями как у solve_ivp. t_events[0] — удар о поверхность,
+            t_events[1] — пересечения границы атмосферы (пуст у тел без атмосферы
+            и при segmented=False); phases — список участков
+            с числом вычислений правой части и временем расчёта. При работе
+            с кэшем также cache_key, cache_hit и summary (итоги анализа),
+            с instrumentation — stats. С sensitivities: stm — матрица перехода
+            ∂y/∂y0 в конце полёта, sensitivities — словарь параметр -> ∂y/∂p
+            (initial_altitude, initial_velocity, mass, cross_area, drag_coef;
+            при ударе — в точке удара), impact_time_sensitivities — словарь
+            параметр -> dt_удара/dp (None, если удара не было)
         """
         if initial_velocity is None:
             initial_velocity = [0, 0, 0]
+        if policies is None:
+            policies = PHASE_POLICIES
+        dense_output = dense_output or dense_only
+
+        # Постоянные правой части и ключ кэша строятся по текущим параметрам,
+        # даже если body_params или G изменены в обход свойств
+        self.precompute_constants()
 
         # Начальное положение (на заданной высоте над поверхностью)
         initial_position = np.array([0, 0, self.body_params['radius'] + initial_altitude])
 
         # Начальное состояние
-        initial_state = np.concatenate([initial_position, initial_velocity])
+        initial_state = np.concatenate([initial_position, initial_velocity]).astype(float)
 
         # Временной интервал
         if t_span is None:
             t_span = [0, max_time]
 
-        # Событие для остановки при достижении поверхности
+        if self.verbose:
+            print(f"Начальная высота: {initial_altitude / 1000:.1f} км")
+            print(f"Начальная скорость: {np.linalg.norm(initial_velocity):.1f} м/с")
+
+        options = {'fast_rhs': fast_rhs, 'segmented': segmented, 'policies': policies,
+                   'analytic_vacuum': analytic_vacuum, 'method': method, 'step': step,
+                   'dense_output': dense_output, 'stiff_method': stiff_method}
+
+        if sensitivities:
+            return self._variational_fall(initial_state, t_span, policies, method)
+
+        if instrumentation is not None:
+            return self._instrumented_fall(initial_state, t_span, progress, cancel,
+                                           instrumentation, options, analytics, dense_only)
+
+        # Интерполянты не сохраняются в кэше
+        if cache is None or dense_output:
+            return self._integrate_fall(initial_state, t_span, progress, cancel,
+                                        analytics=analytics, dense_only=dense_only, **options)
+
+        key = self.cache_key(initial_state, t_span, options)
+        cached = cache.get(key)
+        if cached is not None:
+            solution, summary = cached
+            if analytics is not None:
+                self.solution_summary(solution, analytics, feed=True)
+            return OptimizeResult(solution, cache_key=key, cache_hit=True, summary=summary)
+
+        # Итоги для кэша собираются по ходу расчёта, без второго прохода
+        if analytics is None:
+            analytics = FlightAnalytics.from_model(self)
+        solution = self._integrate_fall(initial_state, t_span, progress, cancel,
+                                        analytics=analytics, **options)
+        summary = self.solution_summary(solution, analytics)
+        cache.put(key, solution, summary)
+        return OptimizeResult(solution, cache_key=key, cache_hit=False, summary=summary)
+
+    def _variational_fall(self, initial_state, t_span, policies, method):
+        """Расчёт с уравнениями в вариациях (см. variational.py)"""
+        import variational
+
+        segments, phases, augmented = variational.integrate_variational(
+            self, initial_state, t_span, policies, method)
+        solution = stitch_segments(segments, phases)
+
+        # В решении остаётся только состояние; чувствительности — в конце полёта
+        solution.y = solution.y[0:variational.STATE_SIZE]
+        solution.y_events = [states[:, 0:variational.STATE_SIZE]
+                             for states in solution.y_events]
+        impacted = len(solution.t_events[0]) > 0
+        (solution.stm, solution.sensitivities,
+         solution.impact_time_sensitivities) = variational.impact_sensitivities(
+            self, solution.t[-1], augmented, impacted)
+        return solution
+
+    def _instrumented_fall(self, initial_state, t_span, progress, cancel, instrumentation,
+                           options, analytics=None, dense_only=False):
+        """Расчёт со сбором статистики (см. instrumentation.SolverInstrumentation)"""
+        if instrumentation.force_timings:
+            # Члены правой части вызываются по отдельности только в эталонной
+            options = dict(options, fast_rhs=False)
+
+        start = time.perf_counter()
+        with instrumentation.instrument_forces(self):
+            solution = self._integrate_fall(initial_state, t_span, progress, cancel,
+                                            instrumentation=instrumentation,
+                                            analytics=analytics, dense_only=dense_only,
+                                            **options)
+        instrumentation.record_solution(solution, time.perf_counter() - start)
+        solution.stats = instrumentation.result()
+        return solution
+
+    def _integrate_fall(self, initial_state, t_span, progress, cancel, fast_rhs, segmented,
+                        policies, analytic_vacuum, method, step, dense_output,
+                        stiff_method=None, instrumentation=None, analytics=None,
+                        dense_only=False):
+        """Интегрирование падения по участкам (см. simulate_fall)"""
+        streaming = progress is not None or cancel is not None
+        scipy_method = INTEGRATORS[method]['kind'] == 'scipy'
+        if streaming and segmented and scipy_method:
+            return self._collect_stream(initial_state, t_span, progress, cancel,
+                                        policies, analytic_vacuum, method, dense_output,
+                                        fast_rhs, instrumentation, stiff_method, analytics,
+                                        dense_only)
+
+        # Событие для остановки при достижении поверхности. События вызываются
+        # на каждом шаге решателя, поэтому |r| считается без NumPy
+        radius = self.body_params['radius']
+
         def surface_event(t, state):
-            r = np.linalg.norm(state[0:3])
-            return r - self.body_params['radius']
+            x, y, z = state[0:3].tolist()
+            return math.sqrt(x * x + y * y + z * z) - radius
 
         surface_event.terminal = True
         surface_event.direction = -1
 
-        print(f"Начальная высота: {initial_altitude / 1000:.1f} км")
-        print(f"Начальная скорость: {np.linalg.norm(initial_velocity):.1f} м/с")
-
         # Решение дифференциальных уравнений
-        solution = solve_ivp(
-            self.equations_of_motion,
-            t_span,
-            initial_state,
-            events=[surface_event],
-            method='RK45',
-            rtol=1e-8,
-            atol=1e-10,
-            max_step=10
-        )
+        rhs = self.equations_of_motion_fast if fast_rhs else self.equations_of_motion
+        if instrumentation is not None:
+            rhs = instrumentation.wrap_rhs(rhs)
+            surface_check = instrumentation.wrap_event(surface_event, 'surface')
+        else:
+            surface_check = surface_event
+        if streaming:
+            rhs = monitored_rhs(rhs, progress, cancel)
+
+        def phase_options(phase, phase_method):
+            options = dict(policies[phase])
+            if step is not None:
+                options['fixed_step'] = step
+            if dense_output and scipy_method:
+                options['dense_output'] = True
+            options.update(self.solver_options(phase_method))
+            return options
+
+        def record(segment):
+            # Точки участка передаются в сборщик итогов сразу после расчёта;
+            # начальная точка следующего участка совпадает с конечной предыдущего
+            if analytics is not None:
+                start = 1 if segments else 0
+                analytics.update(segment.t[start:], segment.y[:, start:])
+            add_dense_output(segment)
+            if dense_only:
+                keep_nodes(segment)
+            segments.append(segment)
+
+        def keep_nodes(segment):
+            # Из точек участка остаются только начальная и конечная
+            segment.t = segment.t[[0, -1]]
+            segment.y = segment.y[:, [0, -1]]
+
+        def add_dense_output(segment):
+            # У схем с постоянным шагом плотной выдачи нет: строится
+            # интерполянт Эрмита по узлам и производным в них
+            if not dense_output:
+                segment.sol = None
+            elif not scipy_method:
+                derivatives = np.array([rhs(t, state)
+                                        for t, state in zip(segment.t, segment.y.T)]).T
+                segment.sol = HermiteInterpolant(segment.t, segment.y, derivatives)
+            return segment
+
+        if not segmented:
+            solution = integrate(
+                rhs,
+                t_span,
+                initial_state,
+                events=[surface_check],
+                method=method,
+                **phase_options('atmosphere', method)
+            )
+            # Пересечений границы без разбиения на участки не отслеживается
+            solution.t_events = list(solution.t_events) + [np.empty(0)]
+            solution.y_events = list(solution.y_events) + [np.empty((0, len(initial_state)))]
+            if analytics is not None:
+                analytics.update(solution.t, solution.y)
+            solution.phases = [{'phase': 'atmosphere', 't_start': t_span[0],
+                                't_end': solution.t[-1], 'nfev': solution.nfev,
+                                'method': method, 'wall_time': solution.wall_time}]
+            if dense_output:
+                solution.sol = DenseTrajectory([add_dense_output(solution).sol])
+            if dense_only:
+                keep_nodes(solution)
+            if progress is not None:
+                progress(solution.t[-1], solution.y[:, -1])
+            return solution
+
+        # Граница атмосферы, на которой полёт разбивается на участки
+        interface_radius = self.interface_radius()
+
+        boundary_margin = INTERFACE_TOLERANCE * interface_radius
+
+        def interface_event(t, state):
+            # Сфера события сдвинута на толщину границы по направлению пересечения:
+            # старт ровно на границе пересечением не считается
+            x, y, z = state[0:3].tolist()
+            r = math.sqrt(x * x + y * y + z * z)
+            return r - interface_radius - interface_event.direction * boundary_margin
+
+        interface_event.terminal = True
+
+        # Переключение явного метода на неявный в плотной атмосфере и обратно
+        switchable = (self._has_drag and stiff_method is not None and scipy_method
+                      and not INTEGRATORS[method]['implicit'])
+        reference_step = stiffness_reference_step(policies['atmosphere'])
+
+        def stiffness_event(t, state):
+            return self.stiffness_ratio(state, reference_step) - stiffness_event.threshold
 
+        stiffness_event.terminal = True
+
+        t_start = t_span[0]
+        state = initial_state
+        in_atmosphere = self._has_drag and self.starts_in_atmosphere(state, interface_radius)
+        stiff = None
+        segments = []
+        phases = []
+
+        while True:
+            phase = 'atmosphere' if in_atmosphere else 'vacuum'
+
+            if phase == 'vacuum' and analytic_vacuum and self._keplerian:
+                # Вне атмосферы действует только гравитация точечной массы
+                if self._has_drag:
+                    segment = self.kepler_segment(t_start, t_span[1], state, interface_radius, 1)
+                else:
+                    segment = self.kepler_segment(t_start, t_span[1], state, self._radius, 0)
+                record(segment)
+                phases.append({'phase': phase, 't_start': t_start, 't_end': segment.t[-1],
+                               'nfev': 0, 'method': 'kepler'})
+                if segment.status != 1 or len(segment.t_events[0]) > 0:
+                    break
+                t_start = segment.t[-1]
+                state = segment.y[:, -1]
+                in_atmosphere = True
+                continue
+
+            events = [surface_check]
+            if self._has_drag:
+                # В вакууме ждём входа в атмосферу, в атмосфере — выхода из неё
+                interface_event.direction = 1 if in_atmosphere else -1
+                if instrumentation is not None:
+                    events.append(instrumentation.wrap_event(interface_event, 'interface'))
+                else:
+                    events.append(interface_event)
+
+            # Метод выбирается в начале атмосферного участка и после каждого
+            # переключения; событие жёсткости вызывается на каждом шаге,
+            # поэтому ставится, только если переход возможен (stiffness_plan)
+            check_stiffness = switchable and in_atmosphere
+            watch_stiffness = False
+            if check_stiffness:
+                stiff, watch_stiffness = self.stiffness_plan(state, reference_step, stiff)
+            phase_method = stiff_method if check_stiffness and stiff else method
+            if watch_stiffness:
+                stiffness_event.direction = -1 if stiff else 1
+                stiffness_event.threshold = STIFFNESS_THRESHOLD * (STIFFNESS_HYSTERESIS if stiff
+                                                                   else 1.0)
+                if instrumentation is not None:
+                    events.append(instrumentation.wrap_event(stiffness_event, 'stiffness'))
+                else:
+                    events.append(stiffness_event)
+
+            segment = integrate(
+                rhs,
+                (t_start, t_span[1]),
+                state,
+                events=events,
+                method=phase_method,
+                **phase_options(phase, phase_method)
+            )
+            switched = watch_stiffness and len(segment.t_events[2]) > 0
+            if watch_stiffness:
+                # Переключение видно по участкам, в событиях решения его нет
+                segment.t_events = segment.t_events[:2]
+                segment.y_events = segment.y_events[:2]
+            record(segment)
+            phases.append({'phase': phase, 't_start': t_start, 't_end': segment.t[-1],
+                           'nfev': segment.nfev, 'method': phase_method,
+                           'wall_time': segment.wall_time})
+
+            # Участок закончился ударом, концом интервала или ошибкой
+            crossed = len(segment.t_events) > 1 and len(segment.t_events[1]) > 0
+            if segment.status != 1 or len(segment.t_events[0]) > 0:
+                break
+            if switched and not crossed:
+                t_start = segment.t[-1]
+                state = segment.y[:, -1]
+                stiff = not stiff
+                continue
+            if not crossed:
+                break
+
+            t_start = segment.t_events[1][0]
+            state = segment.y_events[1][0]
+            in_atmosphere = not in_atmosphere
+            stiff = None
+
+        solution = stitch_segments(segments, phases)
+        if progress is not None:
+            progress(solution.t[-1], solution.y[:, -1])
         return solution
 
+    def iter_fall(self, initial_altitude, initial_velocity=None, max_time=3600,
+                  chunk_size=1024, cancel=None, policies=None, analytic_vacuum=True,
+                  method='RK45', stiff_method=STIFF_METHOD, analytics=None):
+        """
+        Потоковое моделирование падения: траектория выдаётся блоками по мере
+        интегрирования
+
+        Участки полёта и политики шага те же, что в simulate_fall, но решение
+        не накапливается целиком: в памяти находится только текущий блок.
+        Потребитель (визуализатор, запись в файл, сбор статистики) может
+        начинать работу сразу, а прерывание выполняется между блоками.
+
+        Args:
+            initial_altitude: начальная высота над поверхностью (м)
+            initial_velocity: начальная скорость [vx, vy, vz] (м/с)
+            max_time: максимальное время симуляции (с)
+            chunk_size: число точек в блоке (последний блок может быть короче)
+            cancel: объект с методом is_set() (например, threading.Event);
+                    после его установки выдача прекращается
+            policies: политики шага по участкам (по умолчанию PHASE_POLICIES)
+            analytic_vacuum: считать участки без сопротивления аналитически
+            method: адаптивный метод SciPy из integrators.INTEGRATORS
+            stiff_method: неявный метод для жёстких атмосферных участков
+                          (см. simulate_fall)
+            analytics: flight_analytics.FlightAnalytics, получающий каждый
+                       блок до выдачи потребителю
+
+        Yields:
+            Кортежи (t, y): массив времени формы (n,) и состояний формы (6, n)
+
+        Returns:
+            Итог прогона (значение StopIteration): impacted, cancelled,
+            t_end, nfev, phases, t_events, y_events
+        """
+        if initial_velocity is None:
+            initial_velocity = [0, 0, 0]
+        if policies is None:
+            policies = PHASE_POLICIES
+        self.precompute_constants()
+
+        initial_position = np.array([0, 0, self.body_params['radius'] + initial_altitude])
+        state = np.concatenate([initial_position, initial_velocity]).astype(float)
+        stream = self._stream_fall(state, 0.0, max_time, chunk_size, cancel, policies,
+                                   analytic_vacuum, method, stiff_method=stiff_method)
+        if analytics is not None:
+            stream = _observe_stream(stream, analytics)
+        return (yield from stream)
+
+    def _stream_fall(self, state, t, max_time, chunk_size, cancel, policies,
+                     analytic_vacuum, method, dense=None, fast_rhs=True, instrumentation=None,
+                     stiff_method=None):
+        """
+        Генератор блоков траектории из состояния state в момент t (см. iter_fall).
+        Если задан список dense, в него добавляются интерполянты участков
+        """
+        rhs = self.equations_of_motion_fast if fast_rhs else self.equations_of_motion
+        if instrumentation is not None:
+            rhs = instrumentation.wrap_rhs(rhs)
+        interface_radius = self.interface_radius()
+        boundary_margin = INTERFACE_TOLERANCE * interface_radius
+        in_atmosphere = self._has_drag and self.starts_in_atmosphere(state, interface_radius)
+        switchable = (self._has_drag and stiff_method is not None
+                      and not INTEGRATORS[method]['implicit'])
+        reference_step = stiffness_reference_step(policies['atmosphere'])
+        stiff = None
+
+        buffer = _ChunkBuffer(chunk_size, len(state))
+        summary = {'impacted': False, 'cancelled': False, 't_end': t, 'nfev': 0, 'phases': [],
+                   't_events': [[], []], 'y_events': [[], []]}
+
+        def cancelled():
+            summary['cancelled'] = cancel is not None and cancel.is_set()
+            summary['t_end'] = t
+            return summary['cancelled']
+
+        buffer.append(t, state)
+
+        while t < max_time and not summary['impacted']:
+            phase = 'atmosphere' if in_atmosphere else 'vacuum'
+            phase_start = t
+
+            if phase == 'vacuum' and analytic_vacuum and self._keplerian:
+                # Аналитический участок: точки берутся из решения задачи двух тел
+                if self._has_drag:
+                    segment = self.kepler_segment(t, max_time, state, interface_radius, 1)
+                else:
+                    segment = self.kepler_segment(t, max_time, state, self._radius, 0)
+
+                for i in range(1, len(segment.t)):
+                    t = segment.t[i]
+                    chunk = buffer.append(t, segment.y[:, i])
+                    if chunk is not None:
+                        yield chunk
+                        if cancelled():
+                            return summary
+
+                t = segment.t[-1]
+                state = segment.y[:, -1]
+                summary['impacted'] = len(segment.t_events[0]) > 0
+                for i in range(2):
+                    summary['t_events'][i].extend(segment.t_events[i])
+                    summary['y_events'][i].extend(segment.y_events[i])
+                summary['phases'].append({'phase': phase, 't_start': phase_start, 't_end': t,
+                                          'nfev': 0, 'method': 'kepler'})
+                in_atmosphere = segment.status == 1 and self._has_drag
+                if dense is not None:
+                    dense.append(segment.sol)
+                continue
+
+            check_stiffness = switchable and in_atmosphere
+            watch_stiffness = False
+            if check_stiffness:
+                stiff, watch_stiffness = self.stiffness_plan(state, reference_step, stiff)
+            phase_method = stiff_method if check_stiffness and stiff else method
+
+            solver = make_solver(rhs, t, state, max_time, method=phase_method,
+                                 **policies[phase], **self.solver_options(phase_method))
+            crossed = False
+            switched = False
+            step_times = [t]
+            interpolants = []
+
+            while solver.status == 'running':
+                solver.step()
+                if solver.status == 'failed':
+                    raise RuntimeError(f"Ошибка интегрирования: {solver.message}")
+
+                r = math.sqrt(solver.y[0] ** 2 + solver.y[1] ** 2 + solver.y[2] ** 2)
+                if instrumentation is not None:
+                    # Обе сферы проверяются по одному вычислению r на шаг
+                    instrumentation.count_event('surface')
+                    if self._has_drag:
+                        instrumentation.count_event('interface')
+
+                # Вход в атмосферу проверяется раньше удара: шаг в вакууме
+                # может пересечь обе сферы
+                target = None
+                if self._has_drag and (r > interface_radius + boundary_margin if in_atmosphere
+                                       else r < interface_radius - boundary_margin):
+                    # Выход из атмосферы или вход в неё (сфера сдвинута на толщину
+                    # границы, как событие в _integrate_fall)
+                    target = interface_radius + (boundary_margin if in_atmosphere
+                                                 else -boundary_margin)
+                    event = 1
+                    crossed = True
+                elif r <= self._radius:
+                    target, event = self._radius, 0
+                    summary['impacted'] = True
+
+                step_output = None
+                if target is not None or dense is not None:
+                    step_output = solver.dense_output()
+
+                if target is not None:
+                    # Уточнение момента пересечения сферы по плотной выдаче шага
+                    t_cross, root = brentq(
+                        lambda moment: np.linalg.norm(step_output(moment)[0:3]) - target,
+                        solver.t_old, solver.t, xtol=1e-12, full_output=True)
+                    if instrumentation is not None:
+                        instrumentation.count_event(('surface', 'interface')[event],
+                                                    root.function_calls)
+                    t, state = t_cross, step_output(t_cross)
+                    summary['t_events'][event].append(t)
+                    summary['y_events'][event].append(state)
+                else:
+                    t, state = solver.t, solver.y
+
+                if dense is not None:
+                    step_times.append(t)
+                    interpolants.append(step_output)
+
+                chunk = buffer.append(t, state)
+                if chunk is not None:
+                    yield chunk
+                    if cancelled():
+                        summary['nfev'] += solver.nfev
+                        return summary
+
+                if target is not None:
+                    break
+
+                if watch_stiffness:
+                    # Смена метода на границе шага (как событие в _integrate_fall)
+                    if instrumentation is not None:
+                        instrumentation.count_event('stiffness')
+                    ratio = self.stiffness_ratio(state, reference_step)
+                    if (ratio < STIFFNESS_THRESHOLD * STIFFNESS_HYSTERESIS if stiff
+                            else ratio > STIFFNESS_THRESHOLD):
+                        switched = True
+                        break
+
+            summary['nfev'] += solver.nfev
+            summary['phases'].append({'phase': phase, 't_start': phase_start, 't_end': t,
+                                      'nfev': solver.nfev, 'method': phase_method})
+            if dense is not None and interpolants:
+                dense.append(OdeSolution(step_times, interpolants))
+            if switched and solver.status == 'running':
+                stiff = not stiff
+                continue
+            if not crossed:
+                break
+            in_atmosphere = not in_atmosphere
+            stiff = None
+
+        summary['t_end'] = t
+        if buffer.count:
+            yield buffer.flush()
+        return summary
+
+    def _collect_stream(self, initial_state, t_span, progress, cancel, policies,
+                        analytic_vacuum, method, dense_output=False, fast_rhs=True,
+                        instrumentation=None, stiff_method=None, analytics=None,
+                        dense_only=False):
+        """
+        Сборка решения из потока блоков с отчётом о ходе и прерыванием.
+        С dense_only блоки не накапливаются: t и y строятся по sol в узлах
+        на концах участков
+        """
+        dense = [] if dense_output or dense_only else None
+        stream = self._stream_fall(initial_state, t_span[0], t_span[1], STREAM_CHUNK_SIZE,
+                                   cancel, policies, analytic_vacuum, method, dense,
+                                   fast_rhs, instrumentation, stiff_method)
+        if analytics is not None:
+            stream = _observe_stream(stream, analytics)
+        times = []
+        states = []
+        while True:
+            try:
+                t, y = next(stream)
+            except StopIteration as stop:
+                summary = stop.value
+                break
+            if not dense_only:
+                times.append(t)
+                states.append(y)
+            if progress is not None:
+                progress(t[-1], y[:, -1])
+
+        if summary['cancelled']:
+            raise SimulationCancelled(f"Симуляция прервана на t = {summary['t_end']:.1f} с")
+
+        sol = DenseTrajectory(dense) if dense else None
+        if dense_only:
+            nodes = np.array([phase['t_start'] for phase in summary['phases']]
+                             + [summary['t_end']])
+            times, states = [nodes], [sol(nodes)]
+
+        status = 1 if summary['impacted'] else 0
+        return OptimizeResult(
+            t=np.concatenate(times), y=np.concatenate(states, axis=1),
+            sol=sol,
+            t_events=[np.array(times_list) for times_list in summary['t_events']],
+            y_events=[np.array(states_list).reshape(-1, 6) for states_list in summary['y_events']],
+            nfev=summary['nfev'], njev=0, nlu=0,
+            status=status,
+            message='A termination event occurred.' if status
+            else 'The solver successfully reached the end of the integration interval.',
+            success=True, phases=summary['phases'],
+        )
+
+    def cache_key(self, initial_state, t_span, options):
+        """
+        Канонический ключ кэша: параметры тела, атмосферы и модели,
+        начальное состояние, интервал, допуски и интегратор
+        """
+        atmosphere = None
+        if self.atmosphere is not None:
+            atmosphere = {'top': self.atmosphere.top,
+                          'densities': hashlib.sha256(self.atmosphere.densities.tobytes()).hexdigest()}
+
+        # В ключ входят и постоянные, с которыми действительно идёт интегрирование
+        gravity_field = None
+        if self.gravity_field is not None:
+            gravity_field = [self.gravity_field.degree, self.gravity_field.order]
+
+        payload = {
+            'body': self.body_params,
+            'atmosphere': atmosphere,
+            'model': {'G': self.G, 'mass': self.mass, 'cross_area': self.cross_area,
+                      'drag_coef': self.drag_coef, 'enable_coriolis': self.enable_coriolis,
+                      'planet_rotation_rate': self.planet_rotation_rate,
+                      'gravity_degree': self.gravity_degree, 'gravity_order': self.gravity_order},
+            'constants': {'mu': self._mu, 'radius': self._radius,
+                          'atmosphere_top': self._atmosphere_top,
+                          'drag_constant': self._drag_constant, 'two_omega': self._two_omega,
+                          'gravity_field': gravity_field},
+            'initial_state': initial_state,
+            't_span': t_span,
+            'options': options,
+            'kepler_samples': [KEPLER_SAMPLES_PER_ORBIT, KEPLER_MIN_SAMPLES, KEPLER_MAX_SAMPLES],
+        }
+        return canonical_key(payload)
+
+    def solution_summary(self, solution, analytics=None, feed=None):
+        """
+        Итоги анализа решения (скаляры для метаданных кэша): скорости,
+        пиковые перегрузка, скоростной напор и тепловой поток, вход в атмосферу
+
+        Args:
+            solution: решение simulate_fall
+            analytics: FlightAnalytics, уже получивший точки по ходу расчёта
+                       (None — новый сборщик)
+            feed: передать в сборщик точки готового решения блоками
+                  (по умолчанию — только новому сборщику)
+        """
+        if feed is None:
+            feed = analytics is None
+        if analytics is None:
+            analytics = FlightAnalytics.from_model(self)
+        if feed:
+            for start in range(0, len(solution.t), ANALYTICS_CHUNK_SIZE):
+                stop = start + ANALYTICS_CHUNK_SIZE
+                analytics.update(solution.t[start:stop], solution.y[:, start:stop])
+
+        summary = analytics.result()
+        summary['impact_energy'] = float(self.calculate_impact_energy(solution.y[3:6, -1]))
+        summary['impacted'] = bool(len(solution.t_events[0]) > 0)
+        return summary
+
     def calculate_impact_energy(self, final_velocity):
         """Вычисление энергии удара о поверхность"""
         kinetic_energy = 0.5 * self.mass * np.linalg.norm(final_velocity) ** 2
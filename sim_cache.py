@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Версия формата ключа и файлов: при изменении физики старые записи
+# должны перестать совпадать
+CACHE_FORMAT_VERSION = 4
+
+# Каталог дискового кэша по умолчанию
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'planet_fall')
+
+# Ограничение объёма дискового кэша по умолчанию (байт)
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 ** 2
+
+
+def _normalize(value):
+    """Приведение значений к виду, пригодному для канонического JSON"""
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return _normalize(value.tolist())
+    if isinstance(value, np.generic):
+        return _normalize(value.item())
+    if isinstance(value, float) and not np.isfinite(value):
+        return repr(value)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"Значение не сериализуется в ключ кэша: {value!r}")
+
+
+def canonical_key(payload):
+    """
+    Канонический хэш параметров симуляции (SHA-256)
+
+    Args:
+        payload: словарь параметров (числа, строки, списки, массивы NumPy)
+    """
+    text = json.dumps({'version': CACHE_FORMAT_VERSION, 'payload': _normalize(payload)},
+                      sort_keys=True, allow_nan=False, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _solution_nbytes(solution):
+    """Объём массивов решения в байтах"""
+    total = solution.t.nbytes + solution.y.nbytes
+    for times, states in zip(solution.t_events, solution.y_events):
+        total += np.asarray(times).nbytes + np.asarray(states).nbytes
+    return total
+
+
+def _freeze(solution):
+    """Запрет записи в массивы решения, хранящегося в кэше"""
+    arrays = [solution.t, solution.y] + list(solution.t_events) + list(solution.y_events)
+    for array in arrays:
+        if isinstance(array, np.ndarray):
+            array.flags.writeable = False
+
+
+class SimulationCache:
+    """
+    Кэш результатов симуляции с адресацией по содержимому.
+
+    Ключ — канонический хэш всех параметров, влияющих на результат.
+    Первый уровень — LRU в памяти с ограничением по объёму в байтах,
+    второй (необязательный) — сжатые файлы .npz на диске вместе
+    с метаданными анализа. Объём диска тоже ограничен: после записи
+    удаляются файлы с самым старым временем изменения (чтение записи
+    обновляет его), пока сумма не уложится в max_disk_bytes.
+
+    Кэш разделяется потоками (предпросмотр и расчёт в GUI): операции
+    над записями в памяти выполняются под блокировкой, чтение и запись
+    файлов — вне её.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 ** 2, cache_dir=None,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        """
+        Args:
+            max_bytes: ограничение объёма кэша в памяти (байт)
+            cache_dir: каталог дискового кэша (None — только память)
+            max_disk_bytes: ограничение объёма файлов в cache_dir (байт)
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.cache_dir is not None and os.path.exists(self._disk_path(key))
+
+    def get(self, key):
+        """
+        Поиск результата по ключу
+
+        Returns:
+            Кортеж (solution, metadata) или None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+
+        if self.cache_dir is not None:
+            loaded = self._load(key)
+            if loaded is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, *loaded)
+                return loaded
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, solution, metadata=None):
+        """Сохранение результата в памяти и (если задан каталог) на диске"""
+        metadata = dict(metadata or {})
+        _freeze(solution)
+        with self._lock:
+            self._remember(key, solution, metadata)
+        if self.cache_dir is not None:
+            self._save(key, solution, metadata)
+            self._trim_disk()
+
+    def clear(self, disk=False):
+        """Очистка кэша в памяти (и на диске при disk=True)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+        if disk and self.cache_dir is not None and os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith('.npz'):
+                        os.remove(os.path.join(root, name))
+
+    def _remember(self, key, solution, metadata):
+        """Добавление в LRU с вытеснением самых старых записей (под блокировкой)"""
+        nbytes = _solution_nbytes(solution)
+        if nbytes > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self.current_bytes -= self._entries.pop(key)[2]
+
+        self._entries[key] = (solution, metadata, nbytes)
+        self.current_bytes += nbytes
+
+        while self.current_bytes > self.max_bytes:
+            _, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_bytes
+
+    def _disk_files(self):
+        """Файлы дискового кэша: список (время изменения, размер, путь)"""
+        files = []
+        if not os.path.isdir(self.cache_dir):
+            return files
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.npz'):
+                    path = os.path.join(root, name)
+                    try:
+                        info = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((info.st_mtime, info.st_size, path))
+        return files
+
+    def disk_bytes(self):
+        """Объём файлов дискового кэша (байт)"""
+        if self.cache_dir is None:
+            return 0
+        return sum(size for _, size, _ in self._disk_files())
+
+    def _trim_disk(self):
+        """Удаление самых давно использованных файлов сверх max_disk_bytes"""
+        files = self._disk_files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Файл уже удалён другим потоком или процессом
+                continue
+            total -= size
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.npz')
+
+    def _save(self, key, solution, metadata):
+        """Запись сжатого .npz (атомарно через временный файл)"""
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        arrays = {'t': solution.t, 'y': solution.y}
+        for i, (times, states) in enumerate(zip(solution.t_events, solution.y_events)):
+            arrays[f't_events_{i}'] = np.asarray(times)
+            arrays[f'y_events_{i}'] = np.asarray(states)
+
+        header = {
+            'n_events': len(solution.t_events),
+            'nfev': int(solution.nfev), 'njev': int(solution.njev), 'nlu': int(solution.nlu),
+            'status': int(solution.status), 'message': solution.message,
+            'success': bool(solution.success),
+            'phases': solution.get('phases'),
+            'metadata': metadata,
+        }
+        arrays['header'] = np.array(json.dumps(_normalize(header)))
+
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as stream:
+                np.savez_compressed(stream, **arrays)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def _load(self, key):
+        """Чтение записи с диска; повреждённые файлы игнорируются"""
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+
+        # SciPy нужен только при чтении записи: импорт модуля остаётся лёгким
+        from scipy.optimize import OptimizeResult
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                header = json.loads(str(data['header']))
+                n_events = header['n_events']
+                solution = OptimizeResult(
+                    t=data['t'], y=data['y'], sol=None,
+                    t_events=[data[f't_events_{i}'] for i in range(n_events)],
+                    y_events=[data[f'y_events_{i}'] for i in range(n_events)],
+                    nfev=header['nfev'], njev=header['njev'], nlu=header['nlu'],
+                    status=header['status'], message=header['message'],
+                    success=header['success'], phases=header['phases'],
+                )
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Время изменения служит меткой последнего использования при вытеснении
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        _freeze(solution)
+        return solution, header['metadata']
@@ -0,0 +1,177 @@
+import itertools
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+import os
+
+import numpy as np
+
+from celestial_bodies import CelestialBody
+from physics_planet import PlanetFall
+from utils import initial_velocity_vector
+
+
+# Один вариант параметрического перебора
+SweepCase = namedtuple('SweepCase', ['body', 'mass', 'cross_area', 'drag_coef',
+                                     'initial_altitude', 'initial_velocity'])
+
+# Строка таблицы результатов в разделяемой памяти
+RESULT_DTYPE = np.dtype([
+    ('impact_time', np.float64),  # с
+    ('impact_speed', np.float64),  # м/с
+    ('impact_latitude', np.float64),  # градусы
+    ('impact_longitude', np.float64),  # градусы
+    ('impact_energy', np.float64),  # Дж
+    ('flight_time', np.float64),  # с
+    ('impacted', np.bool_),
+    ('failed', np.bool_),
+])
+
+# Таблица результатов, подключённая в процессе-исполнителе
+_worker_table = None
+_worker_memory = None
+
+
+def build_sweep_grid(bodies=None, masses=(1000,), cross_areas=(1.0,), drag_coefs=(None,),
+                     initial_altitudes=(400000,), initial_velocities=('orbital',)):
+    """
+    Построение полной сетки вариантов (декартово произведение)
+
+    Args:
+        bodies: названия небесных тел (по умолчанию все из CelestialBody.BODIES)
+        masses: массы тела (кг)
+        cross_areas: площади поперечного сечения (м²)
+        drag_coefs: коэффициенты сопротивления (None — как в GUI)
+        initial_altitudes: начальные высоты (м)
+        initial_velocities: 'orbital', 'zero', модуль скорости (м/с) или вектор
+
+    Returns:
+        Список SweepCase
+    """
+    if bodies is None:
+        bodies = CelestialBody.list_available_bodies()
+
+    return [SweepCase(*values) for values in itertools.product(
+        bodies, masses, cross_areas, drag_coefs, initial_altitudes, initial_velocities)]
+
+
+def run_case(case, max_time=3600, enable_coriolis=False):
+    """
+    Моделирование одного варианта
+
+    Returns:
+        Кортеж значений в порядке полей RESULT_DTYPE
+    """
+    body_params = CelestialBody.get_body_params(case.body)
+
+    # Коэффициент сопротивления по умолчанию — как в PlanetFallGUI.run_simulation
+    drag_coef = case.drag_coef
+    if drag_coef is None:
+        drag_coef = 2.0 if body_params['atmosphere_height'] > 0 else 0
+
+    model = PlanetFall(body_name=case.body, mass=case.mass, cross_area=case.cross_area,
+                       drag_coef=drag_coef,
+                       enable_coriolis=enable_coriolis and case.body.lower() == 'earth',
+                       verbose=False)
+
+    initial_velocity = initial_velocity_vector(body_params, case.initial_altitude,
+                                               case.initial_velocity)
+    solution = model.simulate_fall(initial_altitude=case.initial_altitude,
+                                   initial_velocity=initial_velocity,
+                                   max_time=max_time)
+
+    final_state = solution.y[:, -1]
+    r = np.linalg.norm(final_state[0:3])
+    speed = np.linalg.norm(final_state[3:6])
+    impacted = len(solution.t_events[0]) > 0
+
+    return (solution.t[-1] if impacted else np.nan,
+            speed if impacted else np.nan,
+            np.degrees(np.arcsin(final_state[2] / r)) if impacted else np.nan,
+            np.degrees(np.arctan2(final_state[1], final_state[0])) if impacted else np.nan,
+            model.calculate_impact_energy(final_state[3:6]) if impacted else np.nan,
+            solution.t[-1],
+            impacted,
+            False)
+
+
+def _attach_table(name, n_cases):
+    """Подключение к таблице результатов в разделяемой памяти"""
+    memory = shared_memory.SharedMemory(name=name)
+    table = np.ndarray((n_cases,), dtype=RESULT_DTYPE, buffer=memory.buf)
+    return memory, table
+
+
+def _init_worker(name, n_cases):
+    """Инициализация процесса-исполнителя: одно подключение на процесс"""
+    global _worker_memory, _worker_table
+    _worker_memory, _worker_table = _attach_table(name, n_cases)
+
+
+def _run_chunk(start, cases, max_time, enable_coriolis):
+    """
+    Моделирование блока вариантов с записью прямо в разделяемую таблицу
+
+    Returns:
+        Число обработанных вариантов (результаты через пул не передаются)
+    """
+    for offset, case in enumerate(cases):
+        row = start + offset
+        try:
+            _worker_table[row] = run_case(case, max_time, enable_coriolis)
+        except Exception:
+            _worker_table['failed'][row] = True
+    return len(cases)
+
+
+def run_sweep(cases, max_workers=None, chunk_size=None, max_time=3600, enable_coriolis=False):
+    """
+    Параллельный перебор вариантов в пуле процессов
+
+    Исполнители пишут время удара, скорость удара, широту/долготу точки
+    падения и энергию удара в общую таблицу multiprocessing.shared_memory,
+    поэтому результаты не сериализуются обратно через пул.
+
+    Args:
+        cases: список SweepCase (например, из build_sweep_grid)
+        max_workers: число процессов (по умолчанию — число ядер)
+        chunk_size: число вариантов в одной задаче
+        max_time: максимальное время симуляции (с)
+        enable_coriolis: учитывать силу Кориолиса (только для Земли, как в GUI)
+
+    Returns:
+        Структурированный массив результатов с типом RESULT_DTYPE
+    """
+    cases = [case if isinstance(case, SweepCase) else SweepCase(*case) for case in cases]
+    n_cases = len(cases)
+    if n_cases == 0:
+        return np.zeros(0, dtype=RESULT_DTYPE)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if chunk_size is None:
+        # Несколько блоков на процесс выравнивают нагрузку
+        chunk_size = max(1, n_cases // (max_workers * 4))
+
+    memory = shared_memory.SharedMemory(create=True, size=n_cases * RESULT_DTYPE.itemsize)
+    try:
+        table = np.ndarray((n_cases,), dtype=RESULT_DTYPE, buffer=memory.buf)
+        for field in RESULT_DTYPE.names:
+            table[field] = np.nan if RESULT_DTYPE[field].kind == 'f' else False
+
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(memory.name, n_cases)) as executor:
+            futures = [executor.submit(_run_chunk, start, cases[start:start + chunk_size],
+                                       max_time, enable_coriolis)
+                       for start in range(0, n_cases, chunk_size)]
+            wait(futures)
+            for future in futures:
+                future.result()
+
+        results = table.copy()
+        del table
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return results
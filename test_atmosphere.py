@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from atmosphere import (US76_EARTH_PROFILE, AtmosphereTable, ExponentialAtmosphere,
+                        TabulatedAtmosphere, build_atmosphere)
+from celestial_bodies import CelestialBody
+
+
+def test_exponential_profile_is_reproduced():
+    """Интерполяция логарифма воспроизводит экспоненту и между узлами"""
+    atmosphere = ExponentialAtmosphere(65.0, 15900.0, 250e3)
+    heights = np.linspace(0, 250e3, 1237)
+    np.testing.assert_allclose(atmosphere.density_array(heights),
+                               65.0 * np.exp(-heights / 15900.0), rtol=1e-12)
+
+
+def test_tabulated_profile_hits_reference_points():
+    """Таблица US76 проходит через опорные точки профиля"""
+    atmosphere = TabulatedAtmosphere(US76_EARTH_PROFILE)
+    for height, density in US76_EARTH_PROFILE:
+        assert atmosphere.density(height) == pytest.approx(density, rel=1e-12)
+
+
+def test_density_outside_the_table():
+    """Ниже поверхности — плотность у поверхности, выше границы — ноль"""
+    atmosphere = ExponentialAtmosphere(1.2, 8500.0, 100e3)
+    assert atmosphere.density(-10.0) == atmosphere.surface_density
+    assert atmosphere.density(100e3 + 1.0) == 0.0
+    np.testing.assert_array_equal(atmosphere.density_array([-10.0, 100e3 + 1.0]),
+                                  [atmosphere.surface_density, 0.0])
+
+
+def test_scalar_and_array_lookups_agree():
+    """density и density_array дают одно и то же на всей сетке и между узлами"""
+    atmosphere = TabulatedAtmosphere(US76_EARTH_PROFILE, step=250.0)
+    heights = np.random.default_rng(1).uniform(-1e3, 101e3, 500)
+    np.testing.assert_allclose(atmosphere.density_array(heights),
+                               [atmosphere.density(h) for h in heights], rtol=1e-14)
+
+
+def test_density_gradient_matches_finite_difference():
+    """dρ/dh совпадает с разностной производной внутри интервала сетки"""
+    atmosphere = AtmosphereTable([1.0, 0.5, 0.2, 0.05], 3000.0)
+    for height in (250.0, 1400.0, 2900.0):
+        density, gradient = atmosphere.density_gradient(height)
+        assert density == atmosphere.density(height)
+        step = 1e-3
+        difference = (atmosphere.density(height + step)
+                      - atmosphere.density(height - step)) / (2 * step)
+        assert gradient == pytest.approx(difference, rel=1e-6)
+
+
+def test_bodies_get_their_models():
+    """Тела без атмосферы получают None, таблицы строятся один раз на тело"""
+    assert build_atmosphere(CelestialBody.get_body_params('mercury')) is None
+    assert isinstance(CelestialBody.get_atmosphere('earth'), TabulatedAtmosphere)
+    assert isinstance(CelestialBody.get_atmosphere('venus'), ExponentialAtmosphere)
+    assert CelestialBody.get_atmosphere('Mars') is CelestialBody.get_atmosphere('mars')
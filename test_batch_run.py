@@ -0,0 +1,93 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from batch_run import (MAX_REPORTED_FAILURES, RESULT_FIELDS, main, normalize_scenario,
+                       read_scenarios, run_batch, run_scenario)
+from sweep import SweepCase, run_case
+
+
+# Быстрый сценарий: тело без атмосферы, падение с малой высоты
+DROP = {'name': 'drop', 'body_name': 'mercury', 'initial_altitude': 10e3,
+        'velocity_type': 'zero', 'max_time': 600}
+
+
+def test_normalize_fills_defaults_and_types():
+    """Пустые значения заменяются значениями по умолчанию, строки CSV — приводятся"""
+    scenario = normalize_scenario({'body_name': ' Mars ', 'mass': '250', 'cross_area': '',
+                                   'enable_coriolis': 'нет'})
+    assert scenario['body_name'] == 'mars'
+    assert scenario['mass'] == 250.0
+    assert scenario['cross_area'] == 2.0
+    assert scenario['enable_coriolis'] is False
+    assert scenario['velocity_type'] == 'orbital'
+
+
+@pytest.mark.parametrize('raw', [{'body_name': 'moon'}, {'velocity_type': 'fast'},
+                                 {'mass': 'heavy'}, {'enable_coriolis': 'maybe'},
+                                 {'drag': 1.0}])
+def test_normalize_rejects_bad_values(raw):
+    """Неизвестное тело, режим скорости, параметр и некорректные числа — ValueError"""
+    with pytest.raises(ValueError):
+        normalize_scenario(raw)
+
+
+def test_scenario_row_matches_sweep_case():
+    """Строка результата совпадает с run_case для тех же параметров"""
+    row = run_scenario(3, DROP)
+    expected = run_case(SweepCase('mercury', 1000.0, 2.0, None, 10e3, 'zero'), 600.0, True)
+
+    assert set(row) == set(RESULT_FIELDS)
+    assert row['index'] == 3 and row['name'] == 'drop' and row['error'] is None
+    assert row['impacted'] and not row['failed']
+    assert row['impact_time'] == expected[0]
+
+
+def test_failed_scenario_does_not_stop_the_batch():
+    """Ошибочный сценарий записывается с error, остальные считаются"""
+    scenarios = [DROP, dict(DROP, body_name='moon'), dict(DROP, name='second')]
+    rows = sorted(run_batch(scenarios, max_workers=2, chunk_size=1), key=lambda row: row['index'])
+
+    assert [row['failed'] for row in rows] == [False, True, False]
+    assert rows[1]['body_name'] == 'moon'
+    assert rows[1]['error'].startswith('ValueError')
+    assert rows[2]['impact_time'] == rows[0]['impact_time']
+
+
+def test_csv_scenarios_are_read_lazily(tmp_path):
+    """CSV читается по строке, значения приходят строками"""
+    path = tmp_path / 'scenarios.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as stream:
+        writer = csv.DictWriter(stream, fieldnames=list(DROP))
+        writer.writeheader()
+        writer.writerow(DROP)
+
+    scenarios = read_scenarios(str(path))
+    first = next(scenarios)
+    assert first['initial_altitude'] == '10000.0'
+    assert normalize_scenario(first)['initial_altitude'] == 10e3
+
+
+def test_main_reports_a_bounded_failure_list(tmp_path, capsys):
+    """Сводка перечисляет не больше MAX_REPORTED_FAILURES ошибок, JSON без NaN"""
+    failing = [dict(DROP, name=f'bad{i}', body_name='moon')
+               for i in range(MAX_REPORTED_FAILURES + 3)]
+    orbit = dict(DROP, name='orbit', velocity_type='orbital', initial_altitude=100e3,
+                 max_time=100)
+    path = tmp_path / 'scenarios.json'
+    path.write_text(json.dumps({'scenarios': [DROP, orbit] + failing}), encoding='utf-8')
+    output = tmp_path / 'results.jsonl'
+
+    assert main([str(path), '-o', str(output), '--format', 'jsonl', '-j', '1']) == 1
+
+    report = capsys.readouterr().err
+    assert f'ошибок: {len(failing)}' in report
+    assert report.count('ValueError') == MAX_REPORTED_FAILURES
+    assert '... и ещё 3' in report
+
+    rows = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert len(rows) == 2 + len(failing)
+    assert rows[1]['name'] == 'orbit' and rows[1]['impact_time'] is None
+    assert np.isclose(rows[1]['flight_time'], 100)
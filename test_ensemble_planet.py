@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from ensemble_planet import PlanetFallEnsemble
+from physics_planet import PlanetFall
+
+
+# Политика одиночного расчёта с теми же допусками, что у ансамбля по умолчанию
+SCALAR_POLICIES = {'atmosphere': {'rtol': 1e-8, 'atol': 1e-10, 'max_step': 10}}
+
+
+def scalar_fall(body_name, altitude, velocity):
+    """Одиночный расчёт без разбиения на участки (тот же метод RK45)"""
+    model = PlanetFall(body_name=body_name, drag_coef=2.0, cross_area=2.0, mass=1000,
+                       verbose=False)
+    return model.simulate_fall(altitude, velocity, segmented=False, policies=SCALAR_POLICIES)
+
+
+@pytest.mark.parametrize('body_name, altitudes, velocity', [
+    ('mars', [50e3, 120e3], [0.0, 0.0, 0.0]),
+    ('earth', [30e3], [200.0, 0.0, 0.0]),
+])
+def test_ensemble_matches_scalar_integration(body_name, altitudes, velocity):
+    """Каждая строка ансамбля совпадает с одиночным расчётом simulate_fall"""
+    ensemble = PlanetFallEnsemble(body_name, drag_coef=2.0, cross_area=2.0, mass=1000)
+    results = ensemble.simulate(altitudes, velocity)
+
+    for i, altitude in enumerate(altitudes):
+        solution = scalar_fall(body_name, altitude, velocity)
+        assert results['impacted'][i]
+        assert results['final_time'][i] == pytest.approx(solution.t[-1], abs=1e-7)
+        np.testing.assert_allclose(results['final_state'][i], solution.y[:, -1],
+                                   rtol=0, atol=1e-4)
+
+
+def test_ensemble_steps_match_scipy_controller():
+    """Без удара по шагам: число принятых шагов то же, что у RK45 из SciPy"""
+    ensemble = PlanetFallEnsemble('mars', drag_coef=2.0, cross_area=2.0, mass=1000)
+    results = ensemble.simulate([50e3], max_time=60.0)
+    model = PlanetFall(body_name='mars', drag_coef=2.0, cross_area=2.0, mass=1000,
+                       verbose=False)
+    solution = model.simulate_fall(50e3, max_time=60.0, segmented=False,
+                                   policies=SCALAR_POLICIES)
+
+    assert not results['impacted'][0]
+    assert results['nsteps'][0] == len(solution.t) - 1
+    np.testing.assert_allclose(results['final_state'][0], solution.y[:, -1], rtol=1e-10)
+
+
+def test_rows_stop_independently():
+    """Строки с разной высотой падают в своё время; траектории сохраняются по строкам"""
+    ensemble = PlanetFallEnsemble('mercury', drag_coef=0.0, mass=[10.0, 1000.0, 5.0])
+    results = ensemble.simulate([1e3, 5e3, 20e3], save_trajectories=True)
+
+    assert results['impacted'].all()
+    assert np.all(np.diff(results['impact_time']) > 0)
+    for i, (t, y) in enumerate(results['trajectories']):
+        assert t[-1] == results['final_time'][i]
+        np.testing.assert_array_equal(y[:, -1], results['final_state'][i])
+    np.testing.assert_allclose(
+        results['impact_energy'], 0.5 * np.array([10.0, 1000.0, 5.0])
+        * results['impact_speed'] ** 2)
@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+import pytest
+
+from flight_analytics import STANDARD_GRAVITY, FlightAnalytics
+from physics_planet import PlanetFall
+
+
+def earth_model():
+    """Модель падения на Землю с сопротивлением (без вывода в консоль)"""
+    return PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, verbose=False)
+
+
+@pytest.mark.parametrize('options', [{}, {'method': 'rk4'}, {'segmented': False},
+                                     {'cancel': threading.Event()}, {'dense_only': True}])
+def test_in_flight_summary_matches_post_run(options):
+    """Итоги, собранные по ходу расчёта, совпадают с анализом готового решения"""
+    model = earth_model()
+    analytics = FlightAnalytics.from_model(model)
+    model.simulate_fall(300e3, [500.0, 0.0, 0.0], analytics=analytics, **options)
+
+    full_options = {key: value for key, value in options.items() if key != 'dense_only'}
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0], **full_options)
+    expected = model.solution_summary(solution)
+    assert analytics.result() == {key: expected[key] for key in analytics.result()}
+
+
+def test_iter_fall_consume_matches_simulate_fall():
+    """consume собирает блоки iter_fall и возвращает итог прогона"""
+    model = earth_model()
+    analytics = FlightAnalytics.from_model(model)
+    summary = analytics.consume(model.iter_fall(300e3, [500.0, 0.0, 0.0], chunk_size=7))
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0], cancel=threading.Event())
+
+    assert summary['impacted']
+    result = analytics.result()
+    assert result['n_points'] == len(solution.t)
+    assert result['flight_time'] == solution.t[-1]
+    assert result['max_velocity'] == np.linalg.norm(solution.y[3:6], axis=0).max()
+
+
+def test_peaks_match_direct_computation():
+    """Пиковые значения и их моменты совпадают с расчётом по всей траектории"""
+    model = earth_model()
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0])
+    analytics = FlightAnalytics.from_model(model, nose_radius=0.5)
+    for start in range(0, len(solution.t), 10):
+        analytics.update(solution.t[start:start + 10], solution.y[:, start:start + 10])
+    result = analytics.result()
+
+    altitude = np.linalg.norm(solution.y[0:3], axis=0) - model.body_params['radius']
+    speed = np.linalg.norm(solution.y[3:6], axis=0)
+    dynamic_pressure = 0.5 * model.atmosphere.density_array(altitude) * speed ** 2
+    deceleration = model.drag_coef * model.cross_area / model.mass * dynamic_pressure
+
+    assert result['max_dynamic_pressure'] == pytest.approx(dynamic_pressure.max(), rel=1e-12)
+    assert result['max_dynamic_pressure_time'] == solution.t[np.argmax(dynamic_pressure)]
+    assert result['max_g_load'] == pytest.approx(deceleration.max() / STANDARD_GRAVITY,
+                                                 rel=1e-12)
+    assert result['final_altitude'] == pytest.approx(0.0, abs=1e-3)
+    # Вход в атмосферу — линейная интерполяция между точками решения
+    assert result['atmosphere_entry_time'] == pytest.approx(solution.t_events[1][0], rel=1e-3)
+
+
+def test_start_inside_atmosphere_has_no_entry():
+    """Полёт, начатый в атмосфере, не даёт момента входа"""
+    model = earth_model()
+    analytics = FlightAnalytics.from_model(model)
+    model.simulate_fall(30e3, analytics=analytics)
+    assert analytics.result()['atmosphere_entry_time'] is None
+    assert analytics.result()['max_dynamic_pressure'] > 0
+
+
+def test_airless_body_and_empty_collector():
+    """У тела без атмосферы нагрузки нулевые; без точек result — ошибка"""
+    model = PlanetFall(body_name='mercury', verbose=False)
+    analytics = FlightAnalytics.from_model(model)
+    with pytest.raises(ValueError):
+        analytics.result()
+
+    model.simulate_fall(10e3, analytics=analytics)
+    result = analytics.result()
+    assert result['max_dynamic_pressure'] == result['max_heating_rate'] == 0.0
+    assert result['atmosphere_entry_time'] is None
+    assert result['max_velocity'] == result['final_velocity']
+
+    analytics.reset()
+    assert analytics.n_points == 0
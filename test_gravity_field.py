@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from celestial_bodies import CelestialBody
+from ensemble_planet import PlanetFallEnsemble
+from physics_planet import PlanetFall
+
+
+# Точки на орбитальных высотах вокруг Земли, включая полюс
+POSITIONS = np.array([[7.0e6, 0.0, 0.0],
+                      [4.1e6, -3.3e6, 4.8e6],
+                      [0.0, 0.0, 6.9e6],
+                      [-5.2e6, 2.7e6, -3.9e6]])
+
+
+def earth_field(order=None):
+    """Поле Земли до степени 3 (со всеми заданными тессеральными членами)"""
+    mu = 6.67430e-11 * CelestialBody.get_body_params('earth')['mass']
+    return CelestialBody.get_gravity_field('earth', mu, 3, order)
+
+
+def rotation(angle):
+    """Матрица поворота вокруг оси z на angle"""
+    cos, sin = np.cos(angle), np.sin(angle)
+    return np.array([[cos, -sin, 0.0], [sin, cos, 0.0], [0.0, 0.0, 1.0]])
+
+
+@pytest.mark.parametrize('angle', [0.3, -2.0, 4.0])
+def test_tesseral_terms_rotate_with_the_body(angle):
+    """Поле повёрнутого тела — повёрнутое поле в связанной с телом системе"""
+    field = earth_field()
+    turn = rotation(angle)
+    for position in POSITIONS:
+        rotated = field.acceleration(*(turn @ position), angle)
+        np.testing.assert_allclose(rotated, turn @ np.array(field.acceleration(*position)),
+                                   rtol=1e-13, atol=1e-18)
+
+    assert not np.allclose(field.acceleration(*POSITIONS[1], angle),
+                           field.acceleration(*POSITIONS[1]), rtol=1e-9, atol=0)
+
+
+def test_zonal_field_ignores_the_angle():
+    """Зональные члены от поворота вокруг оси z не зависят"""
+    field = earth_field(order=0)
+    for position in POSITIONS:
+        assert field.acceleration(*position, 1.2) == field.acceleration(*position)
+
+
+def test_array_angles_match_scalar_calls():
+    """Массив положений с массивом углов совпадает с поточечным расчётом"""
+    field = earth_field()
+    angles = np.array([0.0, 0.5, 1.5, -3.0])
+    expected = [field.acceleration(*position, angle)
+                for position, angle in zip(POSITIONS, angles)]
+    np.testing.assert_allclose(field.acceleration_array(POSITIONS, angles), expected,
+                               rtol=1e-14, atol=0)
+
+
+def test_gradient_rotates_with_the_body():
+    """∂a/∂r повёрнутого тела — R G(Rᵀr) Rᵀ"""
+    field = earth_field()
+    angle = 0.7
+    turn = rotation(angle)
+    position = POSITIONS[1]
+    np.testing.assert_allclose(field.gradient(turn @ position, angle),
+                               turn @ field.gradient(position) @ turn.T,
+                               rtol=1e-6, atol=1e-14)
+
+
+@pytest.mark.parametrize('enable_coriolis', [False, True])
+def test_model_turns_the_field_only_in_the_inertial_frame(enable_coriolis):
+    """Без силы Кориолиса поле повёрнуто на ω·t, во вращающейся системе — неподвижно"""
+    model = PlanetFall(body_name='earth', gravity_degree=3, enable_coriolis=enable_coriolis,
+                       verbose=False)
+    t = 3600.0
+    angle = 0.0 if enable_coriolis else model.planet_rotation_rate * t
+    for position in POSITIONS:
+        np.testing.assert_allclose(model.gravity_at_height(position, t),
+                                   model.gravity_field.acceleration(*position, angle),
+                                   rtol=1e-15, atol=0)
+        state = np.concatenate([position, [0.0, 0.0, 0.0]])
+        np.testing.assert_allclose(model.equations_of_motion_fast(t, state),
+                                   model.equations_of_motion(t, state), rtol=1e-12, atol=1e-15)
+
+
+def test_jacobian_follows_the_rotated_field():
+    """Якобиан в момент t совпадает с разностной производной правой части"""
+    model = PlanetFall(body_name='earth', gravity_degree=3, verbose=False)
+    t = 5000.0
+    state = np.concatenate([POSITIONS[1], [1000.0, 6000.0, -2000.0]])
+    step = 1.0
+    expected = np.empty((6, 6))
+    for j in range(6):
+        shift = np.zeros(6)
+        shift[j] = step
+        expected[:, j] = (np.array(model.equations_of_motion_fast(t, state + shift))
+                          - np.array(model.equations_of_motion_fast(t, state - shift))) / (2 * step)
+    np.testing.assert_allclose(model.jacobian(t, state), expected, rtol=1e-5, atol=1e-15)
+
+
+def test_ensemble_matches_scalar_run_with_tesseral_terms():
+    """Ансамбль поворачивает поле так же, как одиночный расчёт"""
+    policies = {'atmosphere': {'rtol': 1e-8, 'atol': 1e-10, 'max_step': 10}}
+    model = PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, gravity_degree=3,
+                       verbose=False)
+    solution = model.simulate_fall(30e3, [200.0, 0.0, 0.0], segmented=False, policies=policies)
+    ensemble = PlanetFallEnsemble('earth', drag_coef=2.0, cross_area=2.0, gravity_degree=3)
+    results = ensemble.simulate([30e3], [200.0, 0.0, 0.0])
+
+    # Последовательности шагов расходятся и без поворота (до 1e-4 м), поворот
+    # поля за время падения смещает точку удара на 2e-3 м
+    assert results['final_time'][0] == pytest.approx(solution.t[-1], abs=1e-5)
+    np.testing.assert_allclose(results['final_state'][0], solution.y[:, -1], rtol=0, atol=5e-4)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from integrators import INTEGRATORS, integrate
+from kepler import orbit_period
+
+
+# Гравитационный параметр Земли (м³/с²) для задачи двух тел
+MU = 3.986004418e14
+
+# Начальное состояние наклонной эллиптической орбиты
+ORBIT_POSITION = np.array([7.0e6, 0.0, 0.0])
+ORBIT_VELOCITY = np.array([0.0, 7.0e3, 1.0e3])
+
+
+def two_body_rhs(t, state):
+    """Правая часть задачи двух тел"""
+    position = state[0:3]
+    acceleration = -MU * position / np.linalg.norm(position) ** 3
+    return np.concatenate([state[3:6], acceleration])
+
+
+def specific_energy(y):
+    """Удельная энергия v²/2 - μ/r для состояний формы (6, n)"""
+    return 0.5 * np.sum(y[3:6] ** 2, axis=0) - MU / np.linalg.norm(y[0:3], axis=0)
+
+
+@pytest.mark.parametrize('method, step, tolerance', [('verlet', 5.0, 1e-5),
+                                                     ('yoshida4', 20.0, 1e-6)])
+def test_symplectic_energy_error_is_bounded(method, step, tolerance):
+    """Ошибка энергии симплектических схем мала и не растёт от витка к витку"""
+    initial_state = np.concatenate([ORBIT_POSITION, ORBIT_VELOCITY])
+    t_end = 10 * orbit_period(ORBIT_POSITION, ORBIT_VELOCITY, MU)
+    solution = integrate(two_body_rhs, (0, t_end), initial_state, method=method,
+                         fixed_step=step)
+
+    energy = specific_energy(solution.y)
+    drift = np.abs(energy / energy[0] - 1)
+    half = len(drift) // 2
+    assert drift.max() < tolerance
+    assert drift[half:].max() <= 1.01 * drift[:half].max()
+
+
+@pytest.mark.parametrize('method', [name for name, info in INTEGRATORS.items()
+                                    if info['kind'] == 'fixed'])
+def test_fixed_step_schemes_converge_with_their_order(method):
+    """Ошибка через виток убывает при делении шага пополам как 2^order"""
+    initial_state = np.concatenate([ORBIT_POSITION, ORBIT_VELOCITY])
+    period = orbit_period(ORBIT_POSITION, ORBIT_VELOCITY, MU)
+    errors = []
+    for step in (period / 400, period / 800):
+        solution = integrate(two_body_rhs, (0, period), initial_state, method=method,
+                             fixed_step=step)
+        errors.append(np.linalg.norm(solution.y[0:3, -1] - ORBIT_POSITION))
+    order = np.log2(errors[0] / errors[1])
+    assert order == pytest.approx(INTEGRATORS[method]['order'], abs=0.3)
+
+
+def test_fixed_step_event_stops_on_crossing():
+    """Терминальное событие уточняется внутри шага и завершает расчёт"""
+    target_radius = 6.9e6
+    velocity = np.array([-500.0, 7.0e3, 0.0])
+
+    def crossing(t, state):
+        return np.linalg.norm(state[0:3]) - target_radius
+
+    crossing.terminal = True
+    crossing.direction = -1
+    solution = integrate(two_body_rhs, (0, 1e4), np.concatenate([ORBIT_POSITION, velocity]),
+                         method='rk4', fixed_step=5.0, events=[crossing])
+
+    assert solution.status == 1
+    assert len(solution.t_events[0]) == 1
+    assert solution.t[-1] == solution.t_events[0][0]
+    assert np.linalg.norm(solution.y_events[0][0][0:3]) == pytest.approx(target_radius,
+                                                                          rel=1e-9)
+
+
+def test_unknown_integrator_is_rejected():
+    """Неизвестное имя метода — ValueError, а не расчёт методом по умолчанию"""
+    with pytest.raises(ValueError):
+        integrate(two_body_rhs, (0, 1), np.concatenate([ORBIT_POSITION, ORBIT_VELOCITY]),
+                  method='euler')
@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from kepler import orbit_period, propagate, time_to_radius
+from physics_planet import PlanetFall
+
+
+# Гравитационный параметр Земли (м³/с²) для задачи двух тел
+MU = 3.986004418e14
+
+# Начальное положение на орбите
+ORBIT_POSITION = np.array([7.0e6, 0.0, 0.0])
+
+# Жёсткие допуски эталонного численного решения: его собственная ошибка —
+# единицы микрометров, поэтому сравнение идёт с допуском 1e-9 от радиуса
+REFERENCE_OPTIONS = {'method': 'DOP853', 'rtol': 1e-13, 'atol': 1e-9}
+
+
+def two_body_rhs(t, state):
+    """Правая часть задачи двух тел"""
+    position = state[0:3]
+    acceleration = -MU * position / np.linalg.norm(position) ** 3
+    return np.concatenate([state[3:6], acceleration])
+
+
+@pytest.mark.parametrize('velocity, t_end', [
+    ([0.0, 7.0e3, 1.0e3], 6000.0),     # эллипс
+    ([0.0, 7.0e3, 1.0e3], 3 * 5900.0),  # больше витка (приведение по периоду)
+    ([0.0, 12.0e3, 0.0], 3000.0),      # гипербола
+    ([-2.0e3, 1.0e3, 0.0], 600.0),     # почти радиальное падение
+])
+def test_propagate_matches_numerical_integration(velocity, t_end):
+    """Аналитическое решение совпадает с численным в пределах 1e-9 относительно"""
+    velocity = np.array(velocity)
+    times = np.linspace(0, t_end, 7)
+    reference = solve_ivp(two_body_rhs, (0, t_end), np.concatenate([ORBIT_POSITION, velocity]),
+                          t_eval=times, **REFERENCE_OPTIONS)
+
+    positions, velocities = propagate(ORBIT_POSITION, velocity, times, MU)
+    radius = np.linalg.norm(ORBIT_POSITION)
+    np.testing.assert_allclose(positions.T, reference.y[0:3], rtol=0, atol=1e-9 * radius)
+    np.testing.assert_allclose(velocities.T, reference.y[3:6], rtol=0,
+                               atol=1e-9 * np.linalg.norm(velocity) * 10)
+
+
+@pytest.mark.parametrize('velocity', [[-500.0, 7.0e3, 0.0], [-3.0e3, 11.0e3, 0.0]])
+def test_time_to_radius_matches_event(velocity):
+    """Время до сферы совпадает с событием численного решения (эллипс и гипербола)"""
+    velocity = np.array(velocity)
+    target_radius = 6.9e6
+
+    def crossing(t, state):
+        return np.linalg.norm(state[0:3]) - target_radius
+
+    crossing.terminal = True
+    crossing.direction = -1
+    reference = solve_ivp(two_body_rhs, (0, 1e4), np.concatenate([ORBIT_POSITION, velocity]),
+                          events=crossing, **REFERENCE_OPTIONS)
+
+    expected = reference.t_events[0][0]
+    assert time_to_radius(ORBIT_POSITION, velocity, MU, target_radius) == pytest.approx(
+        expected, rel=1e-9)
+
+
+def test_time_to_radius_misses_sphere():
+    """Орбита с перицентром выше сферы и уход от неё — бесконечное время"""
+    assert time_to_radius(ORBIT_POSITION, [0.0, 8.0e3, 0.0], MU, 6.9e6) == math.inf
+    assert time_to_radius(ORBIT_POSITION, [1.0e3, 12.0e3, 0.0], MU, 6.9e6) == math.inf
+    assert orbit_period(ORBIT_POSITION, [0.0, 12.0e3, 0.0], MU) == math.inf
+
+
+@pytest.mark.parametrize('body_name, altitude, velocity', [
+    ('mercury', 200e3, [1500.0, 0.0, 0.0]),
+    ('earth', 400e3, [3000.0, 0.0, 0.0]),
+])
+def test_analytic_vacuum_matches_numeric_path(body_name, altitude, velocity):
+    """Аналитический вакуумный участок даёт те же события, что и численный"""
+    policies = {phase: {'rtol': 1e-11, 'atol': 1e-9, 'max_step': np.inf if phase == 'vacuum'
+                        else 10} for phase in ('vacuum', 'atmosphere')}
+    model = PlanetFall(body_name=body_name, drag_coef=2.0, cross_area=2.0, verbose=False)
+    analytic = model.simulate_fall(altitude, velocity, policies=policies)
+    numeric = model.simulate_fall(altitude, velocity, policies=policies, analytic_vacuum=False)
+
+    assert analytic.phases[0]['method'] == 'kepler'
+    assert analytic.phases[0]['nfev'] == 0
+    assert len(analytic.t_events) == len(numeric.t_events) == 2
+    for analytic_times, numeric_times in zip(analytic.t_events, numeric.t_events):
+        np.testing.assert_allclose(analytic_times, numeric_times, rtol=1e-8)
+    np.testing.assert_allclose(analytic.y[:, -1], numeric.y[:, -1], rtol=1e-6, atol=1e-3)
+
+
+@pytest.mark.parametrize('options', [{}, {'analytic_vacuum': False}, {'segmented': False},
+                                     {'method': 'rk4'}])
+def test_airless_event_layout(options):
+    """У тела без атмосферы на любом пути два списка событий, второй пуст"""
+    model = PlanetFall(body_name='mercury', verbose=False)
+    solution = model.simulate_fall(50e3, [100.0, 0.0, 0.0], **options)
+    assert len(solution.t_events) == len(solution.y_events) == 2
+    assert len(solution.t_events[0]) == 1
+    assert solution.t_events[1].shape == (0,)
+    assert solution.y_events[1].shape == (0, 6)
@@ -0,0 +1,237 @@
+import threading
+
+import numpy as np
+import pytest
+
+from physics_planet import PlanetFall, SimulationCancelled
+
+
+# Состояния в атмосфере, над ней и под поверхностью (относительно радиуса тела)
+STATE_HEIGHTS = (30e3, 90e3, 500e3, -1.0)
+
+
+def states_for(model, velocity=(1200.0, -300.0, -800.0)):
+    """Набор состояний [x, y, z, vx, vy, vz] на высотах STATE_HEIGHTS"""
+    direction = np.array([0.3, -0.5, 0.8]) / np.linalg.norm([0.3, -0.5, 0.8])
+    radius = model.body_params['radius']
+    return [np.concatenate([direction * (radius + height), velocity])
+            for height in STATE_HEIGHTS]
+
+
+@pytest.mark.parametrize('body_name, options', [
+    ('earth', {}),
+    ('earth', {'enable_coriolis': True}),
+    ('venus', {'drag_coef': 2.0, 'cross_area': 3.0, 'mass': 50.0}),
+    ('mercury', {}),
+    ('jupiter', {'gravity_degree': 4}),
+])
+def test_fused_rhs_matches_reference(body_name, options):
+    """Быстрая правая часть совпадает с покомпонентной equations_of_motion"""
+    model = PlanetFall(body_name=body_name, verbose=False, **options)
+    for state in states_for(model):
+        np.testing.assert_allclose(model.equations_of_motion_fast(0.0, state),
+                                   model.equations_of_motion(0.0, state),
+                                   rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('name, value', [('mass', 10.0), ('cross_area', 5.0),
+                                         ('drag_coef', 1.5), ('enable_coriolis', True),
+                                         ('planet_rotation_rate', 1e-3)])
+def test_parameter_change_refreshes_constants(name, value):
+    """Запись параметра после создания сразу меняет быструю правую часть"""
+    model = PlanetFall(body_name='earth', enable_coriolis=name == 'planet_rotation_rate',
+                       verbose=False)
+    state = states_for(model)[0]
+    before = np.array(model.equations_of_motion_fast(0.0, state))
+
+    setattr(model, name, value)
+    after = np.array(model.equations_of_motion_fast(0.0, state))
+    assert not np.allclose(after, before, rtol=1e-12, atol=0)
+    np.testing.assert_allclose(after, model.equations_of_motion(0.0, state),
+                               rtol=1e-12, atol=1e-12)
+
+
+def test_simulate_fall_picks_up_body_params_change():
+    """Изменение body_params в обход свойств учитывается при следующем запуске"""
+    model = PlanetFall(body_name='mercury', verbose=False)
+    model.body_params = dict(model.body_params, mass=2 * model.body_params['mass'])
+    heavier = model.simulate_fall(10e3)
+    reference = PlanetFall(body_name='mercury', verbose=False).simulate_fall(10e3)
+    # Время падения с малой высоты обратно пропорционально √g
+    assert heavier.t[-1] == pytest.approx(reference.t[-1] / np.sqrt(2), rel=1e-3)
+
+
+def test_segments_split_at_the_interface():
+    """Участки вакуум → атмосфера, пересечение — ровно на границе атмосферы"""
+    model = PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, verbose=False)
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0], stiff_method=None)
+
+    assert [phase['phase'] for phase in solution.phases] == ['vacuum', 'atmosphere']
+    assert len(solution.t_events[1]) == 1
+    crossing = solution.y_events[1][0]
+    assert np.linalg.norm(crossing[0:3]) == pytest.approx(model.interface_radius(), rel=1e-9)
+    assert solution.phases[1]['t_start'] == solution.t_events[1][0]
+
+
+def test_segmented_run_matches_single_run():
+    """Разбиение на участки не меняет решение (при одинаковых допусках)"""
+    policies = {phase: {'rtol': 1e-10, 'atol': 1e-8, 'max_step': 10}
+                for phase in ('vacuum', 'atmosphere')}
+    model = PlanetFall(body_name='mars', drag_coef=2.0, cross_area=2.0, verbose=False)
+    segmented = model.simulate_fall(40e3, [300.0, 0.0, 0.0], policies=policies,
+                                    analytic_vacuum=False, stiff_method=None)
+    single = model.simulate_fall(40e3, [300.0, 0.0, 0.0], policies=policies,
+                                 segmented=False)
+
+    assert len(segmented.phases) == 2
+    assert segmented.t[-1] == pytest.approx(single.t[-1], rel=1e-8)
+    np.testing.assert_allclose(segmented.y[:, -1], single.y[:, -1], rtol=1e-6, atol=1e-3)
+
+
+def test_grazing_pass_leaves_the_atmosphere():
+    """Пролёт через верхние слои: вход и выход, участки чередуются"""
+    model = PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, mass=5000,
+                       verbose=False)
+    radius = model.body_params['radius']
+    # Перицентр ~90 км: вход и выход из атмосферы без удара за полвитка
+    speed = np.sqrt(model._mu * 2 * (radius + 90e3) / ((radius + 300e3) * (2 * radius + 390e3)))
+    solution = model.simulate_fall(300e3, [speed, 0.0, 0.0], max_time=4000)
+
+    assert len(solution.t_events[0]) == 0
+    assert len(solution.t_events[1]) == 2
+    assert [phase['phase'] for phase in solution.phases] == ['vacuum', 'atmosphere', 'vacuum']
+
+
+def test_custom_atmosphere_top_drives_both_paths():
+    """Граница берётся из таблицы плотности и в обычном, и в потоковом расчёте"""
+    from atmosphere import ExponentialAtmosphere
+    import threading
+
+    model = PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, verbose=False)
+    model.atmosphere = ExponentialAtmosphere(1.225, 8500.0, 60e3)
+    model.precompute_constants()
+    assert model.interface_radius() == model.body_params['radius'] + 60e3
+
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0])
+    streamed = model.simulate_fall(300e3, [500.0, 0.0, 0.0], cancel=threading.Event())
+    for result in (solution, streamed):
+        assert np.linalg.norm(result.y_events[1][0][0:3]) == pytest.approx(
+            model.interface_radius(), rel=1e-9)
+    assert streamed.t_events[1][0] == pytest.approx(solution.t_events[1][0], rel=1e-9)
+
+
+def collect_chunks(stream):
+    """Блоки потока iter_fall и итог прогона (значение StopIteration)"""
+    chunks = []
+    while True:
+        try:
+            chunks.append(next(stream))
+        except StopIteration as stop:
+            return chunks, stop.value
+
+
+def test_iter_fall_chunks_form_the_full_trajectory():
+    """Склеенные блоки iter_fall — та же траектория, что у simulate_fall"""
+    import threading
+
+    model = PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, verbose=False)
+    chunks, summary = collect_chunks(model.iter_fall(300e3, [500.0, 0.0, 0.0], chunk_size=64))
+    # Тот же поток, собранный simulate_fall (путь с прерыванием)
+    streamed = model.simulate_fall(300e3, [500.0, 0.0, 0.0], cancel=threading.Event())
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0])
+
+    assert all(len(t) == 64 for t, _ in chunks[:-1])
+    assert 0 < len(chunks[-1][0]) <= 64
+    np.testing.assert_array_equal(np.concatenate([t for t, _ in chunks]), streamed.t)
+    np.testing.assert_array_equal(np.concatenate([y for _, y in chunks], axis=1), streamed.y)
+
+    assert summary['impacted'] and not summary['cancelled']
+    assert summary['t_end'] == chunks[-1][0][-1]
+    assert [phase['method'] for phase in summary['phases']] == [
+        phase['method'] for phase in solution.phases]
+    for times, expected in zip(summary['t_events'], solution.t_events):
+        np.testing.assert_allclose(times, expected, rtol=1e-8)
+
+
+@pytest.mark.parametrize('analytic_vacuum', [True, False])
+def test_iter_fall_stops_between_chunks(analytic_vacuum):
+    """После установки cancel выдача прекращается на ближайшем блоке"""
+    import threading
+
+    model = PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, verbose=False)
+    cancel = threading.Event()
+    stream = model.iter_fall(300e3, [500.0, 0.0, 0.0], chunk_size=32, cancel=cancel,
+                             analytic_vacuum=analytic_vacuum)
+    first = next(stream)
+    cancel.set()
+    chunks, summary = collect_chunks(stream)
+
+    assert chunks == []
+    assert summary['cancelled'] and not summary['impacted']
+    assert summary['t_end'] == first[0][-1]
+
+
+# Пути расчёта: потоковый по участкам, численный вакуум, без разбиения,
+# схема с постоянным шагом
+RUN_PATHS = [{}, {'analytic_vacuum': False}, {'segmented': False}, {'method': 'rk4'}]
+
+
+@pytest.mark.parametrize('options', RUN_PATHS)
+def test_cancel_raises_on_every_path(options):
+    """Установленный cancel прерывает simulate_fall исключением SimulationCancelled"""
+    model = PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, verbose=False)
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(SimulationCancelled):
+        model.simulate_fall(300e3, [500.0, 0.0, 0.0], cancel=cancel, **options)
+
+
+@pytest.mark.parametrize('options', RUN_PATHS)
+def test_progress_reaches_the_final_state(options):
+    """progress вызывается по ходу расчёта, последний вызов — в конечной точке"""
+    model = PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, verbose=False)
+    reports = []
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0],
+                                   progress=lambda t, state: reports.append((t, state.copy())),
+                                   **options)
+
+    assert len(reports) > 1
+    assert reports[-1][0] == solution.t[-1]
+    np.testing.assert_array_equal(reports[-1][1], solution.y[:, -1])
+    assert solution.status == 1
+
+
+def venus_drop_model():
+    """Падение на Венеру: установившийся спуск в плотной атмосфере жёсткий"""
+    return PlanetFall(body_name='venus', mass=1000.0, cross_area=2.0, drag_coef=2.0,
+                      verbose=False)
+
+
+def test_stiffness_plan_picks_method_at_segment_start():
+    """Жёсткий метод выбирается сразу, если stiffness_bound уже выше порога"""
+    from physics_planet import PHASE_POLICIES, stiffness_reference_step
+
+    step = stiffness_reference_step(PHASE_POLICIES['atmosphere'])
+    venus = venus_drop_model()
+    radius = venus.body_params['radius']
+    assert venus.stiffness_plan(np.array([radius + 100e3, 0, 0, 0, 0, 0.0]), step) \
+        == (True, False)
+
+    mars = PlanetFall(body_name='mars', mass=1000.0, cross_area=2.0, drag_coef=2.0,
+                      verbose=False)
+    radius = mars.body_params['radius']
+    assert mars.stiffness_plan(np.array([radius + 5e3, 0, 0, 0, 0, 0.0]), step) \
+        == (False, False)
+
+
+@pytest.mark.parametrize('options', [{}, {'cancel': threading.Event()}])
+def test_stiff_descent_runs_on_the_stiff_method(options):
+    """Спуск в плотной атмосфере идёт одним участком LSODA и дешевле RK45"""
+    model = venus_drop_model()
+    solution = model.simulate_fall(100e3, max_time=3600, **options)
+    explicit = model.simulate_fall(100e3, max_time=3600, stiff_method=None, **options)
+
+    assert [phase['method'] for phase in solution.phases] == ['LSODA']
+    assert [phase['method'] for phase in explicit.phases] == ['RK45']
+    assert 5 * solution.nfev < explicit.nfev
+    np.testing.assert_allclose(solution.y[:, -1], explicit.y[:, -1], rtol=1e-6, atol=1e-3)
@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+from scipy.optimize import OptimizeResult
+
+from physics_planet import PlanetFall
+from sim_cache import SimulationCache, canonical_key
+
+
+def fake_solution(n_points, value=0.0):
+    """Решение с полями simulate_fall из n_points точек"""
+    return OptimizeResult(
+        t=np.linspace(0, 1, n_points), y=np.full((6, n_points), value), sol=None,
+        t_events=[np.array([1.0]), np.empty(0)], y_events=[np.ones((1, 6)), np.empty((0, 6))],
+        nfev=10, njev=0, nlu=0, status=1, message='A termination event occurred.',
+        success=True, phases=[{'phase': 'atmosphere', 't_start': 0.0, 't_end': 1.0}],
+    )
+
+
+def earth_model(**parameters):
+    """Модель падения на Землю с сопротивлением (без вывода в консоль)"""
+    options = {'drag_coef': 1.0, 'cross_area': 1.0, 'mass': 500.0}
+    options.update(parameters)
+    return PlanetFall(body_name='earth', verbose=False, **options)
+
+
+def test_canonical_key_ignores_dict_order_and_container_type():
+    """Ключ не зависит от порядка ключей словаря и от вида массива (список, NumPy)"""
+    first = canonical_key({'a': 1.0, 'b': [1, 2], 'c': np.array([0.5, 2.0])})
+    second = canonical_key({'c': [0.5, 2.0], 'b': np.array([1, 2]), 'a': 1.0})
+    assert first == second
+    assert canonical_key({'a': 1.0 + 1e-9}) != canonical_key({'a': 1.0})
+
+
+def test_cache_hit_and_miss_after_attribute_change():
+    """Изменение параметра модели после создания даёт промах, а не старый результат"""
+    cache = SimulationCache()
+    model = earth_model()
+
+    first = model.simulate_fall(120e3, [300.0, 0.0, 0.0], cache=cache)
+    again = model.simulate_fall(120e3, [300.0, 0.0, 0.0], cache=cache)
+    assert not first.cache_hit
+    assert again.cache_hit
+    np.testing.assert_array_equal(again.y, first.y)
+
+    model.drag_coef = 2.0
+    changed = model.simulate_fall(120e3, [300.0, 0.0, 0.0], cache=cache)
+    assert not changed.cache_hit
+    assert changed.summary['final_velocity'] != first.summary['final_velocity']
+
+    # Новая модель с теми же параметрами попадает в запись изменённой
+    same = earth_model(drag_coef=2.0).simulate_fall(120e3, [300.0, 0.0, 0.0], cache=cache)
+    assert same.cache_hit
+    assert same.cache_key == changed.cache_key
+
+
+def test_memory_tier_evicts_least_recently_used():
+    """LRU в памяти держит объём в пределах max_bytes и вытесняет старые записи"""
+    entry_bytes = fake_solution(100).y.nbytes + fake_solution(100).t.nbytes
+    cache = SimulationCache(max_bytes=int(2.5 * entry_bytes))
+    for key in ('a', 'b'):
+        cache.put(key, fake_solution(100))
+    assert cache.get('a') is not None
+    cache.put('c', fake_solution(100))
+
+    assert 'a' in cache and 'c' in cache
+    assert 'b' not in cache
+    assert cache.current_bytes <= cache.max_bytes
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    """Запись с диска читается новым экземпляром вместе с метаданными"""
+    SimulationCache(cache_dir=str(tmp_path)).put('ab12', fake_solution(50, 3.0), {'energy': 1.5})
+
+    cache = SimulationCache(cache_dir=str(tmp_path))
+    solution, metadata = cache.get('ab12')
+    assert cache.disk_hits == 1
+    assert metadata == {'energy': 1.5}
+    np.testing.assert_array_equal(solution.y, np.full((6, 50), 3.0))
+    assert [len(times) for times in solution.t_events] == [1, 0]
+    assert not solution.y.flags.writeable
+
+
+def test_disk_tier_is_capped_by_oldest_use(tmp_path):
+    """Сверх max_disk_bytes удаляются файлы, которые дольше всего не читались"""
+    cache = SimulationCache(cache_dir=str(tmp_path), max_disk_bytes=10 ** 9)
+    for i, key in enumerate(('k1', 'k2', 'k3')):
+        cache.put(key, fake_solution(2000, float(i)))
+        os.utime(cache._disk_path(key), (1000.0 + i, 1000.0 + i))
+    file_bytes = os.path.getsize(cache._disk_path('k1'))
+
+    # Чтение k1 делает его самым свежим: вытесняется k2
+    cache.clear()
+    assert cache.get('k1') is not None
+    cache.max_disk_bytes = int(3.5 * file_bytes)
+    cache.put('k4', fake_solution(2000, 4.0))
+
+    assert not os.path.exists(cache._disk_path('k2'))
+    for key in ('k1', 'k3', 'k4'):
+        assert os.path.exists(cache._disk_path(key))
+    assert cache.disk_bytes() <= cache.max_disk_bytes
@@ -0,0 +1,44 @@
+import numpy as np
+
+from sweep import SweepCase, build_sweep_grid, run_case, run_sweep
+
+
+def test_grid_is_cartesian_product():
+    """Сетка содержит все сочетания параметров"""
+    cases = build_sweep_grid(bodies=['mars', 'mercury'], masses=(10, 100, 1000),
+                             initial_altitudes=(1e3, 2e3))
+    assert len(cases) == 2 * 3 * 2
+    assert len(set(cases)) == len(cases)
+
+
+def test_case_without_impact_has_no_impact_point():
+    """Без удара время, скорость, координаты и энергия удара — NaN"""
+    case = SweepCase('mercury', 1000, 1.0, None, 100e3, 'orbital')
+    row = np.array(run_case(case, max_time=100), dtype=object)
+    impact_time, impact_speed, latitude, longitude, energy, flight_time, impacted, failed = row
+    assert not impacted and not failed
+    assert np.isnan([impact_time, impact_speed, latitude, longitude, energy]).all()
+    assert flight_time == 100
+
+
+def test_vertical_drop_hits_below_start():
+    """Вертикальное падение приходит в точку под стартом (северный полюс)"""
+    row = run_case(SweepCase('mercury', 1000, 1.0, None, 10e3, 'zero'))
+    assert row[6]
+    assert row[2] == 90.0
+    assert row[0] == row[5]
+
+
+def test_parallel_sweep_matches_serial_runs():
+    """Результаты из разделяемой таблицы совпадают с последовательным расчётом"""
+    cases = [SweepCase('mercury', 1000, 1.0, None, 10e3, 'zero'),
+             SweepCase('mars', 500, 2.0, None, 20e3, 100.0),
+             SweepCase('mercury', 1000, 1.0, None, 100e3, 'orbital'),
+             SweepCase('mercury', 1000, 1.0, None, 10e3, 'sideways')]
+    results = run_sweep(cases, max_workers=2, chunk_size=1, max_time=600)
+
+    assert results['failed'].tolist() == [False, False, False, True]
+    for row, case in zip(results[:3], cases[:3]):
+        expected = np.array(run_case(case, max_time=600), dtype=results.dtype)
+        for field in results.dtype.names:
+            np.testing.assert_array_equal(row[field], expected[field])
@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+import pytest
+
+from physics_planet import PlanetFall
+
+
+# Пути расчёта: аналитический и численный вакуум, постоянный шаг,
+# без разбиения на участки, потоковый (с cancel)
+RUN_PATHS = [{}, {'analytic_vacuum': False}, {'method': 'rk4'}, {'segmented': False},
+             {'cancel': threading.Event()}]
+
+# Эталон с жёсткими допусками для проверки точности между узлами
+TIGHT_POLICIES = {phase: {'rtol': 1e-11, 'atol': 1e-9,
+                          'max_step': np.inf if phase == 'vacuum' else 10}
+                  for phase in ('vacuum', 'atmosphere')}
+
+
+def earth_model():
+    """Модель падения на Землю с сопротивлением (без вывода в консоль)"""
+    return PlanetFall(body_name='earth', drag_coef=2.0, cross_area=2.0, verbose=False)
+
+
+@pytest.mark.parametrize('options', RUN_PATHS)
+def test_dense_trajectory_passes_through_nodes(options):
+    """sol совпадает с решением в узлах и находит удар и вход в атмосферу"""
+    model = earth_model()
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0], dense_output=True, **options)
+    radius = model.body_params['radius']
+
+    np.testing.assert_allclose(solution.sol(solution.t), solution.y, rtol=1e-12, atol=1e-6)
+    assert solution.sol.t_min == solution.t[0] and solution.sol.t_max == solution.t[-1]
+    # Удар уточняется с допуском по времени, поэтому берётся высота 10 м над ним
+    low_pass = solution.sol.altitude_crossings(radius, 10.0, -1)
+    assert len(low_pass) == 1
+    assert 0 < solution.t_events[0][0] - low_pass[0] < 1.0
+    entry = solution.sol.altitude_crossings(radius, model.interface_radius() - radius, -1)
+    assert entry == pytest.approx(model.simulate_fall(300e3, [500.0, 0.0, 0.0]).t_events[1],
+                                  rel=1e-8)
+
+
+@pytest.mark.parametrize('method', ['RK45', 'rk4'])
+def test_dense_trajectory_between_nodes(method):
+    """Между узлами ошибка интерполянта того же порядка, что в самих узлах"""
+    model = earth_model()
+    reference = model.simulate_fall(300e3, [500.0, 0.0, 0.0], dense_output=True,
+                                    policies=TIGHT_POLICIES, stiff_method=None)
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0], dense_output=True, method=method)
+
+    nodes = solution.t[solution.t < reference.t[-1]]
+    midpoints = (nodes[1:] + nodes[:-1]) / 2
+    node_error = np.abs(solution.y[0:3, :len(nodes)] - reference.sol.position(nodes)).max()
+    midpoint_error = np.abs(solution.sol.position(midpoints)
+                            - reference.sol.position(midpoints)).max()
+    assert midpoint_error <= 5 * node_error + 1e-3
+
+
+def test_resample_on_uniform_grid():
+    """Равномерная выборка по числу точек или шагу; без них — ошибка"""
+    solution = earth_model().simulate_fall(300e3, [500.0, 0.0, 0.0], dense_output=True)
+    t, y = solution.sol.resample(n_points=11)
+    np.testing.assert_allclose(t, np.linspace(solution.t[0], solution.t[-1], 11))
+    np.testing.assert_array_equal(y, solution.sol(t))
+
+    t, _ = solution.sol.resample(dt=10.0)
+    assert t[1] - t[0] == 10.0 and t[-1] <= solution.t[-1] < t[-1] + 10.0
+    with pytest.raises(ValueError):
+        solution.sol.resample()
+
+
+@pytest.mark.parametrize('options', RUN_PATHS)
+def test_dense_only_keeps_phase_nodes(options):
+    """С dense_only в t остаются концы участков, конец полёта тот же"""
+    model = earth_model()
+    solution = model.simulate_fall(300e3, [500.0, 0.0, 0.0], dense_output=True, **options)
+    compact = model.simulate_fall(300e3, [500.0, 0.0, 0.0], dense_only=True, **options)
+
+    expected_nodes = [phase['t_start'] for phase in compact.phases] + [solution.t[-1]]
+    np.testing.assert_array_equal(compact.t, expected_nodes)
+    np.testing.assert_allclose(compact.y, compact.sol(compact.t), rtol=1e-14, atol=1e-9)
+    np.testing.assert_allclose(compact.y[:, -1], solution.y[:, -1], rtol=1e-14, atol=1e-9)
+    for times, expected in zip(compact.t_events, solution.t_events):
+        np.testing.assert_array_equal(times, expected)
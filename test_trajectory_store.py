@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+from physics_planet import PlanetFall
+from trajectory_store import TrajectoryStore, TrajectoryStoreWriter
+
+
+def random_runs(lengths, seed=0):
+    """Запуски (t, y) заданных длин со случайными состояниями"""
+    rng = np.random.default_rng(seed)
+    return [(np.sort(rng.uniform(0, 100, n)), rng.normal(size=(6, n)) * 1e6) for n in lengths]
+
+
+def test_round_trip(tmp_path):
+    """Запуски читаются из хранилища без изменений вместе с метаданными"""
+    runs = random_runs((17, 1, 40))
+    path = tmp_path / 'runs.pftraj'
+
+    with TrajectoryStoreWriter(str(path), metadata={'body': 'earth'}) as writer:
+        for i, (t, y) in enumerate(runs):
+            assert writer.append(t, y, metadata={'run': i}) == i
+
+    store = TrajectoryStore(str(path))
+    assert len(store) == len(runs)
+    assert store.metadata == {'body': 'earth'}
+    for i, (t, y) in enumerate(runs):
+        stored_t, stored_y = store[i]
+        np.testing.assert_array_equal(stored_t, t)
+        np.testing.assert_array_equal(stored_y, y)
+        assert store.run_metadata(i) == {'run': i}
+    assert store.run_metadata() == [{'run': i} for i in range(len(runs))]
+
+
+def test_columns_span_all_runs(tmp_path):
+    """Столбец содержит точки всех запусков подряд, срез запуска — без копии"""
+    runs = random_runs((5, 8))
+    path = str(tmp_path / 'runs.pftraj')
+    with TrajectoryStoreWriter(path) as writer:
+        for t, y in runs:
+            writer.append(t, y)
+
+    store = TrajectoryStore(path)
+    np.testing.assert_array_equal(store.column('vz'), np.concatenate([y[5] for _, y in runs]))
+    assert isinstance(store.run(1, columns=('t',))['t'], np.memmap)
+    assert set(store.run(0, columns=('x', 'y'))) == {'x', 'y'}
+
+
+def test_float32_positions_and_solutions(tmp_path):
+    """Координаты float32 сохраняются с точностью до метра, скорости — точно"""
+    model = PlanetFall(body_name='mercury', verbose=False)
+    solution = model.simulate_fall(20e3, [100.0, 0.0, 0.0])
+    path = str(tmp_path / 'runs.pftraj')
+    with TrajectoryStoreWriter(path, position_dtype=np.float32) as writer:
+        writer.append_solution(solution, metadata={'altitude': 20e3})
+
+    t, y = TrajectoryStore(path)[0]
+    np.testing.assert_array_equal(t, solution.t)
+    np.testing.assert_allclose(y[0:3], solution.y[0:3], rtol=0, atol=1.0)
+    np.testing.assert_array_equal(y[3:6], solution.y[3:6])
+
+
+def test_failed_write_leaves_no_file(tmp_path):
+    """Ошибка внутри with удаляет временные файлы и не создаёт хранилище"""
+    path = tmp_path / 'runs.pftraj'
+    with pytest.raises(ValueError):
+        with TrajectoryStoreWriter(str(path)) as writer:
+            writer.append(np.arange(3.0), np.zeros((6, 4)))
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_rejects_foreign_file(tmp_path):
+    """Файл без сигнатуры хранилища не открывается"""
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not a trajectory store')
+    with pytest.raises(ValueError):
+        TrajectoryStore(str(path))
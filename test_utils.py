@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from utils import decimate_trajectory, optimize_trajectory_for_animation
+
+
+def random_walk(n_points, seed=0):
+    """Ломаная из n_points точек без прямолинейных участков"""
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(size=(3, n_points)), axis=1)
+
+
+def max_deviation(points, indices):
+    """Наибольшее отклонение исходных точек от прореженной ломаной"""
+    deviation = 0.0
+    for start, end in zip(indices[:-1], indices[1:]):
+        chord = points[:, end] - points[:, start]
+        offset = points[:, start:end + 1] - points[:, start:start + 1]
+        projection = np.clip(offset.T @ chord / max(chord @ chord, 1e-300), 0.0, 1.0)
+        deviation = max(deviation, np.linalg.norm(offset - np.outer(chord, projection),
+                                                  axis=0).max())
+    return deviation
+
+
+@pytest.mark.parametrize('method', ['rdp', 'uniform'])
+def test_short_trajectory_is_returned_unchanged(method):
+    """Траектория не длиннее max_points не прореживается"""
+    trajectory = random_walk(100)
+    time = np.arange(100.0)
+    optimized, optimized_time = optimize_trajectory_for_animation(trajectory, time,
+                                                                  max_points=100, method=method)
+    assert optimized is trajectory
+    assert optimized_time is time
+
+
+def test_decimation_respects_tolerance_and_kept_points():
+    """Отклонение не больше допуска, концы и заданные точки сохраняются"""
+    points = random_walk(2000)
+    indices = decimate_trajectory(points, 5.0, keep=[777])
+
+    assert indices[0] == 0 and indices[-1] == 1999
+    assert 777 in indices
+    assert np.all(np.diff(indices) > 0)
+    assert max_deviation(points, indices) <= 5.0
+
+
+def test_decimation_stops_past_max_points():
+    """С max_points уточнение обрывается сразу после превышения предела"""
+    points = random_walk(2000)
+    complete = decimate_trajectory(points, 0.1)
+    limited = decimate_trajectory(points, 0.1, max_points=50)
+    assert 50 < len(limited) < len(complete)
+
+
+def test_long_trajectory_fits_max_points():
+    """Длинная траектория прореживается до max_points, вход в атмосферу сохраняется"""
+    radius = 1000.0
+    angle = np.linspace(0, np.pi, 5000)
+    height = 200.0 * (1 - angle / np.pi)
+    trajectory = (radius + height) * np.array([np.cos(angle), np.sin(angle), 0 * angle])
+    time = np.linspace(0, 100, 5000)
+
+    optimized, optimized_time = optimize_trajectory_for_animation(
+        trajectory, time, max_points=40, body_radius=radius, atmosphere_height=50.0)
+    entry = np.flatnonzero(height <= 50.0)[0]
+
+    assert len(optimized_time) <= 40
+    assert time[entry] in optimized_time
+    assert optimized_time[0] == time[0] and optimized_time[-1] == time[-1]
+    np.testing.assert_array_equal(np.interp(optimized_time, time, trajectory[0]),
+                                  optimized[0])
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from physics_planet import PlanetFall
+
+
+# Политики шага для сравнения чувствительностей с конечными разностями
+TIGHT_POLICIES = {
+    'vacuum': {'rtol': 1e-11, 'atol': 1e-9, 'max_step': np.inf},
+    'atmosphere': {'rtol': 1e-11, 'atol': 1e-9, 'max_step': 10},
+}
+
+# Начальные условия: вход в атмосферу Земли с высоты 120 км
+ALTITUDE = 120e3
+VELOCITY = np.array([300.0, 0.0, -50.0])
+
+
+def earth_model(**parameters):
+    """Модель падения на Землю с сопротивлением (без вывода в консоль)"""
+    options = {'drag_coef': 1.0, 'cross_area': 1.0, 'mass': 500.0}
+    options.update(parameters)
+    return PlanetFall(body_name='earth', verbose=False, **options)
+
+
+def impact(model, initial_altitude=ALTITUDE, initial_velocity=VELOCITY):
+    """Конечное состояние и момент удара"""
+    result = model.simulate_fall(initial_altitude, initial_velocity, policies=TIGHT_POLICIES)
+    return result.y[:, -1], result.t[-1]
+
+
+def differences(plus, minus, step):
+    """Центральные разности конечного состояния и момента удара"""
+    (y_plus, t_plus), (y_minus, t_minus) = plus, minus
+    return (y_plus - y_minus) / (2 * step), (t_plus - t_minus) / (2 * step)
+
+
+def relative_error(difference, derivative):
+    """Наибольшее отклонение, отнесённое к наибольшей компоненте производной"""
+    derivative = np.asarray(derivative)
+    return np.abs(difference - derivative).max() / np.abs(derivative).max()
+
+
+@pytest.fixture(scope='module')
+def solution():
+    """Решение с чувствительностями в точке удара"""
+    result = earth_model().simulate_fall(ALTITUDE, VELOCITY, policies=TIGHT_POLICIES,
+                                         sensitivities=True)
+    assert len(result.t_events[0]) == 1
+    return result
+
+
+@pytest.mark.parametrize('name, step', [('mass', 0.5), ('cross_area', 0.01),
+                                        ('drag_coef', 0.01)])
+def test_drag_parameters_match_finite_differences(solution, name, step):
+    """Производные по m, A и Cd совпадают с центральными разностями (~1e-4)"""
+    value = getattr(earth_model(), name)
+    state, delay = differences(impact(earth_model(**{name: value + step})),
+                               impact(earth_model(**{name: value - step})), step)
+    assert relative_error(state, solution.sensitivities[name]) < 1e-4
+    assert relative_error(delay, solution.impact_time_sensitivities[name]) < 1e-4
+
+
+def test_initial_conditions_match_finite_differences(solution):
+    """Производные по высоте и скорости (матрица (6, 3)) совпадают с разностями"""
+    step = 20.0
+    state, delay = differences(impact(earth_model(), initial_altitude=ALTITUDE + step),
+                               impact(earth_model(), initial_altitude=ALTITUDE - step), step)
+    assert relative_error(state, solution.sensitivities['initial_altitude']) < 1e-4
+    assert relative_error(delay, solution.impact_time_sensitivities['initial_altitude']) < 1e-4
+
+    step = 0.1
+    states, delays = [], []
+    for shift in np.eye(3) * step:
+        state, delay = differences(impact(earth_model(), initial_velocity=VELOCITY + shift),
+                                   impact(earth_model(), initial_velocity=VELOCITY - shift),
+                                   step)
+        states.append(state)
+        delays.append(delay)
+    assert relative_error(np.array(states).T, solution.sensitivities['initial_velocity']) < 1e-4
+    assert relative_error(np.array(delays),
+                          solution.impact_time_sensitivities['initial_velocity']) < 1e-4
+
+
+@pytest.mark.parametrize('name', ['cross_area', 'drag_coef'])
+def test_zero_drag_parameter_gives_zero_derivatives(name):
+    """При нулевой площади или Cd производные по Cd и A нулевые, без деления на 0"""
+    solution = earth_model(**{name: 0.0}).simulate_fall(ALTITUDE, VELOCITY, sensitivities=True)
+    for parameter in ('cross_area', 'drag_coef'):
+        np.testing.assert_array_equal(solution.sensitivities[parameter], 0.0)
+        assert solution.impact_time_sensitivities[parameter] == 0.0
+    assert np.abs(solution.sensitivities['initial_altitude']).max() > 0
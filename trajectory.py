@@ -0,0 +1,170 @@
+import numpy as np
+from scipy.interpolate import CubicHermiteSpline
+from scipy.optimize import brentq
+
+import kepler
+
+
+class KeplerArc:
+    """
+    Интерполянт аналитического (кеплеровского) участка: состояние в любой
+    момент вычисляется решением задачи двух тел из начального состояния
+    """
+
+    def __init__(self, t_start, state, mu, ts):
+        """
+        Args:
+            t_start: начало участка (с)
+            state: состояние [x, y, z, vx, vy, vz] в момент t_start
+            mu: гравитационный параметр G*M (м³/с²)
+            ts: узлы участка (для поиска событий)
+        """
+        self.t_start = float(t_start)
+        self.state = np.array(state, dtype=float)
+        self.mu = mu
+        self.ts = np.asarray(ts, dtype=float)
+
+    def __call__(self, t):
+        scalar = np.ndim(t) == 0
+        positions, velocities = kepler.propagate(self.state[0:3], self.state[3:6],
+                                                 np.atleast_1d(t) - self.t_start, self.mu)
+        states = np.hstack([positions, velocities]).T
+        return states[:, 0] if scalar else states
+
+
+class HermiteInterpolant:
+    """Кубический интерполянт Эрмита по узлам схемы с постоянным шагом"""
+
+    def __init__(self, t, y, derivatives):
+        """
+        Args:
+            t: узлы (с)
+            y: состояния в узлах формы (6, n)
+            derivatives: производные состояния в узлах формы (6, n)
+        """
+        self.ts = np.asarray(t, dtype=float)
+        self.spline = CubicHermiteSpline(self.ts, y, derivatives, axis=1)
+
+    def __call__(self, t):
+        return self.spline(t)
+
+
+class DenseTrajectory:
+    """
+    Непрерывная траектория, составленная из интерполянтов участков
+
+    Хранит не все точки, а плотную выдачу решателя (OdeSolution), аналитические
+    кеплеровские дуги и интерполянты Эрмита для схем с постоянным шагом.
+    Состояние можно запросить в любой момент с точностью решателя.
+    """
+
+    def __init__(self, pieces):
+        """
+        Args:
+            pieces: интерполянты участков в порядке времени; у каждого есть
+                    узлы ts и вызов piece(t) -> состояние (6,) или (6, n)
+        """
+        self.pieces = [piece for piece in pieces if len(piece.ts) > 1]
+        self.starts = np.array([piece.ts[0] for piece in self.pieces])
+        self.t_min = float(self.pieces[0].ts[0])
+        self.t_max = float(self.pieces[-1].ts[-1])
+
+    @property
+    def breakpoints(self):
+        """Узлы всех участков (шаги решателя и точки кеплеровских дуг)"""
+        return np.unique(np.concatenate([piece.ts for piece in self.pieces]))
+
+    def __call__(self, t):
+        """
+        Состояние в момент(ы) t (значения вне интервала приводятся к границам)
+
+        Returns:
+            Массив (6,) для числа или (6, n) для массива моментов
+        """
+        scalar = np.ndim(t) == 0
+        t = np.clip(np.atleast_1d(np.asarray(t, dtype=float)), self.t_min, self.t_max)
+        index = np.clip(np.searchsorted(self.starts, t, side='right') - 1,
+                        0, len(self.pieces) - 1)
+
+        states = np.empty((6, len(t)))
+        for i in np.unique(index):
+            mask = index == i
+            states[:, mask] = self.pieces[i](t[mask])
+        return states[:, 0] if scalar else states
+
+    def position(self, t):
+        """Положение [x, y, z] (м)"""
+        return self(t)[0:3]
+
+    def velocity(self, t):
+        """Скорость [vx, vy, vz] (м/с)"""
+        return self(t)[3:6]
+
+    def resample(self, n_points=None, dt=None):
+        """
+        Выборка на равномерной сетке времени (например, для анимации)
+
+        Args:
+            n_points: число точек
+            dt: шаг по времени (с); используется, если n_points не задано
+
+        Returns:
+            Кортеж (t, y) с y формы (6, n)
+        """
+        if n_points is None:
+            if dt is None:
+                raise ValueError("Нужно указать n_points или dt")
+            n_points = int(np.floor((self.t_max - self.t_min) / dt)) + 1
+            t = self.t_min + dt * np.arange(n_points)
+        else:
+            t = np.linspace(self.t_min, self.t_max, n_points)
+        return t, self(t)
+
+    def locate(self, function, direction=0, samples_per_step=4, xtol=1e-12):
+        """
+        Моменты, в которые function(t, state) меняет знак
+
+        Знак проверяется в узлах и в samples_per_step промежуточных точках
+        каждого шага, момент уточняется методом Брента по интерполянту.
+
+        Args:
+            function: векторная функция function(t, states) для t формы (n,)
+                      и states формы (6, n)
+            direction: 1 — только рост, -1 — только убывание, 0 — любые
+            samples_per_step: число подшагов на шаг решателя
+
+        Returns:
+            Массив моментов событий (с)
+        """
+        nodes = self.breakpoints
+        fractions = np.arange(samples_per_step) / samples_per_step
+        grid = (nodes[:-1, None] + np.diff(nodes)[:, None] * fractions).ravel()
+        grid = np.append(grid, nodes[-1])
+
+        values = np.asarray(function(grid, self(grid)), dtype=float)
+        rising = (values[:-1] < 0) & (values[1:] >= 0)
+        falling = (values[:-1] > 0) & (values[1:] <= 0)
+        if direction > 0:
+            crossings = rising
+        elif direction < 0:
+            crossings = falling
+        else:
+            crossings = rising | falling
+
+        def scalar_function(time):
+            return float(function(np.array([time]), self(np.array([time])))[0])
+
+        times = []
+        for i in np.flatnonzero(crossings):
+            if values[i + 1] == 0:
+                times.append(grid[i + 1])
+            else:
+                times.append(brentq(scalar_function, grid[i], grid[i + 1], xtol=xtol))
+        return np.array(times)
+
+    def altitude_crossings(self, body_radius, altitude, direction=0):
+        """Моменты прохождения высоты altitude (м) над сферой радиуса body_radius"""
+        def height(t, states):
+            return np.sqrt(np.sum(states[0:3] ** 2, axis=0)) - body_radius - altitude
+
+        return self.locate(height, direction)
@@ -0,0 +1,225 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+# Сигнатура и версия формата файла
+STORE_MAGIC = b'PFTRAJ01'
+STORE_VERSION = 1
+
+# Выравнивание блоков (байт): столбцы начинаются с границы, удобной для memmap
+STORE_ALIGNMENT = 64
+
+# Столбцы траектории в порядке компонент состояния решения
+STATE_COLUMNS = ('x', 'y', 'z', 'vx', 'vy', 'vz')
+COLUMNS = ('t',) + STATE_COLUMNS
+
+# Индекс запусков: начало и длина каждого запуска в столбцах (в точках)
+INDEX_DTYPE = np.dtype([('start', np.int64), ('length', np.int64)])
+
+
+def _aligned(offset):
+    """Смещение, округлённое вверх до STORE_ALIGNMENT"""
+    return -(-offset // STORE_ALIGNMENT) * STORE_ALIGNMENT
+
+
+def _data_start(header_length):
+    """Начало данных: сигнатура, длина заголовка, заголовок и выравнивание"""
+    return _aligned(len(STORE_MAGIC) + 8 + header_length)
+
+
+class TrajectoryStoreWriter:
+    """
+    Потоковая запись траекторий в столбцовый файл
+
+    Столбцы t, x, y, z, vx, vy, vz накапливаются во временных файлах
+    (память не растёт с числом запусков) и при close() собираются в один
+    файл: заголовок JSON, индекс запусков, столбцы, метаданные запусков.
+    """
+
+    def __init__(self, path, position_dtype=np.float64, metadata=None):
+        """
+        Args:
+            path: путь к файлу хранилища
+            position_dtype: тип координат x, y, z (np.float32 вдвое уменьшает
+                            объём; точность около 0.5 м при радиусе Земли)
+            metadata: общие метаданные хранилища (словарь, сериализуемый в JSON)
+        """
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self.dtypes = {name: np.dtype(np.float64) for name in COLUMNS}
+        for name in ('x', 'y', 'z'):
+            self.dtypes[name] = np.dtype(position_dtype)
+
+        self._directory = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)) or None)
+        self._columns = {name: open(os.path.join(self._directory, name), 'wb')
+                         for name in COLUMNS}
+        self._index = []
+        self._run_metadata = []
+        self._n_points = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._cleanup()
+
+    def append(self, t, y, metadata=None):
+        """
+        Добавление запуска
+
+        Args:
+            t: моменты времени формы (n,)
+            y: состояния формы (6, n) (как solution.y)
+            metadata: метаданные запуска (словарь, сериализуемый в JSON)
+
+        Returns:
+            Номер запуска в хранилище
+        """
+        t = np.asarray(t, dtype=np.float64)
+        y = np.asarray(y)
+        if y.shape != (len(STATE_COLUMNS), len(t)):
+            raise ValueError(f"Ожидались состояния формы (6, {len(t)}), получено {y.shape}")
+
+        self._columns['t'].write(t.tobytes())
+        for row, name in enumerate(STATE_COLUMNS):
+            values = np.ascontiguousarray(y[row], dtype=self.dtypes[name])
+            self._columns[name].write(values.tobytes())
+
+        self._index.append((self._n_points, len(t)))
+        self._run_metadata.append(metadata or {})
+        self._n_points += len(t)
+        return len(self._index) - 1
+
+    def append_solution(self, solution, metadata=None):
+        """Добавление решения simulate_fall (или solve_ivp)"""
+        return self.append(solution.t, solution.y, metadata)
+
+    def close(self):
+        """Сборка итогового файла (атомарно через временный файл)"""
+        for stream in self._columns.values():
+            stream.close()
+
+        index = np.array(self._index, dtype=INDEX_DTYPE).reshape(-1)
+        run_metadata = json.dumps(self._run_metadata).encode('utf-8')
+
+        # Смещения блоков отсчитываются от начала данных, которые идут
+        # сразу за заголовком (с выравниванием)
+        index_offset = 0
+        offset = _aligned(index.nbytes)
+        columns = {}
+        for name in COLUMNS:
+            columns[name] = {'dtype': self.dtypes[name].str, 'offset': offset}
+            offset = _aligned(offset + self._n_points * self.dtypes[name].itemsize)
+
+        header = {
+            'version': STORE_VERSION,
+            'n_runs': len(index),
+            'n_points': self._n_points,
+            'index_offset': index_offset,
+            'columns': columns,
+            'metadata_offset': offset,
+            'metadata_length': len(run_metadata),
+            'metadata': self.metadata,
+        }
+        header_bytes = json.dumps(header).encode('utf-8')
+        data_start = _data_start(len(header_bytes))
+
+        handle, temporary = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as stream:
+                stream.write(STORE_MAGIC)
+                stream.write(np.uint64(len(header_bytes)).tobytes())
+                stream.write(header_bytes)
+
+                stream.seek(data_start + index_offset)
+                stream.write(index.tobytes())
+                for name in COLUMNS:
+                    stream.seek(data_start + columns[name]['offset'])
+                    with open(os.path.join(self._directory, name), 'rb') as column:
+                        shutil.copyfileobj(column, stream, 16 * 1024 ** 2)
+                stream.seek(data_start + header['metadata_offset'])
+                stream.write(run_metadata)
+            os.replace(temporary, self.path)
+        finally:
+            self._cleanup()
+
+    def _cleanup(self):
+        for stream in self._columns.values():
+            stream.close()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+class TrajectoryStore:
+    """
+    Чтение столбцового хранилища траекторий через np.memmap
+
+    Открытие читает только заголовок; индекс и столбцы отображаются в память,
+    поэтому выборка одного запуска или одного столбца не загружает остальное.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as stream:
+            magic = stream.read(len(STORE_MAGIC))
+            if magic != STORE_MAGIC:
+                raise ValueError(f"{path}: не является хранилищем траекторий")
+            header_length = int(np.frombuffer(stream.read(8), dtype=np.uint64)[0])
+            self.header = json.loads(stream.read(header_length).decode('utf-8'))
+
+        if self.header['version'] != STORE_VERSION:
+            raise ValueError(f"{path}: неподдерживаемая версия {self.header['version']}")
+
+        self.metadata = self.header['metadata']
+        self._data_start = _data_start(header_length)
+        self.index = self._map(self.header['index_offset'], INDEX_DTYPE, self.header['n_runs'])
+        self._columns = {}
+        self._run_metadata = None
+
+    def __len__(self):
+        return self.header['n_runs']
+
+    def __getitem__(self, run):
+        """Запуск в виде (t, y) с y формы (6, n) (копия в памяти)"""
+        columns = self.run(run)
+        return (np.array(columns['t']),
+                np.array([columns[name] for name in STATE_COLUMNS], dtype=np.float64))
+
+    def _map(self, offset, dtype, count):
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r',
+                         offset=self._data_start + offset, shape=(count,))
+
+    def column(self, name):
+        """Столбец всех запусков целиком (np.memmap)"""
+        if name not in self._columns:
+            info = self.header['columns'][name]
+            self._columns[name] = self._map(info['offset'], np.dtype(info['dtype']),
+                                            self.header['n_points'])
+        return self._columns[name]
+
+    def run(self, run, columns=COLUMNS):
+        """
+        Столбцы одного запуска без копирования
+
+        Returns:
+            Словарь имя столбца -> срез np.memmap
+        """
+        start, length = (int(value) for value in self.index[run])
+        return {name: self.column(name)[start:start + length] for name in columns}
+
+    def run_metadata(self, run=None):
+        """Метаданные запуска (или список для всех при run=None)"""
+        if self._run_metadata is None:
+            with open(self.path, 'rb') as stream:
+                stream.seek(self._data_start + self.header['metadata_offset'])
+                self._run_metadata = json.loads(
+                    stream.read(self.header['metadata_length']).decode('utf-8'))
+        return self._run_metadata if run is None else self._run_metadata[run]
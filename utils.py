@@ -47,16 +47,123 @@ def calculate_orbit_velocity(body_radius, body_mass, altitude, G=6.67430e-11):
     return np.sqrt(G * body_mass / r)
 
 
-def optimize_trajectory_for_animation(trajectory, time, max_points=500):
+def decimate_trajectory(points, tolerance, keep=None, max_points=None):
+    """
+    Прореживание ломаной алгоритмом Рамера–Дугласа–Пекера
+
+    Оставляет наименьший набор точек, при котором исходная ломаная отстоит
+    от прореженной не более чем на tolerance. Каждый проход обрабатывает
+    все отрезки сразу (векторно): на отрезке с наибольшим отклонением
+    больше допуска добавляется самая удалённая точка.
+
+    Проход стоит O(n log n), а число проходов в худшем случае (одна точка
+    за проход) растёт как n, поэтому с max_points уточнение прекращается,
+    как только сохранено больше max_points точек.
+
+    Args:
+        points: координаты формы (d, n)
+        tolerance: допустимое отклонение (в единицах координат)
+        keep: индексы точек, которые сохраняются всегда
+        max_points: предел числа точек; при его превышении возвращается
+                    незавершённый набор (больше max_points индексов)
+
+    Returns:
+        Отсортированный массив индексов сохранённых точек
+    """
+    points = np.asarray(points, dtype=float)
+    n = points.shape[1]
+    kept = {0, n - 1}
+    if keep is not None:
+        kept.update(int(i) for i in keep)
+    kept = np.array(sorted(i for i in kept if 0 <= i < n))
+    if n <= 2:
+        return kept
+
+    index = np.arange(n)
+    while True:
+        # Отрезок прореженной ломаной, которому принадлежит каждая точка
+        segment = np.minimum(np.searchsorted(kept, index, side='right') - 1, len(kept) - 2)
+        start = points[:, kept[segment]]
+        chord = points[:, kept[segment + 1]] - start
+        offset = points - start
+
+        # Расстояние до отрезка (проекция ограничена концами)
+        length_squared = np.sum(chord ** 2, axis=0)
+        projection = np.sum(offset * chord, axis=0) / np.where(length_squared > 0,
+                                                               length_squared, 1.0)
+        projection = np.clip(projection, 0.0, 1.0)
+        distance = np.sqrt(np.sum((offset - projection * chord) ** 2, axis=0))
+        distance[kept] = 0.0
+
+        # Самая удалённая точка каждого отрезка
+        order = np.lexsort((-distance, segment))
+        first = np.ones(n, dtype=bool)
+        first[1:] = segment[order][1:] != segment[order][:-1]
+        candidates = order[first]
+        candidates = candidates[distance[candidates] > tolerance]
+        if len(candidates) == 0:
+            return kept
+        kept = np.union1d(kept, candidates)
+        if max_points is not None and len(kept) > max_points:
+            return kept
+
+
+def atmosphere_entry_index(trajectory, body_radius, atmosphere_height):
+    """Индекс первой точки внутри атмосферы после полёта над ней (или None)"""
+    if atmosphere_height <= 0:
+        return None
+    altitude = np.sqrt(np.sum(np.asarray(trajectory, dtype=float) ** 2, axis=0)) - body_radius
+    inside = altitude <= atmosphere_height
+    entries = np.flatnonzero(inside[1:] & ~inside[:-1])
+    return int(entries[0] + 1) if len(entries) else None
+
+
+def optimize_trajectory_for_animation(trajectory, time, max_points=500, method='rdp',
+                                      tolerance=None, body_radius=None, atmosphere_height=0):
     """
     Оптимизация траектории для анимации - уменьшение количества точек
     если траектория слишком длинная
+
+    В режиме 'rdp' точки выбираются по геометрическому допуску: на участках
+    с большой кривизной (вход в атмосферу) их остаётся больше, на
+    почти прямолинейных — меньше. Начальная точка, точка удара и точка входа
+    в атмосферу сохраняются всегда. Если при допуске остаётся больше
+    max_points точек, допуск увеличивается; попытка с малым допуском
+    обрывается, как только точек становится больше max_points.
+    Траектория не длиннее max_points возвращается без изменений.
+
+    Args:
+        trajectory: координаты [x, y, z] (м)
+        time: моменты времени (с)
+        max_points: наибольшее число точек
+        method: 'rdp' (по допуску) или 'uniform' (равномерно по индексам)
+        tolerance: допуск (м); по умолчанию 0.1% размера траектории
+        body_radius, atmosphere_height: для поиска точки входа в атмосферу
     """
     if len(time) <= max_points:
         return trajectory, time
 
-    # Выбираем точки с равными интервалами
-    indices = np.linspace(0, len(time) - 1, max_points, dtype=int)
+    if method == 'uniform':
+        # Выбираем точки с равными интервалами
+        indices = np.linspace(0, len(time) - 1, max_points, dtype=int)
+    elif method == 'rdp':
+        points = np.asarray(trajectory, dtype=float)
+        if tolerance is None:
+            extent = np.linalg.norm(points.max(axis=1) - points.min(axis=1))
+            tolerance = 1e-3 * extent
+
+        keep = []
+        if body_radius is not None:
+            entry = atmosphere_entry_index(points, body_radius, atmosphere_height)
+            if entry is not None:
+                keep.append(entry)
+
+        indices = decimate_trajectory(points, tolerance, keep, max_points)
+        while len(indices) > max_points and tolerance > 0:
+            tolerance *= 2
+            indices = decimate_trajectory(points, tolerance, keep, max_points)
+    else:
+        raise ValueError(f"Неизвестный метод прореживания: {method}")
 
     optimized_trajectory = [
         trajectory[0][indices],
@@ -65,4 +172,31 @@ def optimize_trajectory_for_animation(trajectory, time, max_points=500):
     ]
     optimized_time = time[indices]
 
-    return optimized_trajectory, optimized_time
\ No newline at end of file
+    return optimized_trajectory, optimized_time
+
+
+def initial_velocity_vector(body_params, altitude, velocity='orbital', G=6.67430e-11):
+    """
+    Вектор начальной скорости по тем же правилам, что и в GUI
+
+    Args:
+        body_params: параметры небесного тела
+        altitude: начальная высота над поверхностью (м)
+        velocity: 'orbital', 'zero', модуль скорости вдоль оси X (м/с)
+                  или вектор [vx, vy, vz]
+
+    Returns:
+        Вектор скорости [vx, vy, vz] (м/с)
+    """
+    if isinstance(velocity, str):
+        if velocity == 'orbital':
+            speed = calculate_orbit_velocity(body_params['radius'], body_params['mass'], altitude, G)
+            return np.array([speed, 0.0, 0.0])
+        if velocity == 'zero':
+            return np.zeros(3)
+        raise ValueError(f"Неизвестный тип скорости: {velocity}")
+
+    if np.ndim(velocity) == 0:
+        return np.array([float(velocity), 0.0, 0.0])
+
+    return np.asarray(velocity, dtype=float)
@@ -0,0 +1,220 @@
+import numpy as np
+
+from integrators import INTEGRATORS, integrate
+from physics_planet import INTERFACE_TOLERANCE
+
+
+# Размер расширенного состояния: состояние (6), матрица перехода Φ (6×6)
+# и чувствительность к постоянной сопротивления k = 0.5 * Cd * A / m (6)
+STATE_SIZE = 6
+AUGMENTED_SIZE = STATE_SIZE + STATE_SIZE ** 2 + STATE_SIZE
+
+# Параметры, по которым выдаются чувствительности
+SENSITIVITY_PARAMETERS = ('initial_altitude', 'initial_velocity', 'mass', 'cross_area',
+                          'drag_coef')
+
+
+def split_augmented(augmented):
+    """Расширенное состояние -> (состояние, Φ формы (6, 6), ∂y/∂k формы (6,))"""
+    state = augmented[0:STATE_SIZE]
+    stm = augmented[STATE_SIZE:STATE_SIZE + STATE_SIZE ** 2].reshape(STATE_SIZE, STATE_SIZE)
+    drag_sensitivity = augmented[STATE_SIZE + STATE_SIZE ** 2:]
+    return state, stm, drag_sensitivity
+
+
+def initial_augmented(state):
+    """Расширенное начальное состояние: Φ(t0) = I, ∂y/∂k(t0) = 0"""
+    augmented = np.zeros(AUGMENTED_SIZE)
+    augmented[0:STATE_SIZE] = state
+    augmented[STATE_SIZE:STATE_SIZE + STATE_SIZE ** 2] = np.eye(STATE_SIZE).ravel()
+    return augmented
+
+
+def variational_rhs(model):
+    """
+    Правая часть уравнений движения вместе с уравнениями в вариациях:
+
+        Φ' = A Φ,  S' = A S + ∂f/∂k,  A = ∂f/∂y (PlanetFall.jacobian)
+
+    Args:
+        model: PlanetFall
+
+    Returns:
+        Функция rhs(t, augmented) для расширенного состояния
+    """
+    def rhs(t, augmented):
+        state, stm, drag_sensitivity = split_augmented(augmented)
+        da_dr, da_dv, da_dk = model.acceleration_partials(state, t)
+
+        derivative = np.empty(AUGMENTED_SIZE)
+        derivative[0:STATE_SIZE] = model.equations_of_motion_fast(t, state)
+
+        # Блочная структура A = [[0, I], [∂a/∂r, ∂a/∂v]]
+        stm_derivative = derivative[STATE_SIZE:STATE_SIZE + STATE_SIZE ** 2].reshape(6, 6)
+        stm_derivative[0:3] = stm[3:6]
+        stm_derivative[3:6] = da_dr @ stm[0:3] + da_dv @ stm[3:6]
+
+        derivative[STATE_SIZE + STATE_SIZE ** 2:][0:3] = drag_sensitivity[3:6]
+        derivative[STATE_SIZE + STATE_SIZE ** 2:][3:6] = (da_dr @ drag_sensitivity[0:3]
+                                                         + da_dv @ drag_sensitivity[3:6]
+                                                         + da_dk)
+        return derivative
+
+    return rhs
+
+
+def saltation_matrix(state, jump):
+    """
+    Матрица скачка чувствительностей при пересечении сферы |r| = const,
+    на которой правая часть меняется скачком на jump = f⁺ - f⁻:
+
+        Φ⁺ = (I + jump nᵀ / (n·f⁻)) Φ⁻,  n = [r / |r|, 0]
+
+    Без неё момент пересечения считался бы не зависящим от начальных условий
+    """
+    normal = np.zeros(STATE_SIZE)
+    normal[0:3] = state[0:3] / np.linalg.norm(state[0:3])
+    radial_rate = float(normal[0:3] @ state[3:6])
+    return np.eye(STATE_SIZE) + np.outer(jump, normal) / radial_rate
+
+
+def drag_jump(model, state, entering):
+    """Скачок правой части на границе атмосферы (ускорение сопротивления на высоте top)"""
+    density = model.atmospheric_density(model._atmosphere_top)
+    velocity = state[3:6]
+    drag = -model._drag_constant * density * np.linalg.norm(velocity) * velocity
+    jump = np.zeros(STATE_SIZE)
+    jump[3:6] = drag if entering else -drag
+    return jump
+
+
+def integrate_variational(model, initial_state, t_span, policies, method='RK45'):
+    """
+    Интегрирование падения вместе с уравнениями в вариациях
+
+    Участки и события те же, что в PlanetFall._integrate_fall, но вакуумные
+    участки интегрируются численно (матрица перехода аналитического участка
+    не строится). На границе атмосферы чувствительности проходят через
+    матрицу скачка (saltation_matrix).
+
+    Args:
+        model: PlanetFall
+        initial_state: [x, y, z, vx, vy, vz]
+        t_span: интервал [t0, t1]
+        policies: политики шага по участкам (как PHASE_POLICIES)
+        method: адаптивный метод SciPy из integrators.INTEGRATORS
+
+    Returns:
+        Кортеж (segments, phases, augmented): решения участков с расширенным
+        состоянием, описание участков и расширенное состояние в конце
+    """
+    if INTEGRATORS[method]['kind'] != 'scipy':
+        raise ValueError(f"Уравнения в вариациях решаются только методами SciPy, а не {method}")
+
+    radius = model._radius
+    interface_radius = model.interface_radius()
+    boundary_margin = INTERFACE_TOLERANCE * interface_radius
+
+    def surface_event(t, augmented):
+        return np.linalg.norm(augmented[0:3]) - radius
+
+    surface_event.terminal = True
+    surface_event.direction = -1
+
+    def interface_event(t, augmented):
+        r = np.linalg.norm(augmented[0:3])
+        return r - interface_radius - interface_event.direction * boundary_margin
+
+    interface_event.terminal = True
+
+    rhs = variational_rhs(model)
+    t_start = t_span[0]
+    augmented = initial_augmented(initial_state)
+    in_atmosphere = model._has_drag and model.starts_in_atmosphere(initial_state,
+                                                                   interface_radius)
+    segments = []
+    phases = []
+
+    while True:
+        phase = 'atmosphere' if in_atmosphere else 'vacuum'
+        events = [surface_event]
+        if model._has_drag:
+            interface_event.direction = 1 if in_atmosphere else -1
+            events.append(interface_event)
+
+        options = dict(policies[phase])
+        options.pop('fixed_step', None)
+        segment = integrate(rhs, (t_start, t_span[1]), augmented, events=events,
+                            method=method, **options)
+        segments.append(segment)
+        phases.append({'phase': phase, 't_start': t_start, 't_end': segment.t[-1],
+                       'nfev': segment.nfev, 'method': method,
+                       'wall_time': segment.wall_time})
+        augmented = segment.y[:, -1].copy()
+
+        crossed = len(segment.t_events) > 1 and len(segment.t_events[1]) > 0
+        if segment.status != 1 or not crossed or len(segment.t_events[0]) > 0:
+            break
+
+        # Скачок сопротивления на границе переносится на чувствительности
+        # (split_augmented возвращает представления augmented)
+        state, stm, drag_sensitivity = split_augmented(augmented)
+        jump = saltation_matrix(state, drag_jump(model, state, entering=not in_atmosphere))
+        stm[:] = jump @ stm
+        drag_sensitivity[:] = jump @ drag_sensitivity
+
+        t_start = segment.t_events[1][0]
+        in_atmosphere = not in_atmosphere
+
+    return segments, phases, augmented
+
+
+def impact_sensitivities(model, t, augmented, impacted):
+    """
+    Чувствительности конечного состояния и момента удара к параметрам
+
+    При ударе учитывается сдвиг момента удара: для поверхности |r| = R
+
+        dt/dp = -(n·∂y/∂p) / (n·f),  dy_удар/dp = ∂y/∂p + f dt/dp
+
+    Производные по Cd и A берутся как ∂y/∂k · k / p. При нулевом Cd или A
+    сопротивления нет (k = 0, участков в атмосфере не строится), и производные
+    по drag_coef и cross_area считаются нулевыми
+
+    Args:
+        model: PlanetFall
+        t: конечный момент
+        augmented: расширенное состояние в конце
+        impacted: закончился ли полёт ударом
+
+    Returns:
+        Кортеж (stm, state, impact_time): матрица перехода, словарь
+        параметр -> ∂y/∂p формы (6,) или (6, 3) для initial_velocity
+        и словарь параметр -> dt/dp (None без удара)
+    """
+    state, stm, drag_sensitivity = split_augmented(augmented)
+    k = model._drag_constant
+
+    # Начальное положение [0, 0, R + h0]: высота входит только в z
+    derivatives = {
+        'initial_altitude': stm[:, 2].copy(),
+        'initial_velocity': stm[:, 3:6].copy(),
+        'mass': drag_sensitivity * (-k / model.mass),
+        'cross_area': drag_sensitivity * (k / model.cross_area if model.cross_area else 0.0),
+        'drag_coef': drag_sensitivity * (k / model.drag_coef if model.drag_coef else 0.0),
+    }
+
+    if not impacted:
+        return stm.copy(), derivatives, None
+
+    normal = np.zeros(STATE_SIZE)
+    normal[0:3] = state[0:3] / np.linalg.norm(state[0:3])
+    derivative = np.asarray(model.equations_of_motion_fast(t, state))
+    radial_rate = float(normal @ derivative)
+
+    impact_time = {}
+    for name, value in derivatives.items():
+        delay = -(normal @ value) / radial_rate
+        derivatives[name] = value + np.multiply.outer(derivative, delay)
+        impact_time[name] = float(delay) if np.ndim(delay) == 0 else delay
+    return stm.copy(), derivatives, impact_time
@@ -1,8 +1,20 @@
 import matplotlib.pyplot as plt
+import matplotlib.animation as animation
 from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
 
 
+def default_writer(filename, fps):
+    """Писатель анимации по расширению файла: ffmpeg для видео, ImageMagick или Pillow для GIF"""
+    if filename.lower().endswith('.gif'):
+        for name in ('imagemagick', 'pillow'):
+            if animation.writers.is_available(name):
+                return animation.writers[name](fps=fps)
+    elif animation.writers.is_available('ffmpeg'):
+        return animation.writers['ffmpeg'](fps=fps)
+    raise RuntimeError(f"Нет доступного писателя анимации для {filename}")
+
+
 class FlightVisualizer:
     """
     Класс для визуализации траектории полёта тела
@@ -67,26 +79,114 @@ class FlightVisualizer:
         plt.tight_layout()
         plt.show()
 
-    def save_animation_frames(self, trajectory, time, num_frames=50):
+    def _prepare_animation(self, trajectory, dpi):
         """
-        Создание кадров для анимации (опционально)
+        Одна фигура для всех кадров: оси с фиксированными пределами,
+        линия траектории и маркер тела, которые обновляются на месте
+
+        Returns:
+            Кортеж (линия траектории, маркер тела)
         """
+        self.create_3d_plot()
+        self.fig.set_dpi(dpi)
+
+        # Пределы по всей траектории, чтобы масштаб не менялся между кадрами
+        for set_limits, axis in zip((self.ax.set_xlim, self.ax.set_ylim, self.ax.set_zlim),
+                                    trajectory):
+            low, high = float(np.min(axis)), float(np.max(axis))
+            margin = 0.05 * (high - low) or 1.0
+            set_limits(low - margin, high + margin)
+
+        line, = self.ax.plot([], [], [], color='blue', linewidth=2)
+        marker, = self.ax.plot([], [], [], 'o', color='red', markersize=10)
+        return line, marker
+
+    def _update_frames(self, trajectory, time, num_frames, line, marker):
+        """Генератор: обновляет артисты для очередного кадра и выдаёт его индекс"""
         x, y, z = trajectory
 
         # Выбираем равномерно распределённые индексы для кадров
         indices = np.linspace(0, len(x) - 1, num_frames, dtype=int)
 
-        frames = []
         for i in indices:
-            self.create_3d_plot()
-            self.ax.plot(x[:i + 1], y[:i + 1], z[:i + 1], color='blue', linewidth=2)
-            self.ax.scatter(x[i], y[i], z[i], color='red', s=100)
+            line.set_data(x[:i + 1], y[:i + 1])
+            line.set_3d_properties(z[:i + 1])
+            marker.set_data([x[i]], [y[i]])
+            marker.set_3d_properties([z[i]])
             self.ax.set_title(f'Траектория полёта (t = {time[i]:.2f} с)')
+            yield i
+
+    def iter_animation_frames(self, trajectory, time, num_frames=50, dpi=100):
+        """
+        Потоковая выдача кадров анимации в виде RGBA-массивов
+
+        Фигура создаётся один раз, в каждом кадре обновляются только линия,
+        маркер и заголовок. Выдаваемый массив — представление буфера холста,
+        который перезаписывается следующим кадром: если кадр нужно сохранить,
+        его следует скопировать.
+
+        Yields:
+            Массив формы (высота, ширина, 4) типа uint8
+        """
+        line, marker = self._prepare_animation(trajectory, dpi)
+        try:
+            for _ in self._update_frames(trajectory, time, num_frames, line, marker):
+                self.fig.canvas.draw()
+                yield np.asarray(self.fig.canvas.buffer_rgba())
+        finally:
+            plt.close(self.fig)
 
-            # Сохраняем кадр
-            self.fig.canvas.draw()
-            frame = np.array(self.fig.canvas.renderer.buffer_rgba())
-            frames.append(frame)
+    def export_animation(self, trajectory, time, filename=None, num_frames=50, fps=20,
+                         dpi=100, writer=None, frame_sink=None):
+        """
+        Экспорт анимации в файл (MP4, GIF) или в приёмник кадров
+
+        Кадры передаются писателю matplotlib.animation по одному, поэтому
+        расход памяти не зависит от числа кадров (кроме PillowWriter,
+        который держит кадры GIF до конца записи; при наличии ImageMagick
+        для GIF используется он).
+
+        Args:
+            trajectory: массив координат [x, y, z]
+            time: моменты времени (с)
+            filename: имя выходного файла (.mp4, .gif, ...)
+            num_frames: число кадров
+            fps: частота кадров
+            dpi: разрешение
+            writer: писатель matplotlib.animation (по умолчанию — по расширению)
+            frame_sink: функция frame_sink(rgba) для сырых кадров вместо файла
+
+        Returns:
+            Число записанных кадров
+        """
+        if frame_sink is not None:
+            count = 0
+            for frame in self.iter_animation_frames(trajectory, time, num_frames, dpi):
+                frame_sink(frame)
+                count += 1
+            return count
+
+        if filename is None:
+            raise ValueError("Нужно указать filename или frame_sink")
+        if writer is None:
+            writer = default_writer(filename, fps)
+
+        line, marker = self._prepare_animation(trajectory, dpi)
+        count = 0
+        try:
+            with writer.saving(self.fig, filename, dpi):
+                for _ in self._update_frames(trajectory, time, num_frames, line, marker):
+                    writer.grab_frame()
+                    count += 1
+        finally:
             plt.close(self.fig)
+        return count
 
-        return frames
\ No newline at end of file
+    def save_animation_frames(self, trajectory, time, num_frames=50):
+        """
+        Создание кадров для анимации (опционально)
+
+        Кадры накапливаются в списке; для длинных анимаций лучше использовать
+        export_animation или iter_animation_frames
+        """
+        return [frame.copy() for frame in self.iter_animation_frames(trajectory, time, num_frames)]
@@ -1,7 +1,39 @@
+import functools
+
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 import matplotlib.animation as animation
+from matplotlib.legend import Legend
+
+from visualization import default_writer
+
+
+# Параметры анимации: частота кадров и длительность полного прохода (с)
+ANIMATION_FPS = 30
+ANIMATION_DURATION = 10
+
+# Положение легенды: фиксированное, чтобы не подбирать его ('best') заново
+# на каждом кадре с учётом поверхности планеты
+LEGEND_LOCATION = 'upper right'
+
+
+@functools.lru_cache(maxsize=None)
+def sphere_mesh(n_u=50, n_v=25):
+    """
+    Сетка единичной сферы (вычисляется один раз на процесс)
+
+    Returns:
+        Массивы x, y, z формы (n_v, n_u), доступные только для чтения
+    """
+    u = np.linspace(0, 2 * np.pi, n_u)
+    v = np.linspace(0, np.pi, n_v)
+    u, v = np.meshgrid(u, v)
+
+    mesh = (np.sin(v) * np.cos(u), np.sin(v) * np.sin(u), np.cos(v))
+    for array in mesh:
+        array.flags.writeable = False
+    return mesh
 
 
 class PlanetVisualizer:
@@ -13,11 +45,18 @@ class PlanetVisualizer:
         self.body_params = body_params
         self.fig = None
         self.ax = None
+        # Артисты статического графика и анимации: фигура переиспользуется
+        # в save_static_plot и save_animation
+        self._static_artists = None
+        self._animation_artists = None
+        # Легенды наборов элементов (создаются один раз на фигуру)
+        self._legends = {}
 
     def create_planet_plot(self):
         """Создание 3D визуализации планеты"""
         self.fig = plt.figure(figsize=(14, 10))
         self.ax = self.fig.add_subplot(111, projection='3d')
+        self._legends = {}
 
         # Рисуем планету как простую сферу
         self._draw_simple_planet()
@@ -39,14 +78,11 @@ class PlanetVisualizer:
         """Рисование простой сферы без текстуры"""
         radius = self.body_params['radius']
 
-        # Создаём сферу
-        u = np.linspace(0, 2 * np.pi, 50)
-        v = np.linspace(0, np.pi, 25)
-        u, v = np.meshgrid(u, v)
-
-        x = radius * np.sin(v) * np.cos(u)
-        y = radius * np.sin(v) * np.sin(u)
-        z = radius * np.cos(v)
+        # Сфера из кэшированной сетки
+        unit_x, unit_y, unit_z = sphere_mesh()
+        x = radius * unit_x
+        y = radius * unit_y
+        z = radius * unit_z
 
         # Рисуем одноцветную сферу
         self.ax.plot_surface(x, y, z,
@@ -55,75 +91,221 @@ class PlanetVisualizer:
                              shade=True,
                              antialiased=True)
 
-    def create_animation(self, trajectory, time, title="Анимация падения тела"):
-        """Создание анимации падения в реальном времени"""
-        fig, ax = self.create_planet_plot()
-        ax.set_title(title, fontsize=14, fontweight='bold')
+    def _frame_schedule(self, trajectory, time, max_frames):
+        """
+        Кадры анимации, равномерные по модельному времени
 
-        # Подготовка элементов анимации
-        trajectory_line, = ax.plot([], [], [], 'r-', linewidth=3, alpha=0.8, label='Траектория')
-        current_point, = ax.plot([], [], [], 'ro', markersize=8, label='Текущее положение')
-        start_point, = ax.plot([], [], [], 'go', markersize=10, label='Старт')
-        impact_point, = ax.plot([], [], [], 'rx', markersize=12, label='Удар')
+        Returns:
+            Кортеж (время кадров, индексы последних узлов траектории перед кадром,
+            положения тела в кадрах формы (3, n_frames))
+        """
+        time = np.asarray(time, dtype=float)
+        n_frames = max(2, min(len(time), max_frames))
+        frame_times = np.linspace(time[0], time[-1], n_frames)
 
-        # Отображаем начальную точку сразу
-        start_point.set_data([trajectory[0][0]], [trajectory[1][0]])
-        start_point.set_3d_properties([trajectory[2][0]])
+        # Положение в момент кадра — интерполяция между узлами решателя
+        positions = np.array([np.interp(frame_times, time, axis) for axis in trajectory])
+        indices = np.searchsorted(time, frame_times, side='right')
+        return frame_times, indices, positions
 
-        # Отображаем конечную точку сразу
-        impact_point.set_data([trajectory[0][-1]], [trajectory[1][-1]])
-        impact_point.set_3d_properties([trajectory[2][-1]])
+    def create_animation(self, trajectory, time, title="Анимация падения тела",
+                         fps=ANIMATION_FPS, duration=ANIMATION_DURATION):
+        """
+        Создание анимации падения в реальном времени
 
-        def animate(frame):
-            # Показываем траекторию до текущего кадра
-            idx = min(frame, len(trajectory[0]) - 1)
+        Сфера планеты, оси и неподвижные точки рисуются один раз и сохраняются
+        как фон; в каждом кадре перерисовываются (blit) только линия траектории,
+        маркер тела и текст с временем и высотой. Кадры берутся равномерно
+        по модельному времени, их число ограничено fps * duration.
 
-            trajectory_line.set_data(trajectory[0][:idx], trajectory[1][:idx])
-            trajectory_line.set_3d_properties(trajectory[2][:idx])
+        Args:
+            trajectory: координаты [x, y, z] узлов траектории (м)
+            time: моменты времени узлов (с)
+            title: заголовок графика
+            fps: частота кадров
+            duration: длительность анимации (с)
+        """
+        self.create_planet_plot()
+        self._static_artists = None
+        self._animation_artists = self._create_animation_artists()
+        anim = self._build_animation(trajectory, time, title, fps, duration, blit=True)
+        plt.tight_layout()
+        plt.show()
 
-            current_point.set_data([trajectory[0][idx]], [trajectory[1][idx]])
-            current_point.set_3d_properties([trajectory[2][idx]])
+        return anim
 
-            # Вычисляем текущую высоту
-            current_pos = np.array([trajectory[0][idx], trajectory[1][idx], trajectory[2][idx]])
-            current_altitude = np.linalg.norm(current_pos) - self.body_params['radius']
+    def save_animation(self, trajectory, time, filename, title="Анимация падения тела",
+                       fps=ANIMATION_FPS, duration=ANIMATION_DURATION, dpi=100, writer=None):
+        """
+        Запись анимации в файл без показа окна (MP4, GIF)
 
-            ax.set_title(f'{title}\nВремя: {time[idx]:.1f} с, Высота: {current_altitude:.0f} м',
-                         fontsize=12)
+        Анимация строится на той же фигуре с планетой, что и статический
+        график: подвижные элементы создаются при первом вызове, а в следующих
+        только получают новые данные. На время записи элементы статического
+        графика скрываются. Кадры рисуются без blit: при записи каждый кадр
+        всё равно отрисовывается целиком, а blit добавил бы второй проход.
 
-            return trajectory_line, current_point, start_point, impact_point
+        Args:
+            filename: имя файла; писатель по умолчанию выбирается по расширению
+            writer: писатель matplotlib.animation
+        """
+        created = self.fig is None
+        if created:
+            self.create_planet_plot()
+        if self._animation_artists is None:
+            self._animation_artists = self._create_animation_artists()
 
-        # Создаём анимацию
-        frames = len(trajectory[0])
-        interval = max(10, min(50, 3000 // frames))  # Автоматический расчет интервала
+        static_artists = self._static_artists or ()
+        self._show_artists(self._animation_artists, static_artists)
+        try:
+            anim = self._build_animation(trajectory, time, title, fps, duration, blit=False)
+            if created:
+                # Поля подбираются один раз, когда уже есть заголовок и легенда
+                self.fig.tight_layout()
+            anim.save(filename, writer=writer or default_writer(filename, fps), dpi=dpi)
+        finally:
+            self._show_artists(static_artists, self._animation_artists)
 
-        anim = animation.FuncAnimation(
-            fig, animate, frames=frames,
-            interval=interval, blit=False, repeat=True
-        )
+    def _show_artists(self, shown, hidden):
+        """
+        Переключение набора видимых элементов и легенды на фигуре
 
-        ax.legend()
-        plt.tight_layout()
-        plt.show()
+        Легенда каждого набора создаётся один раз с фиксированным положением
+        LEGEND_LOCATION и дальше только показывается или скрывается
+        """
+        for artist in hidden:
+            artist.set_visible(False)
+        for artist in shown:
+            artist.set_visible(True)
+        for artists, legend in self._legends.items():
+            legend.set_visible(artists == shown)
+        if shown and shown not in self._legends:
+            handles = [artist for artist in shown if artist.get_label()
+                       and not artist.get_label().startswith('_')]
+            legend = Legend(self.ax, handles, [handle.get_label() for handle in handles],
+                            loc=LEGEND_LOCATION)
+            self._legends[shown] = self.ax.add_artist(legend)
 
-        return anim
+    def _create_animation_artists(self):
+        """
+        Элементы анимации на текущих осях: подвижные (animated=True, не попадают
+        в фон) линия траектории, маркер тела и текст, неподвижные точки старта и удара
+        """
+        ax = self.ax
+        trajectory_line, = ax.plot([], [], [], 'r-', linewidth=3, alpha=0.8,
+                                   label='Траектория', animated=True)
+        current_point, = ax.plot([], [], [], 'ro', markersize=8,
+                                 label='Текущее положение', animated=True)
+        readout = ax.text2D(0.02, 0.95, '', transform=ax.transAxes, fontsize=12,
+                            animated=True)
+        start, = ax.plot([], [], [], 'go', markersize=10, label='Старт')
+        impact, = ax.plot([], [], [], 'rx', markersize=12, label='Удар')
+        artists = (trajectory_line, current_point, readout, start, impact)
+        self._show_artists(artists, ())
+        return artists
 
-    def show_static_plot(self, trajectory, title="Траектория падения тела"):
-        """Показать статический график траектории"""
-        fig, ax = self.create_planet_plot()
+    def _build_animation(self, trajectory, time, title, fps, duration, blit):
+        """
+        Объект FuncAnimation на текущей фигуре (см. create_animation)
+
+        Args:
+            blit: перерисовывать поверх сохранённого фона только подвижные
+                  элементы (окно на экране); без blit кадр рисуется целиком
+                  (запись в файл)
+        """
+        fig, ax = self.fig, self.ax
         ax.set_title(title, fontsize=14, fontweight='bold')
+        trajectory_line, current_point, readout, start, impact = self._animation_artists
+        # Элементы с animated=True пропускаются при обычной отрисовке фигуры
+        for artist in (trajectory_line, current_point, readout):
+            artist.set_animated(blit)
 
-        # Рисуем полную траекторию
-        x, y, z = trajectory
-        ax.plot(x, y, z, 'r-', linewidth=3, alpha=0.8, label='Траектория')
-        ax.plot(x[0], y[0], z[0], 'go', markersize=10, label='Старт')
-        ax.plot(x[-1], y[-1], z[-1], 'rx', markersize=12, label='Удар')
+        trajectory = np.asarray(trajectory, dtype=float)
+        frame_times, indices, positions = self._frame_schedule(
+            trajectory, time, int(fps * duration))
+        radius = self.body_params['radius']
+        altitudes = np.linalg.norm(positions, axis=0) - radius
 
-        ax.legend()
-        plt.tight_layout()
+        # Элементы предыдущего задания сбрасываются
+        for line in (trajectory_line, current_point):
+            line.set_data([], [])
+            line.set_3d_properties([])
+        readout.set_text('')
+
+        # Начальная и конечная точки неподвижны и входят в фон
+        start.set_data([trajectory[0][0]], [trajectory[1][0]])
+        start.set_3d_properties([trajectory[2][0]])
+        impact.set_data([trajectory[0][-1]], [trajectory[1][-1]])
+        impact.set_3d_properties([trajectory[2][-1]])
+
+        def animate(frame):
+            # Пройденные узлы траектории и текущее положение между ними
+            idx = indices[frame]
+            x, y, z = positions[:, frame]
+            trajectory_line.set_data(np.append(trajectory[0][:idx], x),
+                                     np.append(trajectory[1][:idx], y))
+            trajectory_line.set_3d_properties(np.append(trajectory[2][:idx], z))
+
+            current_point.set_data([x], [y])
+            current_point.set_3d_properties([z])
+
+            readout.set_text(f'Время: {frame_times[frame]:.1f} с, '
+                             f'Высота: {altitudes[frame]:.0f} м')
+
+            return trajectory_line, current_point, readout
+
+        # Создаём анимацию
+        return animation.FuncAnimation(
+            fig, animate, frames=len(frame_times),
+            interval=1000 / fps, blit=blit, repeat=True
+        )
+
+    def show_static_plot(self, trajectory, title="Траектория падения тела"):
+        """Показать статический график траектории"""
+        self._static_artists = None
+        self._animation_artists = None
+        self._draw_static(trajectory, title)
         plt.show()
 
+    def save_static_plot(self, trajectory, filename, title="Траектория падения тела", dpi=100):
+        """
+        Сохранение статического графика в файл без показа окна
+
+        Фигура с планетой создаётся при первом вызове и переиспользуется:
+        в следующих вызовах обновляются только траектория, точки и заголовок.
+        """
+        self._draw_static(trajectory, title)
+        self.fig.savefig(filename, dpi=dpi)
+
+    def _draw_static(self, trajectory, title):
+        """Обновление (или создание) статического графика траектории"""
+        if self._static_artists is None:
+            if self.fig is None:
+                self.create_planet_plot()
+            ax = self.ax
+            line, = ax.plot([], [], [], 'r-', linewidth=3, alpha=0.8, label='Траектория')
+            start, = ax.plot([], [], [], 'go', markersize=10, label='Старт')
+            impact, = ax.plot([], [], [], 'rx', markersize=12, label='Удар')
+            self._static_artists = (line, start, impact)
+            self._show_artists(self._static_artists, self._animation_artists or ())
+            plt.tight_layout()
+
+        line, start, impact = self._static_artists
+        x, y, z = trajectory
+        line.set_data(x, y)
+        line.set_3d_properties(z)
+        start.set_data([x[0]], [y[0]])
+        start.set_3d_properties([z[0]])
+        impact.set_data([x[-1]], [y[-1]])
+        impact.set_3d_properties([z[-1]])
+        self.ax.set_title(title, fontsize=14, fontweight='bold')
+
     def close(self):
         """Закрыть график"""
         if self.fig:
-            plt.close(self.fig)
\ No newline at end of file
+            plt.close(self.fig)
+        self.fig = None
+        self.ax = None
+        self._static_artists = None
+        self._legends = {}
+        self._animation_artists = None
\ No newline at end of file